@@ -1,41 +1,152 @@
-import matplotlib
-matplotlib.use('Agg')  # Valid for server usage
-
-import matplotlib.pyplot as plt
-import pandas as pd
+import hashlib
+import json
 import io
-import seaborn as sns
+import os
+import threading
+from collections import OrderedDict
+from metrics import metrics
+
+# matplotlib/seaborn/pandas di-import saat grafik pertama dibuat (lazy) supaya start bot cepat
+_plotting_modules = None
+_plotting_lock = threading.Lock()
+
+def _load_plotting():
+    """Import & konfigurasi matplotlib + seaborn sekali saja (aman dipanggil dari banyak thread)"""
+    global _plotting_modules
+    with _plotting_lock:
+        if _plotting_modules is None:
+            import matplotlib
+            matplotlib.use('Agg')  # Valid for server usage
+            import matplotlib.figure
+            import matplotlib.ticker
+            import seaborn as sns
+            
+            # Set style
+            sns.set_style("whitegrid")
+            _plotting_modules = (matplotlib, sns)
+    return _plotting_modules
+
+class ChartCache:
+    """
+    Cache PNG content-addressed (key = hash data agregat grafik) dengan LRU
+    berbatas ukuran dan persistensi opsional ke disk.
+    Entri bisa diberi tag (mis. (user_id, '2025-01')) supaya bisa di-invalidate
+    saat ada transaksi baru di bulan tersebut. Thread-safe (render berjalan di thread pool).
+    """
+
+    def __init__(self, max_entries=64, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()  # key -> png bytes
+        self._tags = {}  # tag -> set(key)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts):
+        payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.png')
+
+    def get(self, key):
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+            elif self.cache_dir and os.path.exists(self._path(key)):
+                with open(self._path(key), 'rb') as f:
+                    png = f.read()
+                self._store(key, png)
+
+            if png is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return png
+
+    def put(self, key, png, tag=None):
+        with self._lock:
+            self._store(key, png)
+            if tag is not None:
+                self._tags.setdefault(tag, set()).add(key)
+
+        if self.cache_dir:
+            tmp_path = self._path(key) + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(png)
+            os.replace(tmp_path, self._path(key))
+
+    def _store(self, key, png):
+        self._entries[key] = png
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self._remove_file(old_key)
+
+    def _remove_file(self, key):
+        if self.cache_dir:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def invalidate(self, tag):
+        """Buang semua grafik dengan tag ini"""
+        with self._lock:
+            keys = self._tags.pop(tag, set())
+            for key in keys:
+                self._entries.pop(key, None)
+        for key in keys:
+            self._remove_file(key)
 
 class AnalyticsVisualizer:
-    def __init__(self):
-        # Set style
-        sns.set_style("whitegrid")
+    def __init__(self, cache_size=None, cache_dir=None):
+        self.cache = ChartCache(
+            max_entries=int(cache_size or os.getenv('CHART_CACHE_SIZE', 64)),
+            cache_dir=cache_dir or os.getenv('CHART_CACHE_DIR') or None
+        )
+    
+    def invalidate(self, user_id, year_month):
+        """Dipanggil saat transaksi baru masuk ke bulan milik user"""
+        self.cache.invalidate((str(user_id), year_month))
         
-    def generate_monthly_report(self, transactions, month_name):
+    @metrics.timed('chart_seconds')
+    def generate_monthly_report(self, transactions, month_name, cache_tag=None):
         """
         Generate infographic for monthly report.
-        transactions: list of dicts
+        transactions: DataFrame dari store kolumnar (get_month_frame) atau list of dicts
+        cache_tag: opsional (user_id, year_month) untuk invalidasi cache
         Returns: BytesIO object of the image
         """
-        if not transactions:
+        import pandas as pd
+        
+        if isinstance(transactions, pd.DataFrame):
+            df = transactions
+        elif transactions:
+            df = pd.DataFrame(transactions)
+        else:
+            return None
+        
+        if df.empty:
             return None
-            
-        df = pd.DataFrame(transactions)
         
-        # Pastikan kolom numeric
-        df['amount'] = pd.to_numeric(df['amount'])
+        # Pastikan kolom numeric (DataFrame dari store sudah float64, tidak disalin)
+        if not pd.api.types.is_numeric_dtype(df['amount']):
+            df = df.assign(amount=pd.to_numeric(df['amount']))
         
         # Filter Expense
-        df_expense = df[df['type'] == 'expense']
+        df_expense = df[df['type'] == 'expense'].copy()
         
         if df_expense.empty:
             return None
-            
-        # Create figure with 2 subplots (Pie & Bar)
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 12))
-        fig.suptitle(f'Laporan Keuangan: {month_name}', fontsize=16, fontweight='bold')
         
-        # 1. PIE CHART - Spending by Category
+        # Agregat yang digambar (sekaligus jadi key cache)
         category_sum = df_expense.groupby('category')['amount'].sum().sort_values(ascending=False)
         
         # Ambil top 5, sisanya 'Lainnya'
@@ -43,7 +154,38 @@ class AnalyticsVisualizer:
             top_5 = category_sum.head(5)
             others = pd.Series([category_sum[5:].sum()], index=['Lainnya'])
             category_sum = pd.concat([top_5, others])
-            
+        
+        # Convert timestamp to date (parse aman, kalau gagal grafik harian diganti pesan)
+        try:
+            df_expense['date'] = pd.to_datetime(df_expense['timestamp']).dt.date
+            daily_sum = df_expense.groupby('date')['amount'].sum()
+        except Exception as e:
+            print(f"Error plotting daily trend: {e}")
+            daily_sum = None
+        
+        cache_key = self.cache.make_key(
+            month_name,
+            list(category_sum.items()),
+            list(daily_sum.items()) if daily_sum is not None else None
+        )
+        png = self.cache.get(cache_key)
+        if png is None:
+            png = self._render(month_name, category_sum, daily_sum)
+            self.cache.put(cache_key, png, tag=tuple(map(str, cache_tag)) if cache_tag else None)
+        
+        return io.BytesIO(png)
+    
+    @metrics.timed('chart_render_seconds')
+    def _render(self, month_name, category_sum, daily_sum):
+        """Render grafik ke PNG bytes"""
+        matplotlib, sns = _load_plotting()
+        
+        # Figure tanpa pyplot (tidak ada state global) supaya render bisa paralel di thread pool
+        fig = matplotlib.figure.Figure(figsize=(10, 12))
+        ax1, ax2 = fig.subplots(2, 1)
+        fig.suptitle(f'Laporan Keuangan: {month_name}', fontsize=16, fontweight='bold')
+        
+        # 1. PIE CHART - Spending by Category
         wedges, texts, autotexts = ax1.pie(
             category_sum, 
             labels=category_sum.index, 
@@ -55,34 +197,28 @@ class AnalyticsVisualizer:
         ax1.set_title('Persentase Pengeluaran per Kategori')
         
         # 2. BAR CHART - Daily Spending
-        # Convert timestamp to date
-        # Asumsi kolom timestamp ada
-        # Kita parse aman dulu
-        try:
-            df_expense['date'] = pd.to_datetime(df_expense['timestamp']).dt.date
-            daily_sum = df_expense.groupby('date')['amount'].sum()
-            
-            # Plot
-            sns.barplot(x=daily_sum.index, y=daily_sum.values, ax=ax2, hue=daily_sum.index, palette='viridis', legend=False)
-            ax2.set_title('Tren Pengeluaran Harian')
-            ax2.set_xlabel('Tanggal')
-            ax2.set_ylabel('Total (Rp)')
-            ax2.tick_params(axis='x', rotation=45)
-            
-            # Format Y axis to normal numbers
-            ax2.get_yaxis().set_major_formatter(
-                matplotlib.ticker.FuncFormatter(lambda x, p: format(int(x), ','))
-            )
-        except Exception as e:
-            print(f"Error plotting daily trend: {e}")
+        if daily_sum is None:
             ax2.text(0.5, 0.5, "Data Tanggal Tidak Valid", ha='center')
+        else:
+            try:
+                sns.barplot(x=daily_sum.index, y=daily_sum.values, ax=ax2, hue=daily_sum.index, palette='viridis', legend=False)
+                ax2.set_title('Tren Pengeluaran Harian')
+                ax2.set_xlabel('Tanggal')
+                ax2.set_ylabel('Total (Rp)')
+                ax2.tick_params(axis='x', rotation=45)
+                
+                # Format Y axis to normal numbers
+                ax2.get_yaxis().set_major_formatter(
+                    matplotlib.ticker.FuncFormatter(lambda x, p: format(int(x), ','))
+                )
+            except Exception as e:
+                print(f"Error plotting daily trend: {e}")
+                ax2.text(0.5, 0.5, "Data Tanggal Tidak Valid", ha='center')
 
-        plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+        fig.tight_layout(rect=[0, 0.03, 1, 0.95])
         
         # Save to buffer
         buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=100)
-        buf.seek(0)
-        plt.close(fig)
+        fig.savefig(buf, format='png', dpi=100)
         
-        return buf
+        return buf.getvalue()
@@ -0,0 +1,44 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncSheetsManager:
+    """
+    Facade async untuk SheetsManager.
+    Setiap method dijalankan di thread pool terbatas sehingga execute() yang lambat
+    tidak membekukan event loop python-telegram-bot. Service googleapiclient dibuat
+    per thread oleh SheetsManager (httplib2 tidak thread-safe).
+
+    Contoh:
+        sheets_async = AsyncSheetsManager(sheets)
+        txs = await sheets_async.get_transactions_by_month(user_id, '2025-01')
+    """
+
+    def __init__(self, sheets, max_workers=None):
+        self.sheets = sheets
+        self.max_workers = int(max_workers or os.getenv('SHEETS_WORKERS', 4))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='sheets-io'
+        )
+
+    async def run(self, func, *args, **kwargs):
+        """Jalankan fungsi blocking apa pun di worker pool Sheets"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self.sheets, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return wrapper
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,263 @@
+"""
+Benchmark SheetsManager, AI & grafik terhadap ukuran data, tanpa Google API.
+
+Sheet diganti fake_sheets.FakeSheetsService (in-memory, latency bisa disimulasikan),
+lalu di-seed transaksi sintetis untuk banyak user. Hasil berupa JSON supaya bisa
+dibandingkan antar commit untuk mendeteksi regresi.
+
+Usage:
+    python benchmark_sheets.py                              # 10k, 100k, 1M baris
+    python benchmark_sheets.py --sizes 10000 --latency 0.15 --output bench.json
+    python benchmark_sheets.py --sizes 1000000 --partitioned     # tab per bulan
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from fake_sheets import FakeSheetsService
+from google_sheets_handler import SheetsManager, partition_tab
+from sheets_scheduler import RequestScheduler
+from model_categorization import TransactionClassifier
+from analytics_engine import AnalyticsVisualizer
+
+CATEGORIES = [
+    # (id, name, type, icon, budget_limit, keywords)
+    ('CAT-001', 'Makanan', 'expense', '🍔', 1500000, 'makan,nasi,kopi,bakso,soto,warteg'),
+    ('CAT-002', 'Transport', 'expense', '🚗', 600000, 'bensin,ojek,gojek,grab,parkir,tol'),
+    ('CAT-003', 'Belanja', 'expense', '🛒', 1000000, 'sabun,baju,sepatu,indomaret,alfamart'),
+    ('CAT-004', 'Tagihan', 'expense', '🧾', 800000, 'listrik,pulsa,internet,air,bpjs'),
+    ('CAT-005', 'Hiburan', 'expense', '🎬', 400000, 'nonton,netflix,spotify,game'),
+    ('CAT-006', 'Gaji', 'income', '💰', 0, 'gaji,bonus,thr'),
+    ('CAT-007', 'Tabungan', 'saving', '🏦', 0, 'nabung,deposito,reksadana'),
+]
+
+DESCRIPTIONS = {
+    'Makanan': ['makan siang', 'nasi padang', 'kopi susu', 'bakso malang', 'soto ayam', 'warteg'],
+    'Transport': ['bensin motor', 'ojek kantor', 'gojek pulang', 'parkir mall', 'tol cikampek'],
+    'Belanja': ['sabun mandi', 'baju lebaran', 'sepatu lari', 'indomaret', 'alfamart'],
+    'Tagihan': ['listrik bulanan', 'pulsa', 'internet rumah', 'bpjs'],
+    'Hiburan': ['nonton bioskop', 'netflix', 'spotify', 'top up game'],
+    'Gaji': ['gaji bulanan', 'bonus proyek'],
+    'Tabungan': ['nabung dana darurat', 'reksadana'],
+}
+
+TYPES = {name: tx_type for _, name, tx_type, _, _, _ in CATEGORIES}
+
+
+def generate_transactions(count, users, months, seed=42):
+    """Baris Transactions (A:I) sintetis, tersebar di `users` user dan `months` bulan terakhir"""
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    span_seconds = int(timedelta(days=30 * months).total_seconds())
+    expense_names = [name for name, tx_type in TYPES.items() if tx_type == 'expense']
+
+    rows = []
+    for i in range(count):
+        roll = rng.random()
+        category = 'Gaji' if roll < 0.05 else 'Tabungan' if roll < 0.1 else rng.choice(expense_names)
+        timestamp = now - timedelta(seconds=rng.randrange(span_seconds))
+        rows.append([
+            f'TRX-{i:08d}',
+            timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            str(100000 + rng.randrange(users)),
+            TYPES[category],
+            str(rng.randrange(5, 500) * 1000),
+            category,
+            f'{rng.choice(DESCRIPTIONS[category])} {rng.randrange(100)}',
+            '0',
+            '-'
+        ])
+    return rows
+
+
+def pick_target(rows):
+    """
+    (user_id, 'YYYY-MM') dengan transaksi terbanyak: bulan berjalan jika sudah berisi,
+    selain itu bulan terpadat. Supaya query & grafik selalu mengukur data yang ada.
+    """
+    year_month = datetime.now().strftime('%Y-%m')
+    counts = {}
+    for row in rows:
+        key = (row[2], row[1][:7])
+        counts[key] = counts.get(key, 0) + 1
+    current = {key: count for key, count in counts.items() if key[1] == year_month}
+    return max(current or counts, key=lambda key: (current or counts)[key])
+
+
+def timed(fn, repeat):
+    """Jalankan fn `repeat` kali; return (ringkasan waktu, hasil terakhir)"""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        'runs': repeat,
+        'min_s': round(min(samples), 6),
+        'median_s': round(statistics.median(samples), 6),
+        'max_s': round(max(samples), 6),
+    }, result
+
+
+def measure(service, fn, repeat=1):
+    """timed() + jumlah panggilan API (fake) per run"""
+    service.reset_calls()
+    stats, result = timed(fn, repeat)
+    stats['api_calls'] = {method: count / repeat for method, count in service.call_counts().items()}
+    return stats, result
+
+
+def bench_size(size, args):
+    print(f"🌱 Seeding {size:,} transaksi untuk {args.users} user...", file=sys.stderr)
+    service = FakeSheetsService(latency=args.latency, jitter=args.jitter, seed=42)
+    service.seed('Categories', [list(cat) for cat in CATEGORIES])
+    rows = generate_transactions(size, args.users, args.months)
+    if args.partitioned:
+        # Layout hasil partition_transactions.py: satu tab per bulan
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(row[1][:7], []).append(row)
+        for year_month, month_rows in by_month.items():
+            service.tabs[partition_tab(year_month)] = [service.tabs['Transactions'][0]]
+            service.seed(partition_tab(year_month), month_rows)
+    else:
+        service.seed('Transactions', rows)
+
+    # Quota default (60/menit) akan mendominasi hasil; benchmark memakai --quota (0 = tanpa batas)
+    quota = args.quota or 10 ** 9
+    scheduler = RequestScheduler(read_per_minute=quota, write_per_minute=quota)
+
+    def new_manager():
+        return SheetsManager('benchmark', service=service, scheduler=scheduler,
+                             sync_interval=3600, full_resync_interval=86400, partitioned=args.partitioned)
+
+    sheets = new_manager()
+    user_id, year_month = pick_target(rows)
+    results = {'rows': size, 'users': args.users, 'partitioned': args.partitioned,
+               'target': {'user_id': user_id, 'month': year_month}}
+
+    print("⏱️ Query & update SheetsManager...", file=sys.stderr)
+    results['get_transactions_by_month_cold'], _ = measure(
+        service, lambda: sheets.get_transactions_by_month(user_id, year_month))
+    results['get_transactions_by_month'], _ = measure(
+        service, lambda: sheets.get_transactions_by_month(user_id, year_month), args.repeat)
+
+    # Query cold dari beberapa worker sekaligus (seperti pool AsyncSheetsManager):
+    # read mirror yang identik digabung scheduler jadi satu request
+    workers = int(os.getenv('SHEETS_WORKERS', 4))
+    cold_sheets = new_manager()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results['get_transactions_by_month_cold_concurrent'], _ = measure(service, lambda: list(pool.map(
+            lambda uid: cold_sheets.get_transactions_by_month(uid, year_month),
+            [str(100000 + i) for i in range(workers)])))
+    results['get_transactions_by_month_cold_concurrent'].update(
+        workers=workers, index_rebuilds=sum(mirror.rebuilds for mirror in cold_sheets._mirrors.values()))
+    results['get_month_frame'], month_frame = measure(
+        service, lambda: sheets.get_month_frame(user_id, year_month), args.repeat)
+    results['update_monthly_summary_cold'], _ = measure(
+        service, lambda: sheets.update_monthly_summary(user_id, year_month))
+    results['update_monthly_summary'], _ = measure(
+        service, lambda: sheets.update_monthly_summary(user_id, year_month), args.repeat)
+    results['update_analytics_cold'], _ = measure(service, lambda: sheets.update_analytics(user_id))
+    results['update_analytics'], _ = measure(service, lambda: sheets.update_analytics(user_id), args.repeat)
+    results['get_category_budget_status'], _ = measure(
+        service, lambda: sheets.get_category_budget_status('Makanan', user_id), args.repeat)
+
+    rng = random.Random(7)
+    descriptions = [f'{rng.choice(words)} {i}' for i in range(1000)
+                    for words in [DESCRIPTIONS[rng.choice(list(DESCRIPTIONS))]]]
+    stats, _ = measure(service, lambda: [sheets.simple_categorize(d) for d in descriptions], args.repeat)
+    stats.update(calls=len(descriptions), per_call_s=round(stats['median_s'] / len(descriptions), 9))
+    results['simple_categorize'] = stats
+
+    print("⏱️ AI classifier...", file=sys.stderr)
+    training_data = sheets.get_training_data()
+    with tempfile.TemporaryDirectory() as tmp:
+        classifier = TransactionClassifier(model_path=os.path.join(tmp, 'model_cache.pkl'))
+        stats, _ = timed(lambda: classifier.train(training_data, [name for _, name, *_ in CATEGORIES]), 1)
+        stats['samples'] = len(training_data)
+        results['classifier_train'] = stats
+
+        # Memo dikosongkan tiap run supaya yang diukur benar-benar inference.
+        # predict() satuan jauh lebih mahal dari predict_many(), jadi sampelnya lebih kecil.
+        single = descriptions[:200]
+
+        def predict_all():
+            classifier._memo.clear()
+            return [classifier.predict(d) for d in single]
+
+        stats, _ = timed(predict_all, args.repeat)
+        stats.update(calls=len(single), per_call_s=round(stats['median_s'] / len(single), 9))
+        results['classifier_predict'] = stats
+        stats, _ = timed(lambda: classifier.predict_many(descriptions), args.repeat)
+        stats.update(calls=1, descriptions=len(descriptions))
+        results['classifier_predict_many'] = stats
+
+    if month_frame is None:
+        # User target tanpa transaksi di bulan itu: tidak ada grafik yang bisa dirender
+        results['generate_monthly_report'] = {'runs': 0, 'transactions': 0}
+        return results
+
+    print("⏱️ Grafik bulanan...", file=sys.stderr)
+    month_name = datetime.strptime(year_month, '%Y-%m').strftime('%B %Y')
+    visualizer = AnalyticsVisualizer(cache_dir=None)
+
+    def render_uncached():
+        visualizer.invalidate(user_id, year_month)
+        return visualizer.generate_monthly_report(month_frame, month_name, cache_tag=(user_id, year_month))
+
+    results['generate_monthly_report'], _ = timed(render_uncached, args.repeat)
+    results['generate_monthly_report_cached'], _ = timed(
+        lambda: visualizer.generate_monthly_report(month_frame, month_name, cache_tag=(user_id, year_month)),
+        args.repeat)
+    results['generate_monthly_report']['transactions'] = len(month_frame)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SheetsManager offline (fake Sheets API)')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='jumlah transaksi, dipisah koma')
+    parser.add_argument('--users', type=int, default=200, help='jumlah user sintetis')
+    parser.add_argument('--months', type=int, default=12, help='rentang data (bulan ke belakang)')
+    parser.add_argument('--repeat', type=int, default=5, help='pengulangan untuk pengukuran warm')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulasi latency per API call (detik)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='variasi latency +/- (detik)')
+    parser.add_argument('--quota', type=int, default=0, help='quota request per menit (0 = tanpa batas)')
+    parser.add_argument('--partitioned', action='store_true', help='simpan transaksi per bulan (Transactions_YYYY_MM)')
+    parser.add_argument('--output', help='tulis hasil JSON ke file ini (default: stdout)')
+    args = parser.parse_args()
+
+    results = {
+        'python': platform.python_version(),
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'config': {
+            'users': args.users, 'months': args.months, 'repeat': args.repeat,
+            'latency': args.latency, 'jitter': args.jitter, 'quota': args.quota,
+            'partitioned': args.partitioned
+        },
+        'sizes': {}
+    }
+
+    for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        results['sizes'][str(size)] = bench_size(size, args)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
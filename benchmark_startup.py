@@ -0,0 +1,152 @@
+"""
+Benchmark waktu startup bot.
+
+Mengukur (masing-masing di proses python baru supaya cache import tidak ikut terhitung):
+  - waktu import tiap modul project dan library berat (pandas, sklearn, matplotlib, seaborn)
+  - waktu import seluruh dependency telegram_bot + membuat AI & visualizer (startup sampai siap polling)
+  - biaya pemakaian pertama yang sekarang ditunda: train vs load artifact model, render grafik pertama
+
+Usage:
+    python benchmark_startup.py                 # hasil JSON ke stdout
+    python benchmark_startup.py --repeat 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+
+MODULES = [
+    'transaction_store',
+    'keyword_matcher',
+    'write_queue',
+    'async_sheets',
+    'google_sheets_handler',
+    'model_categorization',
+    'analytics_engine',
+    'pandas',
+    'sklearn.linear_model',
+    'matplotlib.pyplot',
+    'seaborn',
+]
+
+# Semua yang di-import & dibuat telegram_bot.py sebelum run_polling (tanpa koneksi Sheets)
+STARTUP_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import telegram.ext, telegram.request, dotenv
+from google_sheets_handler import SheetsManager
+from async_sheets import AsyncSheetsManager
+from model_categorization import TransactionClassifier
+from analytics_engine import AnalyticsVisualizer
+ai_classifier = TransactionClassifier(model_path={model_path!r})
+visualizer = AnalyticsVisualizer()
+print(time.perf_counter() - t0)
+"""
+
+IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import {module}
+print(time.perf_counter() - t0)
+"""
+
+FIRST_USE_SNIPPET = """
+import json, time, random
+from datetime import datetime, timedelta
+from model_categorization import TransactionClassifier
+from analytics_engine import AnalyticsVisualizer
+
+rng = random.Random(42)
+words = {{'Makanan': ['makan siang', 'nasi padang', 'kopi', 'bakso'],
+          'Transport': ['bensin', 'ojek', 'parkir', 'tol'],
+          'Belanja': ['sabun', 'baju', 'sepatu', 'pulsa']}}
+training = [{{'description': rng.choice(w) + ' ' + str(i % 50), 'category': c}}
+            for i in range({samples}) for c, w in [rng.choice(list(words.items()))]]
+
+result = {{}}
+clf = TransactionClassifier(model_path={model_path!r})
+t0 = time.perf_counter()
+clf.train_or_load(training, sorted(words))
+result['classifier_train_s'] = time.perf_counter() - t0
+
+clf = TransactionClassifier(model_path={model_path!r})
+t0 = time.perf_counter()
+clf.train_or_load(training, sorted(words))
+result['classifier_load_s'] = time.perf_counter() - t0
+
+start = datetime(2025, 1, 1)
+txs = [{{'date': start + timedelta(days=i % 28), 'type': 'expense', 'amount': 10000 + i,
+         'category': rng.choice(list(words))}} for i in range(300)]
+t0 = time.perf_counter()
+AnalyticsVisualizer().generate_monthly_report(txs, 'January 2025')
+result['first_chart_s'] = time.perf_counter() - t0
+print(json.dumps(result))
+"""
+
+
+def run_python(code):
+    """Jalankan snippet di interpreter baru dari root project, return stdout terakhir"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=root, capture_output=True, text=True, check=True
+    )
+    return proc.stdout.strip().splitlines()[-1]
+
+
+def summarize(samples):
+    return {
+        'min_s': round(min(samples), 4),
+        'median_s': round(statistics.median(samples), 4),
+        'max_s': round(max(samples), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark import & startup time bot')
+    parser.add_argument('--repeat', type=int, default=3, help='jumlah pengulangan per pengukuran')
+    parser.add_argument('--samples', type=int, default=2000, help='jumlah transaksi training sintetis')
+    parser.add_argument('--output', help='tulis hasil JSON ke file ini (default: stdout)')
+    args = parser.parse_args()
+
+    results = {
+        'python': platform.python_version(),
+        'repeat': args.repeat,
+        'imports': {},
+    }
+
+    for module in MODULES:
+        samples = [float(run_python(IMPORT_SNIPPET.format(module=module))) for _ in range(args.repeat)]
+        results['imports'][module] = summarize(samples)
+        print(f"⏱️ import {module}: {results['imports'][module]['median_s']}s", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'model_cache.pkl')
+
+        samples = [float(run_python(STARTUP_SNIPPET.format(model_path=model_path))) for _ in range(args.repeat)]
+        results['bot_startup'] = summarize(samples)
+        print(f"⏱️ bot startup: {results['bot_startup']['median_s']}s", file=sys.stderr)
+
+        first_use = {}
+        for _ in range(args.repeat):
+            if os.path.exists(model_path):
+                os.remove(model_path)
+            run = json.loads(run_python(FIRST_USE_SNIPPET.format(model_path=model_path, samples=args.samples)))
+            for key, value in run.items():
+                first_use.setdefault(key, []).append(value)
+        results['first_use'] = {key: summarize(values) for key, values in first_use.items()}
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark latency update end-to-end lewat webhook, tanpa Telegram & Google API.
+
+Bot (handler asli dari telegram_bot.py) dijalankan dengan server webhook bawaan
+python-telegram-bot, Bot API diganti fake_telegram.FakeBotAPI dan storage memakai
+SQLiteManager in-memory. Tiap user sintetis mengirim skenario
+/start -> /pengeluaran -> klik Simpan -> /ringkasan sebagai POST ke webhook, lalu
+diukur waktu sampai balasan pertama bot diterima Bot API palsu.
+
+Usage:
+    python benchmark_webhook.py                                # 10 user x 5 putaran
+    python benchmark_webhook.py --users 50 --rounds 10 --api-latency 0.05 --output webhook.json
+    python benchmark_webhook.py --bulanan --concurrency 1     # + /bulanan (grafik), update diproses serial
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from fake_telegram import FakeBotAPI, make_callback_update, make_message_update
+
+FAKE_TOKEN = '123456:fake-token-for-benchmark'
+SECRET_TOKEN = 'benchmark-secret'
+
+SCENARIO = [
+    # (nama langkah, builder update)
+    ('start', lambda uid, n, last: make_message_update(n, uid, '/start')),
+    ('pengeluaran', lambda uid, n, last: make_message_update(n, uid, '/pengeluaran 25000 nasi goreng')),
+    ('confirm_trx', lambda uid, n, last: make_callback_update(n, uid, 'confirm_trx', last)),
+    ('ringkasan', lambda uid, n, last: make_message_update(n, uid, '/ringkasan')),
+]
+BULANAN = ('bulanan', lambda uid, n, last: make_message_update(n, uid, '/bulanan'))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {'count': 0}
+
+    def pick(q):
+        return round(samples[min(len(samples) - 1, int(q * len(samples)))], 6)
+
+    return {
+        'count': len(samples),
+        'p50_s': pick(0.50),
+        'p95_s': pick(0.95),
+        'p99_s': pick(0.99),
+        'max_s': round(samples[-1], 6),
+    }
+
+
+def drive(args, api, webhook_url):
+    """Kirim skenario semua user secara paralel; return {langkah: [latency, ...]}"""
+    scenario = SCENARIO + [BULANAN] if args.bulanan else SCENARIO
+    update_ids = itertools.count(1)
+    ids_lock = threading.Lock()
+    latencies = {name: [] for name, _ in scenario}
+    timeouts = []
+
+    def post(update):
+        request = urllib.request.Request(
+            webhook_url, data=json.dumps(update).encode(),
+            headers={'Content-Type': 'application/json', 'X-Telegram-Bot-Api-Secret-Token': SECRET_TOKEN}
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+
+    def run_user(user_id):
+        last_message_id = 0
+        for _ in range(args.rounds):
+            for name, build in scenario:
+                with ids_lock:
+                    update_id = next(update_ids)
+                before = api.reply_count(user_id)
+                t0 = time.perf_counter()
+                post(build(user_id, update_id, last_message_id))
+                received = api.wait_reply(user_id, after=before, timeout=args.timeout)
+                if received is None:
+                    timeouts.append(name)
+                    continue
+                latencies[name].append(received - t0)
+                last_message_id = update_id
+
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        list(pool.map(run_user, range(100000, 100000 + args.users)))
+    return latencies, timeouts
+
+
+async def run_bot(args, api):
+    import telegram_bot
+    from benchmark_sheets import CATEGORIES
+
+    telegram_bot.sheets.merge_categories([
+        {'id': cat_id, 'name': name, 'type': cat_type, 'icon': icon, 'budget_limit': limit,
+         'keywords': keywords.split(',')}
+        for cat_id, name, cat_type, icon, limit, keywords in CATEGORIES
+    ])
+
+    port = args.port or free_port()
+    url_path = telegram_bot.WEBHOOK_PATH
+    webhook_url = f'http://127.0.0.1:{port}/{url_path}'
+
+    app = telegram_bot.build_application(FAKE_TOKEN, base_url=api.base_url, base_file_url=api.base_file_url)
+    async with app:
+        await app.start()
+        await app.updater.start_webhook(
+            listen='127.0.0.1', port=port, url_path=url_path, webhook_url=webhook_url,
+            secret_token=SECRET_TOKEN, allowed_updates=telegram_bot.ALLOWED_UPDATES
+        )
+        try:
+            t0 = time.perf_counter()
+            latencies, timeouts = await asyncio.to_thread(drive, args, api, webhook_url)
+            elapsed = time.perf_counter() - t0
+        finally:
+            await app.updater.stop()
+            await app.stop()
+            telegram_bot.sheets_async.shutdown()
+            telegram_bot.chart_executor.shutdown()
+
+    total = sum(len(samples) for samples in latencies.values())
+    return {
+        'concurrency': telegram_bot.BOT_CONCURRENCY,
+        'updates': total,
+        'timeouts': len(timeouts),
+        'elapsed_s': round(elapsed, 3),
+        'updates_per_s': round(total / elapsed, 1) if elapsed else None,
+        'all': summarize([s for samples in latencies.values() for s in samples]),
+        'steps': {name: summarize(samples) for name, samples in latencies.items()},
+        'allowed_updates': (api.webhook or {}).get('allowed_updates'),
+        'api_calls': api.call_counts(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark latency update lewat webhook (fake Bot API)')
+    parser.add_argument('--users', type=int, default=10, help='jumlah user yang mengirim update bersamaan')
+    parser.add_argument('--rounds', type=int, default=5, help='pengulangan skenario per user')
+    parser.add_argument('--api-latency', type=float, default=0.0, help='simulasi latency per call Bot API (detik)')
+    parser.add_argument('--bulanan', action='store_true', help='tambahkan /bulanan (render grafik) ke skenario')
+    parser.add_argument('--concurrency', type=int, help='BOT_CONCURRENCY (default: SHEETS_WORKERS + RENDER_WORKERS)')
+    parser.add_argument('--port', type=int, default=0, help='port webhook lokal (default: port bebas)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='batas tunggu balasan per update (detik)')
+    parser.add_argument('--output', help='tulis hasil JSON ke file ini (default: stdout)')
+    args = parser.parse_args()
+
+    # Bot dijalankan offline: SQLite in-memory tanpa replika Sheets, model AI di folder sementara
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        'STORAGE_BACKEND': 'sqlite',
+        'SQLITE_PATH': ':memory:',
+        'GOOGLE_SHEET_ID': '',
+        'MODEL_PATH': os.path.join(tmp, 'model_cache.pkl'),
+        'CHART_CACHE_DIR': '',
+    })
+    if args.concurrency:
+        os.environ['BOT_CONCURRENCY'] = str(args.concurrency)
+
+    api = FakeBotAPI(latency=args.api_latency).start()
+    print(f"🌐 Fake Bot API: {api.base_url}", file=sys.stderr)
+    try:
+        result = asyncio.run(run_bot(args, api))
+    finally:
+        api.stop()
+
+    output = json.dumps({
+        'python': platform.python_version(),
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'config': {'users': args.users, 'rounds': args.rounds, 'api_latency': args.api_latency,
+                   'bulanan': args.bulanan},
+        'webhook': result,
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
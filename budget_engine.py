@@ -0,0 +1,77 @@
+import os
+
+# Persentase pemakaian budget yang memicu peringatan saat transaksi disimpan
+BUDGET_THRESHOLDS = (80, 100)
+
+
+class BudgetEngine:
+    """
+    Cek budget per (user, bulan, kategori) tanpa I/O.
+
+    Limit diambil dari cache Categories (set_limits dipanggil setiap cache dimuat),
+    sedangkan total pengeluaran berasal dari counter berjalan TransactionIndex yang
+    di-update setiap transaksi dikonfirmasi. Karena pengeluaran sebelum & sesudah
+    transaksi diketahui saat menulis, persilangan threshold (80%, 100%) bisa
+    dideteksi langsung di add_transaction.
+    """
+
+    def __init__(self, thresholds=None):
+        if thresholds is None:
+            env = os.getenv('BUDGET_THRESHOLDS')
+            thresholds = [float(t) for t in env.split(',')] if env else BUDGET_THRESHOLDS
+        self.thresholds = tuple(sorted(thresholds))
+        self._limits = {}  # nama kategori -> limit (> 0)
+        self.loaded = False
+
+    def set_limits(self, categories):
+        """Ambil limit dari list kategori hasil get_all_categories()"""
+        self._limits = {cat['name']: cat['budget_limit'] for cat in categories if cat['budget_limit'] > 0}
+        self.loaded = True
+
+    def set_limit(self, category_name, limit):
+        """Update satu limit (mis. setelah /setbudget) tanpa menunggu reload Categories"""
+        for name in list(self._limits):
+            if name.lower() == category_name.lower():
+                category_name = name
+        if limit > 0:
+            self._limits[category_name] = limit
+        else:
+            self._limits.pop(category_name, None)
+
+    def limit(self, category_name):
+        return self._limits.get(category_name, 0)
+
+    def status(self, category_name, spent, spent_before=None):
+        """
+        Status budget kategori untuk total pengeluaran `spent`.
+        Jika spent_before diberikan, 'crossed' berisi threshold yang baru saja dilewati
+        oleh transaksi terakhir (spent_before -> spent).
+        Returns: dict atau None jika kategori tidak punya budget
+        """
+        budget_limit = self.limit(category_name)
+        if budget_limit <= 0:
+            return None
+
+        percentage = spent / budget_limit * 100
+        reached = [t for t in self.thresholds if percentage >= t]
+        crossed = []
+        if spent_before is not None:
+            before_pct = spent_before / budget_limit * 100
+            crossed = [t for t in reached if before_pct < t]
+
+        return {
+            'category': category_name,
+            'limit': budget_limit,
+            'spent': spent,
+            'remaining': budget_limit - spent,
+            'percentage': percentage,
+            'threshold': reached[-1] if reached else None,
+            'crossed': crossed
+        }
+
+    def alert_count(self, category_expenses):
+        """Jumlah kategori yang sudah over budget (untuk Budget_Alert_Count di Analytics)"""
+        return sum(
+            1 for name, spent in category_expenses.items()
+            if self._limits.get(name, 0) > 0 and spent > self._limits[name]
+        )
@@ -0,0 +1,336 @@
+import csv
+import hashlib
+import itertools
+import os
+import re
+import time
+from datetime import datetime
+
+from metrics import metrics
+from transaction_store import ColumnParser
+
+# Nama kolom yang dikenali (lowercase, spasi tunggal) -> field transaksi
+HEADER_ALIASES = {
+    'id': ('id', 'ref', 'reference', 'no referensi', 'no. referensi', 'transaction id', 'id transaksi'),
+    'date': ('date', 'tanggal', 'tgl', 'waktu', 'timestamp', 'transaction date', 'tanggal transaksi',
+             'posting date'),
+    'description': ('description', 'keterangan', 'deskripsi', 'uraian', 'catatan', 'note', 'remark', 'detail'),
+    'amount': ('amount', 'jumlah', 'nominal', 'nilai', 'mutasi'),
+    'debit': ('debit', 'debet', 'keluar', 'uang keluar', 'pengeluaran', 'withdrawal'),
+    'credit': ('credit', 'kredit', 'masuk', 'uang masuk', 'pemasukan', 'deposit'),
+    'direction': ('type', 'tipe', 'jenis', 'db/cr', 'd/k', 'dk'),
+    'category': ('category', 'kategori'),
+}
+
+DIRECTIONS = {
+    'expense': ('db', 'd', 'debit', 'debet', 'expense', 'pengeluaran', 'keluar', 'out'),
+    'income': ('cr', 'c', 'k', 'kredit', 'credit', 'income', 'pemasukan', 'masuk', 'in'),
+    'saving': ('saving', 'tabungan', 'nabung'),
+}
+
+# Format tanggal export bank / e-wallet selain DATE_FORMATS milik ColumnParser
+STATEMENT_DATE_FORMATS = [
+    '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y', '%Y/%m/%d',
+    '%d/%m/%Y %H:%M', '%d-%m-%Y %H:%M:%S', '%d-%m-%Y %H:%M', '%Y-%m-%d %H:%M',
+    '%d %b %Y', '%d %B %Y', '%d %b %Y %H:%M', '%d %b %Y %H:%M:%S',
+]
+ID_MONTHS = {'mei': 'May', 'agu': 'Aug', 'agt': 'Aug', 'okt': 'Oct', 'des': 'Dec', 'peb': 'Feb'}
+
+INCOME_CATEGORIES = ('Gaji', 'Bonus')
+PAYMENT_METHOD = 'Import CSV'
+# Baris sebelum header (info rekening, periode, dst) yang masih ditoleransi
+MAX_PREAMBLE_ROWS = 20
+
+_AMOUNT_SUFFIX_RE = re.compile(r'^(.*?)\s*(DB|CR|D|K)$')
+
+
+def _normalize_header(cell):
+    return ' '.join(str(cell).strip().lower().split())
+
+
+def map_columns(header):
+    """Header CSV -> {field: index kolom}; kolom tak dikenal diabaikan"""
+    columns = {}
+    for index, cell in enumerate(header):
+        name = _normalize_header(cell)
+        for field, aliases in HEADER_ALIASES.items():
+            if name in aliases and field not in columns:
+                columns[field] = index
+    return columns
+
+
+def has_required_columns(columns):
+    return 'date' in columns and 'description' in columns and (
+        'amount' in columns or 'debit' in columns or 'credit' in columns
+    )
+
+
+def parse_direction(value):
+    value = str(value).strip().lower()
+    for tx_type, names in DIRECTIONS.items():
+        if value in names:
+            return tx_type
+    return None
+
+
+def parse_statement_amount(value):
+    """
+    Nominal dari export bank: "Rp 1.250.000,00", "1,250,000.00 DB", "(50.000)", "-25000".
+    Returns: (nilai bertanda atau None, arah 'expense'/'income' dari suffix DB/CR atau None)
+    """
+    text = str(value).strip().upper().replace('RP', '').replace('IDR', '').replace(' ', '')
+    direction = None
+    suffix = _AMOUNT_SUFFIX_RE.match(text)
+    if suffix and suffix.group(1):
+        text = suffix.group(1)
+        direction = 'expense' if suffix.group(2) in ('DB', 'D') else 'income'
+
+    negative = text.startswith('-') or (text.startswith('(') and text.endswith(')'))
+    text = text.strip('-()+')
+    if not text:
+        return None, direction
+
+    # Separator desimal: yang terakhir jika ada '.' dan ','; jika hanya satu jenis,
+    # dianggap ribuan bila muncul berulang atau diikuti tepat 3 digit
+    if '.' in text and ',' in text:
+        decimal = '.' if text.rfind('.') > text.rfind(',') else ','
+        thousands = ',' if decimal == '.' else '.'
+        text = text.replace(thousands, '').replace(decimal, '.')
+    else:
+        for sep in ('.', ','):
+            if sep in text:
+                head, _, tail = text.rpartition(sep)
+                if text.count(sep) > 1 or len(tail) == 3:
+                    text = text.replace(sep, '')
+                else:
+                    text = head.replace(sep, '') + '.' + tail
+
+    try:
+        amount = float(text)
+    except ValueError:
+        return None, direction
+    return (-amount if negative else amount), direction
+
+
+class StatementImporter:
+    """
+    Import mutasi rekening / export e-wallet (CSV) secara streaming.
+
+    File dibaca baris demi baris (csv.reader atas file handle), dikumpulkan per batch
+    `batch_size` baris, lalu per batch: kategori ditebak sekaligus lewat
+    simple_categorize_many + TransactionClassifier.predict_many, baris yang ID-nya
+    sudah ada dibuang, dan sisanya ditulis dengan satu append_transactions (multi-row).
+    Transaksi hanya ditahan per batch; duplikat antar batch dibuang oleh
+    append_transactions(skip_existing=True). Yang tetap tumbuh seiring ukuran file
+    hanya penghitung kemunculan untuk ID hash (digest 8 byte per isi baris unik).
+
+    ID transaksi diambil dari kolom referensi jika ada; jika tidak, ID dibentuk dari
+    hash (tanggal, nominal, keterangan, urutan kemunculan) sehingga import ulang file
+    yang sama tidak membuat transaksi dobel.
+    """
+
+    def __init__(self, sheets, classifier=None, batch_size=None, max_rejected=20):
+        self.sheets = sheets
+        self.classifier = classifier
+        self.batch_size = int(batch_size or os.getenv('IMPORT_BATCH_SIZE', 500))
+        self.max_rejected = max_rejected
+        self._parser = ColumnParser()
+
+    def parse_date(self, value):
+        parsed = self._parser.parse_date(value)
+        if parsed is not None:
+            return parsed
+
+        text = ' '.join(str(value).strip().split())
+        words = text.split(' ')
+        if len(words) > 1 and words[1].lower()[:3] in ID_MONTHS:
+            words[1] = ID_MONTHS[words[1].lower()[:3]]
+            text = ' '.join(words)
+        for fmt in STATEMENT_DATE_FORMATS:
+            try:
+                return datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+        return None
+
+    def import_file(self, path, user_id, progress=None):
+        """Import file CSV di disk; lihat import_lines"""
+        with open(path, newline='', encoding='utf-8-sig', errors='replace') as f:
+            return self.import_lines(f, user_id, progress)
+
+    def import_lines(self, lines, user_id, progress=None):
+        """
+        Import baris-baris CSV (iterable, mis. file handle) milik user.
+        progress: opsional callback(report) yang dipanggil setiap satu batch selesai ditulis
+        Returns: report dict (rows, imported, duplicates, rejected, rejected_lines, months, rows_per_s, ...)
+        Raises: ValueError jika header kolom tanggal/keterangan/nominal tidak ditemukan
+        """
+        started = time.perf_counter()
+        lines = iter(lines)
+        header_line, delimiter, columns = self._find_header(lines)
+        reader = csv.reader(lines, delimiter=delimiter)
+
+        report = {
+            'rows': 0, 'imported': 0, 'duplicates': 0, 'rejected': 0, 'rejected_lines': [],
+            'batches': 0, 'months': set(), 'elapsed_s': 0.0, 'rows_per_s': 0.0,
+        }
+        category_types = {cat['name']: cat['type'] for cat in self.sheets.get_all_categories()}
+        batch_ids = set()  # ID di batch berjalan; antar batch dicek append_transactions
+        occurrences = {}
+        batch = []
+
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            report['rows'] += 1
+            transaction, reason = self._parse_row(row, columns, user_id, occurrences)
+            if transaction is None:
+                self._reject(report, header_line + reader.line_num, reason)
+                continue
+            if transaction['id'] in batch_ids:
+                report['duplicates'] += 1
+                continue
+            batch_ids.add(transaction['id'])
+
+            batch.append(transaction)
+            if len(batch) >= self.batch_size:
+                self._flush(batch, category_types, report, started, progress)
+                batch = []
+                batch_ids.clear()
+
+        if batch:
+            self._flush(batch, category_types, report, started, progress)
+
+        report['months'] = sorted(report['months'])
+        self._update_rate(report, started)
+        metrics.inc('import_rows_total', report['imported'], result='imported')
+        metrics.inc('import_rows_total', report['duplicates'], result='duplicate')
+        metrics.inc('import_rows_total', report['rejected'], result='rejected')
+        return report
+
+    @staticmethod
+    def _find_header(lines):
+        """
+        Lewati baris pembuka sampai header dikenali.
+        Returns: (nomor baris header, delimiter, {field: index kolom})
+        """
+        for line_num, line in enumerate(itertools.islice(lines, MAX_PREAMBLE_ROWS), start=1):
+            # Export bank lokal sering memakai ';' (Excel locale Indonesia) atau tab
+            for delimiter in (',', ';', '\t'):
+                columns = map_columns(next(csv.reader([line], delimiter=delimiter), []))
+                if has_required_columns(columns):
+                    return line_num, delimiter, columns
+        raise ValueError(
+            "Header CSV tidak dikenali. Butuh kolom tanggal (Tanggal/Date), keterangan "
+            "(Keterangan/Description) dan nominal (Jumlah/Amount atau Debit & Kredit)."
+        )
+
+    def _reject(self, report, line_num, reason):
+        report['rejected'] += 1
+        if len(report['rejected_lines']) < self.max_rejected:
+            report['rejected_lines'].append((line_num, reason))
+
+    def _parse_row(self, row, columns, user_id, occurrences):
+        """Baris CSV -> (transaksi tanpa kategori, None) atau (None, alasan ditolak)"""
+        def cell(field):
+            index = columns.get(field)
+            return row[index].strip() if index is not None and index < len(row) else ''
+
+        tx_date = self.parse_date(cell('date'))
+        if tx_date is None:
+            return None, f"tanggal tidak valid: {cell('date')[:30]!r}"
+
+        description = cell('description')
+        if not description:
+            return None, "keterangan kosong"
+
+        tx_type = parse_direction(cell('direction')) if 'direction' in columns else None
+        if 'amount' in columns and cell('amount'):
+            amount, suffix_type = parse_statement_amount(cell('amount'))
+            if amount is not None:
+                tx_type = tx_type or suffix_type or ('expense' if amount < 0 else 'income')
+        else:
+            debit, _ = parse_statement_amount(cell('debit')) if cell('debit') else (None, None)
+            credit, _ = parse_statement_amount(cell('credit')) if cell('credit') else (None, None)
+            if debit:
+                amount, tx_type = debit, tx_type or 'expense'
+            elif credit:
+                amount, tx_type = credit, tx_type or 'income'
+            else:
+                amount = None
+
+        if amount is None:
+            return None, "nominal tidak valid"
+        if amount == 0:
+            return None, "nominal nol"
+
+        timestamp = tx_date.strftime('%Y-%m-%d %H:%M:%S')
+        amount = abs(amount)
+        reference = cell('id')
+        if reference:
+            tx_id = f"IMP-{reference}"
+        else:
+            content = f"{timestamp}|{amount:.2f}|{description}"
+            # Kunci penghitung cukup digest pendek, bukan string isi baris
+            key = hashlib.blake2b(content.encode('utf-8'), digest_size=8).digest()
+            occurrences[key] = occurrences.get(key, 0) + 1
+            digest = hashlib.sha1(f"{content}|{occurrences[key]}".encode('utf-8')).hexdigest()
+            tx_id = f"IMP-{digest[:16]}"
+
+        return {
+            'id': tx_id,
+            'timestamp': timestamp,
+            'user_id': user_id,
+            'type': tx_type,
+            'amount': int(amount) if amount.is_integer() else amount,
+            'category': cell('category'),
+            'description': description,
+        }, None
+
+    def _categorize(self, batch, category_types):
+        """Kategori untuk satu batch (logika sama dengan /pengeluaran & /pemasukan)"""
+        descriptions = [tx['description'] for tx in batch]
+        keyword_results = self.sheets.simple_categorize_many(descriptions)
+        if self.classifier is not None:
+            ai_results = self.classifier.predict_many(descriptions)
+        else:
+            ai_results = [(None, 0.0)] * len(batch)
+
+        for tx, (kw_category, kw_conf), (ai_category, ai_conf) in zip(batch, keyword_results, ai_results):
+            if tx['category']:
+                tx['ai_confidence'] = 1.0
+            elif tx['type'] == 'income':
+                tx['category'] = kw_category if kw_category in INCOME_CATEGORIES else 'Gaji'
+                tx['ai_confidence'] = kw_conf
+            elif kw_conf >= 0.8:
+                tx['category'], tx['ai_confidence'] = kw_category, kw_conf
+            elif ai_category and ai_conf > 0.5:
+                tx['category'], tx['ai_confidence'] = ai_category, float(ai_conf)
+            else:
+                tx['category'], tx['ai_confidence'] = kw_category, kw_conf
+
+            if tx['type'] == 'expense' and category_types.get(tx['category']) == 'saving':
+                tx['type'] = 'saving'
+
+    def _flush(self, batch, category_types, report, started, progress):
+        with metrics.timer('import_batch_seconds'):
+            self._categorize(batch, category_types)
+            rows = [[
+                tx['id'], tx['timestamp'], tx['user_id'], tx['type'], tx['amount'], tx['category'],
+                tx['description'], tx['ai_confidence'], PAYMENT_METHOD
+            ] for tx in batch]
+            written = self.sheets.append_transactions(rows, skip_existing=True)
+
+        report['imported'] += written
+        report['duplicates'] += len(rows) - written
+        report['batches'] += 1
+        report['months'].update(tx['timestamp'][:7] for tx in batch)
+        self._update_rate(report, started)
+        if progress:
+            progress(report)
+
+    @staticmethod
+    def _update_rate(report, started):
+        elapsed = time.perf_counter() - started
+        report['elapsed_s'] = round(elapsed, 3)
+        report['rows_per_s'] = round(report['rows'] / elapsed, 1) if elapsed > 0 else 0.0
@@ -0,0 +1,348 @@
+import copy
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+# Header tab sesuai struktur spreadsheet bot (lihat inspect_sheet.py)
+DEFAULT_HEADERS = {
+    'Transactions': ['ID', 'Timestamp', 'User_ID', 'Type', 'Amount', 'Category', 'Description', 'AI_Confidence', 'Payment_Method'],
+    'Categories': ['ID', 'Category_Name', 'Type', 'Icon', 'Budget_Limit', 'Keywords'],
+    'Monthly_Summary': ['Month', 'User_ID', 'Total_Income', 'Total_Expense', 'Total_Saving',
+                        'Net_Balance', 'Top_Category', 'Transaction_Count'],
+    'Analytics': ['User_ID', 'Metric', 'Value', 'Last_Updated'],
+}
+
+_RANGE_RE = re.compile(r'^([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?$')
+_NUMBER_RE = re.compile(r'^-?\d+(\.\d+)?$')
+
+# Serial number tanggal Sheets: hari sejak 1899-12-30
+SERIAL_ORIGIN = datetime(1899, 12, 30)
+
+
+def _column_index(letters):
+    index = 0
+    for ch in letters:
+        index = index * 26 + ord(ch) - 64
+    return index - 1
+
+
+def _column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _unformatted(cell, date_render='SERIAL_NUMBER'):
+    """
+    Tiru UNFORMATTED_VALUE: sel yang di-input USER_ENTERED sebagai angka/tanggal
+    dikembalikan sebagai number (tanggal -> serial), teks lain tetap string.
+    """
+    if not isinstance(cell, str):
+        return cell
+    if _NUMBER_RE.match(cell):
+        return float(cell) if '.' in cell else int(cell)
+    if date_render == 'SERIAL_NUMBER' and len(cell) >= 10 and cell[4:5] == '-' and 'T' not in cell:
+        try:
+            value = datetime.fromisoformat(cell)
+        except ValueError:
+            return cell
+        return (value - SERIAL_ORIGIN).total_seconds() / 86400
+    return cell
+
+
+def parse_a1(range_name):
+    """
+    'Tab!A2:I' -> (tab, first_col, first_row, last_col, last_row)
+    Kolom 0-based, baris 1-based; last_row None jika range terbuka ke bawah.
+    """
+    tab, _, cells = range_name.partition('!')
+    match = _RANGE_RE.match(cells)
+    if not match:
+        raise ValueError(f"Range tidak didukung: {range_name}")
+    first_col, first_row, last_col, last_row = match.groups()
+    return (
+        tab,
+        _column_index(first_col),
+        int(first_row or 1),
+        _column_index(last_col or first_col),
+        int(last_row) if last_row else None
+    )
+
+
+class FakeRequest:
+    """
+    Pengganti HttpRequest googleapiclient: kerja baru dijalankan (dan dicatat) saat execute().
+    Respon di-serialize ke JSON lalu dilewatkan ke postproc(resp, content) seperti
+    client asli, jadi biaya parsing dan ukuran respon ikut terukur.
+    """
+
+    def __init__(self, service, fn, method_id, range_name, rows=0, http_method='GET'):
+        self._service = service
+        self._fn = fn
+        self._range_name = range_name
+        self._rows = rows
+        self.methodId = method_id
+        self.method = http_method
+        self.uri = f"fake://sheets/{method_id.rsplit('.', 1)[-1]}/{range_name}"
+        self.body = None
+        self.postproc = lambda resp, content: json.loads(content)
+
+    def execute(self, **kwargs):
+        operation = self.methodId.rsplit('.', 1)[-1]
+        self._service.record(operation, self._range_name, self._rows)
+        self._service.simulate_latency()
+        self._service.maybe_fail()
+        content = json.dumps(self._fn(), ensure_ascii=False).encode('utf-8')
+        return self.postproc({'status': '200'}, content)
+
+
+class FakeValues:
+    """Subset spreadsheets().values() yang dipakai SheetsManager: get/append/update/batchUpdate/clear"""
+
+    def __init__(self, service):
+        self._service = service
+
+    def get(self, spreadsheetId, range, **kwargs):
+        return FakeRequest(self._service, lambda: self._service.read(range),
+                           'sheets.spreadsheets.values.get', range)
+
+    def batchGet(self, spreadsheetId, ranges, valueRenderOption='FORMATTED_VALUE',
+                 dateTimeRenderOption='SERIAL_NUMBER', majorDimension='ROWS', **kwargs):
+        ranges = [ranges] if isinstance(ranges, str) else list(ranges)
+
+        def run():
+            return {
+                'spreadsheetId': spreadsheetId,
+                'valueRanges': [self._service.read(r, valueRenderOption, dateTimeRenderOption) for r in ranges]
+            }
+
+        request = FakeRequest(self._service, run, 'sheets.spreadsheets.values.batchGet', ','.join(ranges))
+        request.uri += f'?render={valueRenderOption}&dates={dateTimeRenderOption}'
+        return request
+
+    def append(self, spreadsheetId, range, body, valueInputOption=None, insertDataOption=None, **kwargs):
+        values = body.get('values', [])
+        return FakeRequest(self._service, lambda: self._service.append(range, values),
+                           'sheets.spreadsheets.values.append', range, len(values), 'POST')
+
+    def update(self, spreadsheetId, range, body, valueInputOption=None, **kwargs):
+        values = body.get('values', [])
+        return FakeRequest(self._service, lambda: self._service.write(range, values),
+                           'sheets.spreadsheets.values.update', range, len(values), 'PUT')
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        data = body.get('data', [])
+
+        def run():
+            for item in data:
+                self._service.write(item['range'], item['values'])
+            return {'totalUpdatedCells': sum(len(row) for d in data for row in d['values'])}
+
+        return FakeRequest(self._service, run, 'sheets.spreadsheets.values.batchUpdate',
+                           f'{len(data)} ranges', sum(len(d['values']) for d in data), 'POST')
+
+    def clear(self, spreadsheetId, range, body=None, **kwargs):
+        return FakeRequest(self._service, lambda: self._service.clear(range),
+                           'sheets.spreadsheets.values.clear', range, http_method='POST')
+
+
+class FakeSpreadsheets:
+    def __init__(self, service):
+        self._service = service
+        self._values = FakeValues(service)
+
+    def values(self):
+        return self._values
+
+    def get(self, spreadsheetId, **kwargs):
+        return FakeRequest(self._service, self._service.metadata, 'sheets.spreadsheets.get', spreadsheetId)
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        """Hanya request addSheet yang didukung"""
+        titles = [r['addSheet']['properties']['title'] for r in body.get('requests', []) if 'addSheet' in r]
+        return FakeRequest(self._service, lambda: self._service.add_sheets(titles),
+                           'sheets.spreadsheets.batchUpdate', spreadsheetId, http_method='POST')
+
+
+class FakeSheetsService:
+    """
+    Google Sheets API palsu di memori untuk benchmark & development offline.
+
+    Meniru perilaku yang diandalkan SheetsManager: nilai dikembalikan sebagai string
+    (FORMATTED_VALUE) atau bertipe lewat batchGet UNFORMATTED_VALUE (angka, tanggal
+    sebagai serial number), sel/baris kosong di ujung dipangkas, append menulis setelah
+    baris terakhir yang berisi, dan respon append memuat updates.updatedRange.
+
+    latency: detik per execute() (round-trip API), jitter: variasi acak +/- detik.
+    error_rate: peluang execute() gagal dengan HttpError `error_status` (simulasi quota/5xx);
+    fail_next() untuk memaksa sejumlah kegagalan berikutnya.
+    Thread-safe, jadi satu instance bisa dipakai bersama oleh semua worker pool.
+
+    Contoh:
+        service = FakeSheetsService(latency=0.15)
+        service.seed('Transactions', rows)
+        sheets = SheetsManager('fake', service=service)
+    """
+
+    def __init__(self, tabs=None, latency=0.0, jitter=0.0, seed=None, error_rate=0.0, error_status=429):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._forced_failures = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._spreadsheets = FakeSpreadsheets(self)
+        self.calls = []  # (method, range, jumlah baris yang dikirim)
+
+        self.tabs = {name: [list(header)] for name, header in DEFAULT_HEADERS.items()}
+        for name, rows in (tabs or {}).items():
+            self.tabs[name] = [list(row) for row in rows]
+
+    def spreadsheets(self):
+        return self._spreadsheets
+
+    # ==================== SETUP ====================
+
+    def seed(self, tab, rows, keep_header=True):
+        """Isi tab dengan rows (tanpa header); header default dipertahankan"""
+        with self._lock:
+            header = self.tabs.get(tab, [])[:1] if keep_header else []
+            self.tabs[tab] = header + [list(row) for row in rows]
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls = []
+
+    def call_counts(self):
+        counts = {}
+        for method, _, _ in self.calls:
+            counts[method] = counts.get(method, 0) + 1
+        return counts
+
+    def record(self, method, range_name, rows=0):
+        with self._lock:
+            self.calls.append((method, range_name, rows))
+
+    def simulate_latency(self):
+        delay = self.latency
+        if self.jitter:
+            delay += self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def fail_next(self, status=429, count=1):
+        """`count` execute() berikutnya gagal dengan HttpError `status`"""
+        with self._lock:
+            self._forced_failures.extend([status] * count)
+
+    def maybe_fail(self):
+        with self._lock:
+            status = self._forced_failures.pop(0) if self._forced_failures else None
+            if status is None and self.error_rate and self._random.random() < self.error_rate:
+                status = self.error_status
+        if status is not None:
+            raise HttpError(httplib2.Response({'status': status}), b'{"error": "fake"}', uri='fake://sheets')
+
+    # ==================== OPERASI SHEET ====================
+
+    def metadata(self):
+        with self._lock:
+            return {
+                'properties': {'title': 'Fake Spreadsheet'},
+                'sheets': [{'properties': {'title': name, 'index': i}} for i, name in enumerate(self.tabs)]
+            }
+
+    def read(self, range_name, value_render='FORMATTED_VALUE', date_render='SERIAL_NUMBER'):
+        """Isi range; FORMATTED_VALUE -> semua string, UNFORMATTED_VALUE -> angka/serial bertipe"""
+        tab, first_col, first_row, last_col, last_row = parse_a1(range_name)
+        unformatted = value_render == 'UNFORMATTED_VALUE'
+        with self._lock:
+            rows = self.tabs.get(tab, [])
+            end = len(rows) if last_row is None else min(last_row, len(rows))
+            values = []
+            for row in rows[first_row - 1:end]:
+                if unformatted:
+                    cells = ['' if cell is None else _unformatted(cell, date_render)
+                             for cell in row[first_col:last_col + 1]]
+                else:
+                    cells = ['' if cell is None else str(cell) for cell in row[first_col:last_col + 1]]
+                while cells and cells[-1] == '':
+                    cells.pop()
+                values.append(cells)
+
+        while values and not values[-1]:
+            values.pop()
+
+        result = {'range': range_name, 'majorDimension': 'ROWS'}
+        if values:
+            result['values'] = values
+        return result
+
+    def append(self, range_name, values):
+        tab, first_col, _, _, _ = parse_a1(range_name)
+        with self._lock:
+            rows = self.tabs.setdefault(tab, [])
+            while rows and not any(cell not in ('', None) for cell in rows[-1]):
+                rows.pop()
+            start = len(rows) + 1
+            for value_row in values:
+                rows.append([''] * first_col + list(value_row))
+            end = len(rows)
+
+        width = max((len(row) for row in values), default=1)
+        updated_range = f'{tab}!{_column_letter(first_col)}{start}:{_column_letter(first_col + width - 1)}{end}'
+        return {
+            'tableRange': f'{tab}!A1:{_column_letter(first_col + width - 1)}{start - 1}',
+            'updates': {'updatedRange': updated_range, 'updatedRows': len(values)}
+        }
+
+    def write(self, range_name, values):
+        tab, first_col, first_row, _, _ = parse_a1(range_name)
+        with self._lock:
+            rows = self.tabs.setdefault(tab, [])
+            for offset, value_row in enumerate(values):
+                row_number = first_row + offset
+                while len(rows) < row_number:
+                    rows.append([])
+                row = rows[row_number - 1]
+                if len(row) < first_col + len(value_row):
+                    row.extend([''] * (first_col + len(value_row) - len(row)))
+                row[first_col:first_col + len(value_row)] = list(value_row)
+        return {'updatedRange': range_name, 'updatedRows': len(values)}
+
+    def clear(self, range_name):
+        tab, first_col, first_row, last_col, last_row = parse_a1(range_name)
+        with self._lock:
+            rows = self.tabs.get(tab, [])
+            end = len(rows) if last_row is None else min(last_row, len(rows))
+            for row in rows[first_row - 1:end]:
+                for col in range(first_col, min(last_col + 1, len(row))):
+                    row[col] = ''
+        return {'clearedRange': range_name}
+
+    def add_sheets(self, titles):
+        """addSheet: tab baru kosong; nama yang sudah ada -> HttpError 400 seperti API asli"""
+        with self._lock:
+            exists = [title for title in titles if title in self.tabs]
+            if not exists:
+                for title in titles:
+                    self.tabs[title] = []
+        if exists:
+            raise HttpError(httplib2.Response({'status': 400}),
+                            f'{{"error": "sheet {exists[0]} already exists"}}'.encode('utf-8'), uri='fake://sheets')
+        return {'replies': [{'addSheet': {'properties': {'title': title}}} for title in titles]}
+
+    def snapshot(self, tab):
+        """Salinan isi tab (termasuk header) untuk verifikasi"""
+        with self._lock:
+            return copy.deepcopy(self.tabs.get(tab, []))
@@ -0,0 +1,228 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+_CHAT_ID_RE = re.compile(rb'name="chat_id"\r\n\r\n(-?\d+)')
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'FakeBot', 'username': 'fake_finance_bot'}
+
+
+def make_user(user_id):
+    return {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'}
+
+
+def make_message(message_id, user_id, text):
+    """Dict Message chat private dari user; command diberi entity bot_command"""
+    message = {
+        'message_id': message_id,
+        'date': int(time.time()),
+        'chat': {'id': user_id, 'type': 'private'},
+        'from': make_user(user_id),
+        'text': text,
+    }
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split(' ', 1)[0])}]
+    return message
+
+
+def make_message_update(update_id, user_id, text):
+    return {'update_id': update_id, 'message': make_message(update_id, user_id, text)}
+
+
+def make_document_update(update_id, user_id, file_id, file_name, file_size, mime_type='text/csv'):
+    """Pesan berisi dokumen (file didaftarkan dulu lewat FakeBotAPI.add_file)"""
+    message = make_message(update_id, user_id, '')
+    del message['text']
+    message['document'] = {
+        'file_id': file_id, 'file_unique_id': file_id, 'file_name': file_name,
+        'mime_type': mime_type, 'file_size': file_size,
+    }
+    return {'update_id': update_id, 'message': message}
+
+
+def make_callback_update(update_id, user_id, data, message_id):
+    """Klik tombol inline pada pesan bot `message_id`"""
+    message = {
+        'message_id': message_id,
+        'date': int(time.time()),
+        'chat': {'id': user_id, 'type': 'private'},
+        'from': BOT_USER,
+        'text': '...',
+    }
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id),
+            'from': make_user(user_id),
+            'chat_instance': str(user_id),
+            'message': message,
+            'data': data,
+        }
+    }
+
+
+class FakeBotAPI:
+    """
+    Bot API Telegram palsu (server HTTP lokal) untuk mengukur bot tanpa Telegram.
+
+    Menjawab method yang dipakai bot (getMe, setWebhook, sendMessage, sendPhoto,
+    editMessageText, answerCallbackQuery, ...) dan mencatat setiap balasan per chat,
+    sehingga latency end-to-end (update dikirim -> balasan pertama diterima) bisa diukur.
+    File untuk getFile / download didaftarkan lewat add_file(file_id, content).
+    latency: detik tambahan per API call (simulasi round-trip ke api.telegram.org).
+
+    Contoh:
+        api = FakeBotAPI(latency=0.05).start()
+        app = telegram_bot.build_application('123:fake', base_url=api.base_url)
+        ...
+        api.wait_reply(chat_id, after=count)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.latency = latency
+        self.calls = []  # (method, chat_id)
+        self.webhook = None  # parameter setWebhook terakhir
+        self._replies = {}  # chat_id -> [(waktu diterima, method), ...]
+        self._message_id = 0
+        self._files = {}  # file_id -> bytes
+        self._cond = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/bot'
+
+    @property
+    def base_file_url(self):
+        return self.base_url.replace('/bot', '/file/bot')
+
+    def add_file(self, file_id, content):
+        self._files[file_id] = content
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-bot-api', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ==================== BALASAN ====================
+
+    def reply_count(self, chat_id):
+        with self._cond:
+            return len(self._replies.get(chat_id, []))
+
+    def wait_reply(self, chat_id, after=0, timeout=30.0):
+        """Tunggu balasan ke-(after+1) untuk chat; return waktu diterima (perf_counter) atau None"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while len(self._replies.get(chat_id, [])) <= after:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._replies[chat_id][after][0]
+
+    def call_counts(self):
+        counts = {}
+        with self._cond:
+            for method, _ in self.calls:
+                counts[method] = counts.get(method, 0) + 1
+        return counts
+
+    # ==================== HTTP ====================
+
+    def _handle(self, method, params, chat_id):
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._cond:
+            self.calls.append((method, chat_id))
+            if method == 'setWebhook':
+                self.webhook = params
+            if method in ('getMe',):
+                return BOT_USER
+            if method == 'getFile':
+                file_id = params.get('file_id')
+                return {'file_id': file_id, 'file_unique_id': file_id,
+                        'file_size': len(self._files.get(file_id, b'')), 'file_path': f'documents/{file_id}'}
+            if chat_id is None:
+                return True
+
+            # Semua method yang menyasar chat (send*/edit*) dihitung sebagai balasan
+            self._replies.setdefault(chat_id, []).append((time.perf_counter(), method))
+            self._cond.notify_all()
+            self._message_id += 1
+            return {
+                'message_id': params.get('message_id') or self._message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': BOT_USER,
+                'text': params.get('text', ''),
+            }
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                method = self.path.rsplit('/', 1)[-1]
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                content_type = self.headers.get('Content-Type', '')
+
+                params = {}
+                chat_id = None
+                if content_type.startswith('multipart/'):
+                    # sendPhoto dkk: cukup ambil chat_id
+                    found = _CHAT_ID_RE.search(body)
+                    chat_id = int(found.group(1)) if found else None
+                else:
+                    if content_type.startswith('application/json'):
+                        params = json.loads(body or b'{}')
+                    else:
+                        params = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+                    params = {key: _decode(value) for key, value in params.items()}
+                    chat_id = params.get('chat_id')
+
+                result = api._handle(method, params, chat_id)
+                payload = json.dumps({'ok': True, 'result': result}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if '/file/bot' not in self.path:
+                    return self.do_POST()
+                content = api._files.get(self.path.rsplit('/', 1)[-1])
+                if content is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _decode(value):
+    """Parameter form Bot API berupa JSON (angka, list, dict) atau string biasa"""
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
@@ -1,18 +1,139 @@
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
 import os
+import re
 import json
+import time
 import base64
+import functools
+import threading
+from transaction_store import TransactionIndex, ColumnParser
+from keyword_matcher import KeywordMatcher, compile_category_keywords
+from write_queue import WriteBehindQueue
+from metrics import metrics
+from sheets_scheduler import RequestScheduler, PRIORITY_BACKGROUND
+from budget_engine import BudgetEngine
+
+TRANSACTIONS_TAB = 'Transactions'
+TRANSACTIONS_RANGE = 'Transactions!A2:I'
+# Kolom yang dibutuhkan store (ID..Description); AI_Confidence & Payment_Method tidak ikut dibaca
+MIRROR_COLUMNS = ('A', 'G')
+TRANSACTIONS_HEADER = ['ID', 'Timestamp', 'User_ID', 'Type', 'Amount', 'Category',
+                       'Description', 'AI_Confidence', 'Payment_Method']
+
+# Partisi bulanan: Transactions_2026_10 berisi transaksi Oktober 2026
+PARTITION_RE = re.compile(r'^Transactions_(\d{4})_(\d{2})$')
+
+
+def partition_tab(year_month):
+    """'2026-10' -> 'Transactions_2026_10'"""
+    return f"{TRANSACTIONS_TAB}_{year_month.replace('-', '_')}"
+
+
+def build_monthly_summary(user_id, year_month, totals):
+    """Baris Monthly_Summary (A:H) dari agregat bulan (TransactionIndex.get_month_totals)"""
+    category_expenses = totals['category_expenses']
+    top_category = max(category_expenses, key=category_expenses.get) if category_expenses else '-'
+    net_balance = totals['income'] - totals['expense'] - totals['saving']
+    return [
+        year_month,
+        user_id,
+        totals['income'],
+        totals['expense'],
+        totals['saving'],
+        net_balance,
+        top_category,
+        totals['count']
+    ]
+
+
+def build_analytics_metrics(totals, last_month_totals, budget_alert_count, now=None):
+    """Metric Analytics user dari agregat bulan ini & bulan lalu: {metric_name: value}"""
+    now = now or datetime.now()
+    days_passed = now.day
+    
+    total_expense = totals['expense']
+    total_income = totals['income']
+    total_saving = totals['saving']
+    
+    avg_daily_expense = total_expense / days_passed if days_passed > 0 else 0
+    avg_daily_income = total_income / days_passed if days_passed > 0 else 0
+    total_transactions = totals['count']
+    savings_rate = (total_saving / total_income * 100) if total_income > 0 else 0
+    
+    category_expenses = totals['category_expenses']
+    top_category = max(category_expenses, key=category_expenses.get) if category_expenses else '-'
+    
+    last_tx_date = totals['last_date']
+    
+    last_month_expense = last_month_totals['expense']
+    
+    if last_month_expense > 0:
+        trend_pct = ((total_expense - last_month_expense) / last_month_expense * 100)
+        spending_trend = f"{'+' if trend_pct > 0 else ''}{trend_pct:.1f}%"
+    else:
+        spending_trend = "N/A"
+    
+    return {
+        'Avg_Daily_Expense': f"{avg_daily_expense:.0f}",
+        'Avg_Daily_Income': f"{avg_daily_income:.0f}",
+        'Total_Transactions': str(total_transactions),
+        'Savings_Rate': f"{savings_rate:.1f}%",
+        'Budget_Alert_Count': str(budget_alert_count),
+        'Spending_Trend': spending_trend,
+        'Top_Expense_Category': top_category,
+        'Last_Transaction_Date': last_tx_date.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+class TransactionMirror:
+    """Mirror lokal satu tab Transactions: store kolumnar + penanda sinkronisasi tail-read"""
+
+    def __init__(self, tab, parser):
+        self.tab = tab
+        # Label metric: semua partisi digabung supaya jumlah label tidak bertambah tiap bulan
+        self.label = 'Transactions_*' if PARTITION_RE.match(tab) else tab
+        self.index = TransactionIndex(parser)
+        # Baris mentah tidak disimpan; cukup jumlah baris & ID baris terakhir sebagai penanda
+        self.row_count = 0
+        self.last_id = None
+        self.local_keys = {}  # (ID, user_id) yang di-index lokal tapi belum terlihat di sheet
+        self.writes = 0  # jumlah append ke tab ini; penanda append selama full load berjalan
+        self.rebuilds = 0  # jumlah full load yang dipasang; penanda load lain selama download
+        self.loaded = False
+        self.stale = False
+        self.last_sync = 0.0
+        self.last_full_sync = 0.0
+
+
+def _background(method):
+    """Request Sheets di dalam method ini mengalah ke request interaktif (user menunggu)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._scheduler.priority(PRIORITY_BACKGROUND):
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class SheetsManager:
-    def __init__(self, spreadsheet_id):
+    def __init__(self, spreadsheet_id, sync_interval=None, full_resync_interval=None,
+                 category_cache_ttl=None, journal_path=None, service=None, scheduler=None,
+                 partitioned=None):
+        """
+        service: opsional, objek pengganti googleapiclient (mis. fake_sheets.FakeSheetsService)
+                 untuk benchmark/development offline; credentials tidak dibaca.
+        scheduler: opsional, RequestScheduler dengan quota sendiri (default dari env)
+        partitioned: simpan transaksi per bulan di tab Transactions_YYYY_MM (default: env TX_PARTITIONING)
+        """
         self.spreadsheet_id = spreadsheet_id
         self.scopes = ['https://www.googleapis.com/auth/spreadsheets']
         
         # Load credentials dari environment variable (untuk Fly.io)
-        if os.getenv('GOOGLE_CREDENTIALS_BASE64'):
+        if service is not None:
+            creds = None
+        elif os.getenv('GOOGLE_CREDENTIALS_BASE64'):
             creds_json = base64.b64decode(os.getenv('GOOGLE_CREDENTIALS_BASE64'))
             creds_dict = json.loads(creds_json)
             creds = Credentials.from_service_account_info(creds_dict, scopes=self.scopes)
@@ -20,65 +141,572 @@ class SheetsManager:
             # Load dari file (untuk development lokal)
             creds = Credentials.from_service_account_file('credentials.json', scopes=self.scopes)
         
-        self.service = build('sheets', 'v4', credentials=creds)
-        self.sheet = self.service.spreadsheets()
+        # httplib2 tidak thread-safe: setiap thread (worker pool async) punya service sendiri
+        self._creds = creds
+        self._thread_local = threading.local()
+        self._injected_service = service
+        self.service = self._get_service()
+        
+        # Semua execute() lewat scheduler: quota read/write, retry 429/5xx, prioritas, coalescing
+        self._scheduler = scheduler or RequestScheduler()
+        
+        # Mirror lokal tab Transactions (dimuat sekali, lalu disinkronkan via tail-read).
+        # Jika dipartisi per bulan, setiap partisi punya mirror sendiri yang dimuat saat
+        # bulan tersebut pertama kali di-query.
+        self._lock = threading.RLock()
+        self._parser = ColumnParser()
+        self._partitioned = (
+            partitioned if partitioned is not None else os.getenv('TX_PARTITIONING', '').lower() == 'monthly'
+        )
+        self._mirrors = {}  # nama tab -> TransactionMirror
+        self._partitions = None  # 'YYYY-MM' -> nama tab partisi
+        self._partitions_loaded_at = 0.0
+        self._partitions_generation = 0  # naik tiap daftar partisi diganti / partisi dibuat
+        self._tx_sync_interval = float(
+            sync_interval if sync_interval is not None else os.getenv('TX_SYNC_INTERVAL', 30)
+        )
+        self._tx_full_resync_interval = float(
+            full_resync_interval if full_resync_interval is not None else os.getenv('TX_FULL_RESYNC_INTERVAL', 900)
+        )
+        
+        # Cache Categories + keyword map yang sudah dikompilasi (TTL, invalidasi via update_budget)
+        self._categories = None
+        self._keywords_map = {}
+        self._keyword_matcher = KeywordMatcher([])
+        self._categories_loaded_at = 0.0
+        self._budget = BudgetEngine()
+        self._category_cache_ttl = float(
+            category_cache_ttl if category_cache_ttl is not None else os.getenv('CATEGORY_CACHE_TTL', 300)
+        )
+        
+        # Index baris Monthly_Summary: (year_month, user_id) -> nomor baris
+        self._summary_rows = None
+        # Index baris Analytics: (user_id, metric) -> nomor baris
+        self._analytics_rows = None
+        # Naik tiap index baris di atas dibuang; read yang dimulai sebelumnya tidak dipasang
+        self._row_index_generation = 0
+        
+        # Write-behind: transaksi dicatat di journal lokal lalu dikirim batch (opsional)
+        self._write_queue = None
+        if journal_path:
+            self._write_queue = WriteBehindQueue(
+                self._flush_rows,
+                journal_path,
+                max_batch=int(os.getenv('TX_FLUSH_BATCH', 20)),
+                flush_interval=float(os.getenv('TX_FLUSH_INTERVAL', 2)),
+                dedupe_fn=self._unsent_rows
+            )
     
-    @staticmethod
-    def _safe_float(value):
-        """Konversi aman ke float (Handle Rp, titik separator, koma desimal)"""
-        try:
-            if isinstance(value, (int, float)):
-                return float(value)
-            
-            # Bersihkan string: "Rp 50.000,00" -> "50000.00"
-            clean_val = str(value).replace('Rp', '').replace(' ', '').replace('.', '').replace(',', '.')
-            return float(clean_val)
-        except (ValueError, TypeError):
-            return 0.0
+    def _get_service(self):
+        """Service Sheets milik thread yang sedang berjalan (dibuat saat pertama dipakai)"""
+        if self._injected_service is not None:
+            return self._injected_service
+        service = getattr(self._thread_local, 'service', None)
+        if service is None:
+            service = build('sheets', 'v4', credentials=self._creds)
+            self._thread_local.service = service
+        return service
 
-    @staticmethod
-    def _parse_date(date_str):
-        """Parse multiple date formats safely"""
-        if not date_str:
-            return datetime.now(ZoneInfo('Asia/Jakarta'))
-            
-        formats = [
-            '%Y-%m-%d %H:%M:%S',      # Standard SQL/Sheets
-            '%Y-%m-%dT%H:%M:%S',      # ISO
-            '%Y-%m-%d',               # ISO Date only
-            '%d/%m/%Y %H:%M:%S',      # Sheet format (DD/MM/YYYY HH:MM:SS)
-            '%d/%m/%Y'                # Short date
-        ]
-        
-        for fmt in formats:
-            try:
-                # Handle potential microseconds for ISO by splitting
-                clean_date = date_str.split('.')[0] if 'T' in date_str else date_str
-                return datetime.strptime(clean_date, fmt)
-            except ValueError:
-                continue
-                
-        # If all fail, try naive approach or return now to allow flow to continue
-        try:
-            return datetime.fromisoformat(date_str)
-        except ValueError:
-            return datetime.now()
+    @property
+    def sheet(self):
+        return self._get_service().spreadsheets()
+
+    def _execute(self, request, range_label):
+        """
+        execute() dengan timer per operasi/range + hitung bytes response.
+        range_label: range yang dibaca/ditulis; untuk range dinamis pakai '#' sebagai
+        ganti nomor baris ('Transactions!A#:I') supaya label metric tidak bertambah terus.
+        """
+        operation = (getattr(request, 'methodId', None) or 'execute').rsplit('.', 1)[-1]
+
+        postproc = getattr(request, 'postproc', None)
+        if postproc is not None:
+            def measured_postproc(resp, content):
+                metrics.inc('sheets_response_bytes_total', len(content or b''), op=operation, range=range_label)
+                return postproc(resp, content)
+            request.postproc = measured_postproc
 
+        with metrics.timer('sheets_request_seconds', op=operation, range=range_label):
+            return self._scheduler.execute(request, operation)
+
+    def _batch_get(self, ranges, range_label, typed=True):
+        """
+        Baca beberapa range dalam satu values.batchGet.
+        typed: UNFORMATTED_VALUE + SERIAL_NUMBER -> nominal datang sebagai angka dan tanggal
+               sebagai serial float (tanpa parsing "Rp 50.000,00" / tanggal lokal di Python)
+        Returns: list values per range (urut sesuai ranges)
+        """
+        options = {'valueRenderOption': 'UNFORMATTED_VALUE', 'dateTimeRenderOption': 'SERIAL_NUMBER'} \
+            if typed else {'valueRenderOption': 'FORMATTED_VALUE'}
+        result = self._execute(self.sheet.values().batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=list(ranges),
+            **options
+        ), range_label)
+        return [value_range.get('values', []) for value_range in result.get('valueRanges', [])]
+    
     def test_connection(self):
         """Test koneksi ke spreadsheet"""
         try:
-            result = self.sheet.values().get(
+            result = self._execute(self.sheet.values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range='Transactions!A1:I1'
-            ).execute()
+            ), 'Transactions!A1:I1')
             print("✅ Koneksi ke Google Sheets berhasil!")
             return True
         except Exception as e:
             print(f"❌ Error: {e}")
             return False
-    
+
+    # ==================== TRANSACTIONS MIRROR ====================
+
+    @staticmethod
+    def _row_key(row):
+        """Kunci baris transaksi: (ID, user_id)"""
+        return str(row[0]), str(row[2])
+
+    def _month_of(self, timestamp):
+        """'YYYY-MM' dari timestamp transaksi (tanggal tidak valid -> bulan sekarang)"""
+        tx_date = self._parser.parse_date(timestamp) or datetime.now()
+        return tx_date.strftime('%Y-%m')
+
+    def _tab_for_month(self, year_month):
+        """Tab tempat transaksi bulan ini disimpan"""
+        return partition_tab(year_month) if self._partitioned else TRANSACTIONS_TAB
+
+    def _mirror(self, tab):
+        with self._lock:
+            mirror = self._mirrors.get(tab)
+            if mirror is None:
+                mirror = self._mirrors[tab] = TransactionMirror(tab, self._parser)
+            return mirror
+
+    def _load_transactions(self, mirror):
+        """
+        Download penuh satu tab Transactions ke mirror lokal (kolom A:G, nilai bertipe).
+        Request berjalan tanpa self._lock; hasilnya dipasang di bawah lock.
+        """
+        with self._lock:
+            writes, rebuilds = mirror.writes, mirror.rebuilds
+        started = time.monotonic()
+        first, last = MIRROR_COLUMNS
+        rows, = self._batch_get([f'{mirror.tab}!{first}2:{last}'], f'{mirror.label}!{first}2:{last}')
+
+        with self._lock:
+            if mirror.rebuilds != rebuilds:
+                # Load lain sudah dipasang selama download: pemimpin read yang digabung
+                # scheduler (respon yang sama) atau load yang lebih baru -> tidak rebuild lagi
+                return
+            mirror.rebuilds += 1
+            mirror.row_count = len(rows)
+            mirror.last_id = str(rows[-1][0]) if rows and rows[-1] else None
+            # Parsing tanggal/nominal + build index (terpisah dari waktu network di sheets_request_seconds)
+            with metrics.timer('transactions_index_seconds', stage='rebuild'):
+                mirror.index.rebuild(rows)
+
+            # Baris yang masih antri di write-behind belum ada di sheet -> index ulang
+            mirror.local_keys = {}
+            pending = self._write_queue.pending_rows() if self._write_queue else []
+            pending = [row for row in pending if self._tab_for_month(self._month_of(row[1])) == mirror.tab]
+            if pending:
+                # Batch yang sedang di-flush bisa saja sudah masuk sheet
+                loaded = {self._row_key(row) for row in rows if len(row) >= 3}
+                for row in pending:
+                    if self._row_key(row) not in loaded:
+                        self._index_local_row(mirror, row)
+
+            mirror.loaded = True
+            # Append selama download bisa belum ikut terbaca -> tail-read berikutnya melengkapi
+            mirror.stale = mirror.writes != writes
+            mirror.last_sync = mirror.last_full_sync = started
+        print(f"📥 Mirror {mirror.tab} dimuat: {len(rows)} baris")
+
+    def _tail_sync_transactions(self, mirror):
+        """
+        Ambil hanya baris baru di ujung tab.
+        Baris terakhir yang sudah diketahui ikut dibaca sebagai penanda: kalau ID-nya
+        berubah (ada baris dihapus/disisipkan di tengah), mirror di-reload penuh.
+        """
+        with self._lock:
+            known = mirror.row_count
+        if known == 0:
+            return self._load_transactions(mirror)
+
+        # Baris data ke-n ada di baris sheet n+1 (baris 1 = header)
+        first, last = MIRROR_COLUMNS
+        tail, = self._batch_get([f'{mirror.tab}!{first}{known + 1}:{last}'], f'{mirror.label}!{first}#:{last}')
+        with self._lock:
+            # Selama request berjalan sync/append lain bisa sudah memajukan mirror:
+            # penanda dicari di posisi baris terakhir mirror saat ini
+            offset = mirror.row_count - known
+            if offset < 0 or (offset and offset >= len(tail)):
+                return
+            if not tail or not tail[offset] or str(tail[offset][0]) != mirror.last_id:
+                reload = True
+            else:
+                reload = False
+                self._extend_mirror(mirror, tail[offset + 1:])
+                mirror.stale = False
+                mirror.last_sync = time.monotonic()
+        if reload:
+            self._load_transactions(mirror)
+
+    def _sync_transactions(self, mirror, force=False):
+        """
+        Pastikan mirror cukup segar: full load, tail-read, atau tidak sama sekali.
+        Dipanggil tanpa memegang self._lock: antri quota & backoff tidak menahan query
+        lain, dan sync bersamaan atas tab yang sama digabung scheduler jadi satu read.
+        """
+        if self._partitioned and not self._partition_exists(mirror.tab):
+            with self._lock:
+                # Partisi belum dibuat: bulan tanpa transaksi, tidak perlu request
+                if mirror.row_count == 0:
+                    mirror.loaded = True
+                    mirror.last_sync = mirror.last_full_sync = time.monotonic()
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            full = not mirror.loaded or now - mirror.last_full_sync >= self._tx_full_resync_interval
+            tail = force or mirror.stale or now - mirror.last_sync >= self._tx_sync_interval
+        if full:
+            self._load_transactions(mirror)
+        elif tail:
+            self._tail_sync_transactions(mirror)
+
+    def _get_transaction_index(self, year_month):
+        """
+        Store kolumnar untuk bulan tertentu (hanya tab/partisi bulan itu yang disinkronkan).
+        Panggil tanpa self._lock, lalu baca index di bawah lock.
+        """
+        mirror = self._mirror(self._tab_for_month(year_month))
+        self._sync_transactions(mirror)
+        return mirror.index
+
+    def _all_mirrors(self):
+        """Mirror semua tab Transactions yang ada (semua partisi jika dipartisi)"""
+        if not self._partitioned:
+            return [self._mirror(TRANSACTIONS_TAB)]
+        return [self._mirror(tab) for _, tab in sorted(self._list_partitions().items())]
+
+    def _index_local_row(self, mirror, row):
+        """Index baris yang ditulis proses ini tapi belum terlihat di mirror sheet"""
+        key = self._row_key(row)
+        mirror.local_keys[key] = mirror.local_keys.get(key, 0) + 1
+        mirror.index.add_row(row)
+
+    def _extend_mirror(self, mirror, rows):
+        """Tambahkan baris sheet ke mirror; baris lokal yang sudah ter-index tidak diindex dua kali"""
+        if not rows:
+            return
+        mirror.row_count += len(rows)
+        mirror.last_id = str(rows[-1][0]) if rows[-1] else None
+
+        new_rows = []
+        for row in rows:
+            key = self._row_key(row) if len(row) >= 3 else None
+            if key in mirror.local_keys:
+                mirror.local_keys[key] -= 1
+                if not mirror.local_keys[key]:
+                    del mirror.local_keys[key]
+            else:
+                new_rows.append(row)
+
+        if len(new_rows) == 1:
+            mirror.index.add_row(new_rows[0])
+        else:
+            mirror.index.add_rows(new_rows)
+
+    def _append_to_mirror(self, mirror, rows, append_result):
+        """Tambahkan baris yang baru ditulis ke mirror tanpa download ulang"""
+        with self._lock:
+            mirror.writes += 1
+            if not mirror.loaded:
+                return
+
+            # updatedRange contoh: "Transactions!A105:I105"
+            updated_range = (append_result or {}).get('updates', {}).get('updatedRange', '')
+            match = re.search(r'![A-Z]+(\d+)', updated_range)
+
+            if match and int(match.group(1)) == mirror.row_count + 2:
+                self._extend_mirror(mirror, [list(row) for row in rows])
+            else:
+                # Ada baris lain yang masuk duluan (edit manual / proses lain): tail-read berikutnya
+                mirror.stale = True
+
+    def _append_rows(self, rows):
+        """
+        Tulis baris Transactions dengan satu multi-row append per tab.
+        Jika dipartisi, baris dikelompokkan per bulan dan partisi dibuat bila belum ada.
+        Returns: hasil append terakhir
+        """
+        groups = {}
+        for row in rows:
+            tab = self._tab_for_month(self._month_of(row[1]))
+            groups.setdefault(tab, []).append(row)
+
+        result = None
+        for tab, tab_rows in groups.items():
+            if self._partitioned:
+                self._ensure_partition(tab)
+            mirror = self._mirror(tab)
+            result = self._execute(self.sheet.values().append(
+                spreadsheetId=self.spreadsheet_id,
+                range=f'{tab}!A:I',
+                valueInputOption='USER_ENTERED',
+                insertDataOption='INSERT_ROWS',
+                body={'values': tab_rows}
+            ), f'{mirror.label}!A:I')
+
+            self._append_to_mirror(mirror, tab_rows, result)
+
+        return result
+
+    def _flush_rows(self, rows):
+        """Flush write-behind: append batch dengan prioritas background"""
+        with self._scheduler.priority(PRIORITY_BACKGROUND):
+            return self._append_rows(rows)
+
+    @_background
+    def _unsent_rows(self, rows):
+        """Rows yang belum ada di sheet (cek sebelum flush ulang write-behind yang gagal)"""
+        existing = self._existing_keys(rows)
+        return [row for row in rows if self._row_key(row) not in existing]
+
+    def _existing_keys(self, rows, include_local=False):
+        """
+        (ID, user_id) dari rows yang sudah ada di sheet. Hanya tab/partisi bulan
+        milik rows yang disinkronkan, dan hanya partisi (user, bulan) milik rows yang
+        dibaca dari index; baris lokal yang belum terkirim (journal write-behind)
+        hanya dihitung jika include_local.
+        """
+        by_tab = {}
+        for row in rows:
+            year_month = self._month_of(row[1])
+            by_tab.setdefault(self._tab_for_month(year_month), set()).add((str(row[2]), year_month))
+        wanted = {self._row_key(row) for row in rows}
+
+        existing = set()
+        for tab, user_months in by_tab.items():
+            mirror = self._mirror(tab)
+            self._sync_transactions(mirror, force=True)
+            with self._lock:
+                keys = mirror.index.row_keys(user_months) & wanted
+                if not include_local:
+                    # Baris di local_keys baru ada di store lokal, belum di sheet
+                    keys.difference_update(mirror.local_keys)
+                existing |= keys
+        return existing
+
+    @_background
+    def append_transactions(self, rows, skip_existing=False):
+        """
+        Append banyak baris Transactions (A:I) sekaligus, mis. import CSV atau replikasi backend lain.
+        skip_existing: lewati baris yang (ID, user_id)-nya sudah ada di sheet / antri di journal
+        Returns: jumlah baris yang ditulis
+        """
+        if skip_existing and rows:
+            existing = self._existing_keys(rows, include_local=True)
+            rows = [row for row in rows if self._row_key(row) not in existing]
+        if rows:
+            self._append_rows([list(row) for row in rows])
+        return len(rows)
+
+    def export_transactions(self):
+        """Semua baris Transactions (A:I, FORMATTED) dari tab lama atau semua partisi, satu batchGet"""
+        if self._partitioned:
+            tabs = [tab for _, tab in sorted(self._list_partitions().items())]
+        else:
+            tabs = [TRANSACTIONS_TAB]
+        if not tabs:
+            return []
+        label = 'Transactions_*!A2:I' if self._partitioned else TRANSACTIONS_RANGE
+        values = self._batch_get([f'{tab}!A2:I' for tab in tabs], label, typed=False)
+        return [row for tab_rows in values for row in tab_rows]
+
+    # ==================== PARTISI BULANAN ====================
+
+    def _list_partitions(self, force=False):
+        """{'YYYY-MM': nama tab} partisi yang ada di spreadsheet (metadata di-cache)"""
+        with self._lock:
+            if not (force or self._partitions is None or
+                    time.monotonic() - self._partitions_loaded_at >= self._tx_full_resync_interval):
+                return self._partitions
+            generation = self._partitions_generation
+
+        result = self._execute(self.sheet.get(
+            spreadsheetId=self.spreadsheet_id,
+            fields='sheets.properties.title'
+        ), 'metadata')
+
+        partitions = {}
+        for sheet in result.get('sheets', []):
+            match = PARTITION_RE.match(sheet.get('properties', {}).get('title', ''))
+            if match:
+                partitions[f'{match.group(1)}-{match.group(2)}'] = match.group(0)
+        with self._lock:
+            if self._partitions_generation != generation:
+                # Daftar diganti / partisi dibuat selama read: jangan timpa yang lebih baru
+                return {**partitions, **(self._partitions or {})}
+            self._partitions = partitions
+            self._partitions_loaded_at = time.monotonic()
+            self._partitions_generation += 1
+            return partitions
+
+    def _partition_exists(self, tab):
+        return tab in self._list_partitions().values()
+
+    def _ensure_partition(self, tab):
+        """
+        Buat tab partisi + header jika belum ada (dipanggil sebelum append).
+        Tanpa self._lock: thread/proses lain yang membuat tab yang sama lebih dulu
+        membuat addSheet gagal 400, yang ditangani di bawah.
+        """
+        if self._partition_exists(tab) or tab in self._list_partitions(force=True).values():
+            return
+
+        try:
+            self._execute(self.sheet.batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'requests': [{'addSheet': {'properties': {'title': tab}}}]}
+            ), 'addSheet')
+        except HttpError as e:
+            # Proses lain bisa membuat tab yang sama lebih dulu
+            if e.resp.status != 400 or tab not in self._list_partitions(force=True).values():
+                raise
+        else:
+            self._execute(self.sheet.values().update(
+                spreadsheetId=self.spreadsheet_id,
+                range=f'{tab}!A1:I1',
+                valueInputOption='RAW',
+                body={'values': [TRANSACTIONS_HEADER]}
+            ), 'Transactions_*!A1:I1')
+            print(f"🗂️ Partisi {tab} dibuat")
+
+        year_month = tab[len(TRANSACTIONS_TAB) + 1:].replace('_', '-')
+        with self._lock:
+            self._partitions = {**(self._partitions or {}), year_month: tab}
+            self._partitions_generation += 1
+
+    def migrate_to_partitions(self, clear_legacy=False, batch_size=5000):
+        """
+        Pindahkan isi tab Transactions lama ke partisi bulanan (Transactions_YYYY_MM).
+        Aman dijalankan ulang (compaction): baris yang ID-nya sudah ada di partisi dilewati.
+        Baris dengan tanggal tidak valid tetap di tab lama.
+        clear_legacy: kosongkan baris tab lama yang sudah dibaca (kecuali yang tidak bisa dipindah);
+        baris yang masuk setelah dibaca tidak disentuh dan ikut dipindah di run berikutnya
+        Returns: dict {'moved': {bulan: jumlah}, 'duplicates': n, 'skipped': n}
+        """
+        result = self._execute(self.sheet.values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range=TRANSACTIONS_RANGE
+        ), TRANSACTIONS_RANGE)
+        values = result.get('values', [])
+        # Baris terakhir yang ikut terbaca (values posisional, baris kosong di tengah ikut terhitung)
+        last_read_row = len(values) + 1
+        rows = [row for row in values if row]
+
+        valid_rows = [row for row in rows if len(row) >= 7]
+        dates = self._parser.parse_dates([row[1] for row in valid_rows])
+        by_month = {}
+        skipped = [row for row in rows if len(row) < 7]
+        for row, tx_date in zip(valid_rows, dates):
+            if tx_date is None:
+                skipped.append(row)
+            else:
+                by_month.setdefault(tx_date.strftime('%Y-%m'), []).append(row)
+
+        report = {'moved': {}, 'duplicates': 0, 'skipped': len(skipped)}
+        months = sorted(by_month)
+        for year_month in months:
+            self._ensure_partition(partition_tab(year_month))
+
+        # Kunci (ID, user) yang sudah ada di semua partisi tujuan: satu batchGet kolom A:C saja
+        existing = self._batch_get(
+            [f'{partition_tab(year_month)}!A2:C' for year_month in months], 'Transactions_*!A2:C', typed=False
+        ) if months else []
+
+        for year_month, existing_rows in zip(months, existing):
+            tab = partition_tab(year_month)
+            existing_keys = {self._row_key(row) for row in existing_rows if len(row) >= 3}
+
+            new_rows = [row for row in by_month[year_month] if self._row_key(row) not in existing_keys]
+            report['duplicates'] += len(by_month[year_month]) - len(new_rows)
+            for start in range(0, len(new_rows), batch_size):
+                self._execute(self.sheet.values().append(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f'{tab}!A:I',
+                    valueInputOption='USER_ENTERED',
+                    insertDataOption='INSERT_ROWS',
+                    body={'values': new_rows[start:start + batch_size]}
+                ), 'Transactions_*!A:I')
+            report['moved'][year_month] = len(new_rows)
+            print(f"📦 {tab}: {len(new_rows)} baris dipindah")
+
+        if clear_legacy and values:
+            # Hanya rentang yang tadi dibaca: baris yang di-append bot sementara migrasi
+            # berjalan berada di bawahnya dan tidak ikut terhapus
+            self._execute(self.sheet.values().clear(
+                spreadsheetId=self.spreadsheet_id,
+                range=f'{TRANSACTIONS_TAB}!A2:I{last_read_row}',
+                body={}
+            ), TRANSACTIONS_RANGE)
+            if skipped:
+                self._execute(self.sheet.values().update(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=f'{TRANSACTIONS_TAB}!A2:I{len(skipped) + 1}',
+                    valueInputOption='RAW',
+                    body={'values': skipped}
+                ), TRANSACTIONS_RANGE)
+
+        # Partisi baru terisi di luar mirror: reload penuh saat dipakai lagi
+        with self._lock:
+            self._mirrors = {}
+        return report
+
+    # ==================== WRITE-BEHIND ====================
+
+    def start_write_behind(self):
+        """Putar ulang journal yang belum terkirim lalu jalankan thread flush"""
+        if not self._write_queue:
+            return
+
+        replayed = self._write_queue.replay()
+        if replayed:
+            by_tab = {}
+            for row in replayed:
+                by_tab.setdefault(self._tab_for_month(self._month_of(row[1])), []).append(row)
+
+            # Proses bisa mati setelah append sukses tapi sebelum penanda flush tertulis:
+            # buang baris yang ternyata sudah ada di sheet supaya tidak dobel
+            existing = self._existing_keys(replayed)
+            duplicates = [row for row in replayed if self._row_key(row) in existing]
+            if duplicates:
+                self._write_queue.discard(duplicates)
+            print(f"♻️ Journal: {len(replayed) - len(duplicates)} transaksi diputar ulang")
+
+            with self._lock:
+                for tab, rows in by_tab.items():
+                    mirror = self._mirror(tab)
+                    for row in rows:
+                        # Full load di atas sudah meng-index baris pending sebagai baris lokal
+                        key = self._row_key(row)
+                        if key not in existing and key not in mirror.local_keys:
+                            self._index_local_row(mirror, row)
+
+        self._write_queue.start()
+
+    def stop_write_behind(self):
+        """Flush sisa antrian lalu hentikan thread write-behind"""
+        if self._write_queue:
+            self._write_queue.stop()
+
+    def flush_transactions(self):
+        """Paksa kirim semua transaksi yang masih antri"""
+        return self._write_queue.flush() if self._write_queue else 0
+
     def add_transaction(self, transaction):
-        """Tambah transaksi ke sheet"""
+        """Tambah transaksi ke sheet (langsung, atau via journal write-behind jika aktif)"""
         values = [[
             transaction['id'],
             transaction['timestamp'],
@@ -91,362 +719,323 @@ class SheetsManager:
             transaction.get('payment_method', '-')
         ]]
         
-        body = {'values': values}
+        # Status budget dihitung sebelum baris masuk index (butuh total sebelum & sesudah)
+        budget = self._check_budget(transaction) if transaction['type'] == 'expense' else None
         
-        result = self.sheet.values().append(
-            spreadsheetId=self.spreadsheet_id,
-            range='Transactions!A:I',
-            valueInputOption='USER_ENTERED',
-            insertDataOption='INSERT_ROWS',
-            body=body
-        ).execute()
+        if not self._write_queue:
+            result = self._append_rows(values)
+            result['budget'] = budget
+            return result
         
-        return result
+        # Tersimpan durable di journal -> boleh langsung dikonfirmasi ke user.
+        # Index di-update sekarang supaya ringkasan/budget sudah ikut menghitungnya.
+        with self._lock:
+            seq = self._write_queue.submit(values[0])
+            mirror = self._mirror(self._tab_for_month(self._month_of(transaction['timestamp'])))
+            if mirror.loaded:
+                self._index_local_row(mirror, values[0])
+        
+        return {'journaled': seq, 'budget': budget}
+
+    def _check_budget(self, transaction):
+        """
+        Status budget kategori setelah transaksi ini + threshold yang baru dilewati.
+        Tanpa I/O selama cache Categories & mirror sudah dimuat.
+        """
+        year_month = self._month_of(transaction['timestamp'])
+        mirror = self._mirror(self._tab_for_month(year_month))
+        
+        if not self._budget.loaded:
+            self._ensure_categories()
+        if not mirror.loaded:
+            self._sync_transactions(mirror)
+        with self._lock:
+            spent_before = mirror.index.get_category_spent(
+                transaction['user_id'], year_month, transaction['category']
+            )
+        
+        spent = spent_before + float(transaction['amount'])
+        return self._budget.status(transaction['category'], spent, spent_before)
     
-    def get_all_categories(self):
-        """Ambil semua data kategori dari sheet Categories"""
-        result = self.sheet.values().get(
-            spreadsheetId=self.spreadsheet_id,
-            range='Categories!A2:F'
-        ).execute()
+    # ==================== CATEGORIES CACHE ====================
+
+    def invalidate_categories(self):
+        """Buang cache Categories (dipanggil setelah sheet Categories diubah)"""
+        self._categories = None
+
+    def _ensure_categories(self):
+        """Reload Categories hanya jika cache kosong atau TTL sudah lewat"""
+        if (self._categories is None or
+                time.monotonic() - self._categories_loaded_at >= self._category_cache_ttl):
+            self._load_categories()
+
+    def _load_categories(self):
+        """Download Categories!A2:F lalu kompilasi keyword map sekali jalan"""
+        categories = self._fetch_categories()
         
-        rows = result.get('values', [])
+        self._categories = categories
+        self._keywords_map, self._keyword_matcher = compile_category_keywords(categories)
+        self._budget.set_limits(categories)
+        self._categories_loaded_at = time.monotonic()
+
+    def _fetch_categories(self):
+        """Ambil semua data kategori dari sheet Categories (tanpa cache, Budget_Limit sebagai angka)"""
+        values, = self._batch_get(['Categories!A2:F'], 'Categories!A2:F')
+        
+        rows = [row for row in values if len(row) >= 6]
+        limits = self._parser.parse_amounts([row[4] for row in rows])
         
         categories = []
-        for row in rows:
-            if len(row) >= 6:
-                categories.append({
-                    'id': row[0],
-                    'name': row[1],
-                    'type': row[2],
-                    'icon': row[3],
-                    'budget_limit': self._safe_float(row[4]),
-                    'keywords': [k.strip().lower() for k in row[5].split(',')]
-                })
+        for row, limit in zip(rows, limits):
+            categories.append({
+                'id': row[0],
+                'name': row[1],
+                'type': row[2],
+                'icon': row[3],
+                'budget_limit': limit if limit is not None else 0.0,
+                'keywords': [k.strip().lower() for k in str(row[5]).split(',')]
+            })
         
         return categories
     
+    def get_all_categories(self, force_refresh=False):
+        """Ambil semua data kategori (dari cache selama TTL belum lewat)"""
+        if force_refresh:
+            self.invalidate_categories()
+        self._ensure_categories()
+        return self._categories
+    
     def get_keywords_mapping(self):
-        """Buat mapping keywords → category_name untuk AI"""
-        categories = self.get_all_categories()
-        
-        keywords_map = {}
-        for cat in categories:
-            for keyword in cat['keywords']:
-                if keyword not in keywords_map:
-                    keywords_map[keyword] = []
-                keywords_map[keyword].append(cat['name'])
-        
-        return keywords_map
+        """Mapping keywords → category_name untuk AI (dikompilasi saat cache dimuat)"""
+        self._ensure_categories()
+        return self._keywords_map
     
     def simple_categorize(self, description):
         """Kategorisasi sederhana berdasarkan keyword matching"""
-        description_lower = description.lower()
-        keywords_map = self.get_keywords_mapping()
+        self._ensure_categories()
         
-        # Cek setiap keyword
-        for keyword, categories in keywords_map.items():
-            if keyword in description_lower:
-                return categories[0], 0.9  # Return kategori pertama + confidence
+        category, _ = self._keyword_matcher.match(description)
+        if category:
+            return category, 0.9  # Return kategori terbaik + confidence
         
         return 'Lainnya', 0.5  # Default
     
-    def get_category_budget_status(self, category_name, user_id):
-        """Cek budget status kategori untuk user tertentu"""
-        # 1. Ambil budget limit dari Categories
-        categories = self.get_all_categories()
-        budget_limit = 0
-        
-        for cat in categories:
-            if cat['name'] == category_name:
-                budget_limit = cat['budget_limit']
-                break
+    def simple_categorize_many(self, descriptions):
+        """Batch simple_categorize: [(category, confidence), ...]"""
+        self._ensure_categories()
         
-        if budget_limit == 0:
-            return None
-        
-        # 2. Hitung total spending bulan ini
+        return [
+            (category, 0.9) if category else ('Lainnya', 0.5)
+            for category, _ in self._keyword_matcher.match_many(descriptions)
+        ]
+    
+    def get_category_budget_status(self, category_name, user_id):
+        """Cek budget status kategori untuk user tertentu (limit cache + counter bulan ini)"""
+        self._ensure_categories()
         current_month = datetime.now().strftime('%Y-%m')
         
-        result = self.sheet.values().get(
-            spreadsheetId=self.spreadsheet_id,
-            range='Transactions!A2:I'
-        ).execute()
-        
-        rows = result.get('values', [])
-        total_spent = 0
+        index = self._get_transaction_index(current_month)
+        with self._lock:
+            spent = index.get_category_spent(user_id, current_month, category_name)
         
-        for row in rows:
-            if len(row) >= 7:
-                tx_month = self._parse_date(row[1]).strftime('%Y-%m')
-                
-                if (str(row[2]) == str(user_id) and 
-                    row[3] == 'expense' and 
-                    row[5] == category_name and 
-                    tx_month == current_month):
-                    
-                    total_spent += self._safe_float(row[4])
-        
-        return {
-            'category': category_name,
-            'limit': budget_limit,
-            'spent': total_spent,
-            'remaining': budget_limit - total_spent,
-            'percentage': (total_spent / budget_limit * 100) if budget_limit > 0 else 0
-        }
+        return self._budget.status(category_name, spent)
     
     def get_transactions_by_date(self, user_id, date):
         """Ambil transaksi berdasarkan tanggal"""
-        result = self.sheet.values().get(
-            spreadsheetId=self.spreadsheet_id,
-            range='Transactions!A2:I'
-        ).execute()
-        
-        rows = result.get('values', [])
-        transactions = []
-        
-        for row in rows:
-            if len(row) >= 7:
-                tx_date = self._parse_date(row[1]).date()
-                if str(row[2]) == str(user_id) and tx_date == date:
-                    transactions.append({
-                        'id': row[0],
-                        'timestamp': row[1],
-                        'user_id': row[2],
-                        'type': row[3],
-                        'amount': self._safe_float(row[4]),
-                        'category': row[5],
-                        'description': row[6]
-                    })
-        
-        return transactions
+        index = self._get_transaction_index(date.strftime('%Y-%m'))
+        with self._lock:
+            return index.get_day(user_id, date)
     
     def get_transactions_by_month(self, user_id, year_month):
         """Ambil transaksi berdasarkan bulan (format: 2025-01)"""
-        result = self.sheet.values().get(
-            spreadsheetId=self.spreadsheet_id,
-            range='Transactions!A2:I'
-        ).execute()
-        
-        rows = result.get('values', [])
-        transactions = []
-        
-        for row in rows:
-            if len(row) >= 7:
-                tx_month = self._parse_date(row[1]).strftime('%Y-%m')
-                if str(row[2]) == str(user_id) and tx_month == year_month:
-                    transactions.append({
-                        'id': row[0],
-                        'timestamp': row[1],
-                        'user_id': row[2],
-                        'type': row[3],
-                        'amount': self._safe_float(row[4]),
-                        'category': row[5],
-                        'description': row[6]
-                    })
-        
-        return transactions
+        index = self._get_transaction_index(year_month)
+        with self._lock:
+            return index.get_month(user_id, year_month)
     
+    def get_day_frame(self, user_id, date):
+        """DataFrame transaksi satu tanggal langsung dari store kolumnar (None jika kosong)"""
+        index = self._get_transaction_index(date.strftime('%Y-%m'))
+        with self._lock:
+            return index.get_day_frame(user_id, date)
+    
+    def get_month_frame(self, user_id, year_month):
+        """DataFrame transaksi satu bulan langsung dari store kolumnar (None jika kosong)"""
+        index = self._get_transaction_index(year_month)
+        with self._lock:
+            return index.get_month_frame(user_id, year_month)
+    
+    def _load_row_index(self, attr, range_name, key):
+        """
+        Index baris tab kecil (key(row) -> nomor baris) yang disimpan di atribut `attr`.
+        Read berjalan tanpa self._lock; hasilnya hanya dipasang jika index tidak dibuang
+        selama read berjalan (baris yang baru di-append bisa belum terbaca -> baca ulang).
+        """
+        while True:
+            with self._lock:
+                rows = getattr(self, attr)
+                if rows is not None:
+                    return rows
+                generation = self._row_index_generation
+
+            result = self._execute(self.sheet.values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=range_name
+            ), range_name)
+            rows = {}
+            for i, row in enumerate(result.get('values', [])):
+                if len(row) >= 2:
+                    rows.setdefault(key(row), i + 2)
+
+            with self._lock:
+                if getattr(self, attr) is None and self._row_index_generation == generation:
+                    setattr(self, attr, rows)
+                    return rows
+
+    def _drop_row_index(self, attr):
+        """Buang index baris (posisi baris baru tidak diketahui); dipanggil di bawah self._lock"""
+        setattr(self, attr, None)
+        self._row_index_generation += 1
+
+    def _get_summary_row_index(self):
+        """(year_month, user_id) -> nomor baris Monthly_Summary (dibaca sekali saja)"""
+        return self._load_row_index('_summary_rows', 'Monthly_Summary!A2:B', lambda row: (row[0], str(row[1])))
+    
+    @_background
     def update_monthly_summary(self, user_id, year_month):
-        """Update ringkasan bulanan"""
-        result = self.sheet.values().get(
-            spreadsheetId=self.spreadsheet_id,
-            range='Transactions!A2:I'
-        ).execute()
-        
-        rows = result.get('values', [])
+        """Update ringkasan bulanan (dari agregat berjalan, satu write per panggilan)"""
+        index = self._get_transaction_index(year_month)
+        with self._lock:
+            totals = index.get_month_totals(user_id, year_month)
         
-        total_income = 0
-        total_expense = 0
-        total_saving = 0
-        transaction_count = 0
-        category_expenses = {}
-        
-        for row in rows:
-            if len(row) >= 7:
-                tx_month = self._parse_date(row[1]).strftime('%Y-%m')
-                
-                if str(row[2]) == str(user_id) and tx_month == year_month:
-                    tx_type = row[3]
-                    amount = self._safe_float(row[4])
-                    category = row[5]
-                    
-                    transaction_count += 1
-                    
-                    if tx_type == 'income':
-                        total_income += amount
-                    elif tx_type == 'expense':
-                        total_expense += amount
-                        category_expenses[category] = category_expenses.get(category, 0) + amount
-                    elif tx_type == 'saving':
-                        total_saving += amount
-        
-        top_category = max(category_expenses, key=category_expenses.get) if category_expenses else '-'
+        return self.write_monthly_summary(build_monthly_summary(user_id, year_month, totals))
+    
+    @_background
+    def write_monthly_summary(self, summary_data):
+        """Tulis satu baris Monthly_Summary (update baris yang ada, atau append)"""
+        year_month, user_id = summary_data[0], summary_data[1]
         
         # Cek apakah sudah ada di Monthly_Summary
-        summary_result = self.sheet.values().get(
-            spreadsheetId=self.spreadsheet_id,
-            range='Monthly_Summary!A2:H'
-        ).execute()
-        
-        summary_rows = summary_result.get('values', [])
-        row_index = None
-        
-        for i, row in enumerate(summary_rows):
-            if len(row) >= 2 and row[0] == year_month and str(row[1]) == str(user_id):
-                row_index = i + 2
-                break
-        
-        net_balance = total_income - total_expense - total_saving
-        summary_data = [
-            year_month,
-            user_id,
-            total_income,
-            total_expense,
-            total_saving,
-            net_balance,
-            top_category,
-            transaction_count
-        ]
+        summary_key = (year_month, str(user_id))
+        row_index = self._get_summary_row_index().get(summary_key)
         
         if row_index:
             range_name = f'Monthly_Summary!A{row_index}:H{row_index}'
             body = {'values': [summary_data]}
             
-            self.sheet.values().update(
+            self._execute(self.sheet.values().update(
                 spreadsheetId=self.spreadsheet_id,
                 range=range_name,
                 valueInputOption='USER_ENTERED',
                 body=body
-            ).execute()
+            ), 'Monthly_Summary!A#:H#')
         else:
             body = {'values': [summary_data]}
             
-            self.sheet.values().append(
+            result = self._execute(self.sheet.values().append(
                 spreadsheetId=self.spreadsheet_id,
                 range='Monthly_Summary!A:H',
                 valueInputOption='USER_ENTERED',
                 body=body
-            ).execute()
+            ), 'Monthly_Summary!A:H')
+            
+            # Simpan posisi baris baru supaya update berikutnya tanpa read
+            updated_range = result.get('updates', {}).get('updatedRange', '')
+            match = re.search(r'![A-Z]+(\d+)', updated_range)
+            with self._lock:
+                if not match:
+                    self._drop_row_index('_summary_rows')
+                elif self._summary_rows is not None:
+                    self._summary_rows[summary_key] = int(match.group(1))
         
         return summary_data
     
+    def _get_analytics_row_index(self):
+        """(user_id, metric) -> nomor baris Analytics (dibaca sekali saja)"""
+        return self._load_row_index('_analytics_rows', 'Analytics!A2:B', lambda row: (str(row[0]), row[1]))
+    
+    @_background
     def update_analytics(self, user_id):
-        """Update analytics metrics"""
+        """Hitung metric Analytics dari agregat berjalan lalu tulis ke sheet"""
         current_month = datetime.now().strftime('%Y-%m')
+        last_month = (datetime.now().replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
         
-        result = self.sheet.values().get(
-            spreadsheetId=self.spreadsheet_id,
-            range='Transactions!A2:I'
-        ).execute()
-        
-        rows = result.get('values', [])
-        
-        current_month_txs = []
-        all_user_txs = []
+        # Hanya partisi bulan ini & bulan lalu yang disentuh
+        index, last_index = self._get_transaction_index(current_month), self._get_transaction_index(last_month)
+        with self._lock:
+            totals = index.get_month_totals(user_id, current_month)
+            last_month_totals = last_index.get_month_totals(user_id, last_month)
         
-        for row in rows:
-            if len(row) >= 7 and str(row[2]) == str(user_id):
-                all_user_txs.append(row)
-                
-                tx_month = self._parse_date(row[1]).strftime('%Y-%m')
-                if tx_month == current_month:
-                    current_month_txs.append(row)
-        
-        if not current_month_txs:
+        if not totals['count']:
             return
         
-        days_passed = datetime.now().day
-        
-        total_expense = sum([self._safe_float(row[4]) for row in current_month_txs if row[3] == 'expense'])
-        total_income = sum([self._safe_float(row[4]) for row in current_month_txs if row[3] == 'income'])
-        total_saving = sum([self._safe_float(row[4]) for row in current_month_txs if row[3] == 'saving'])
-        
-        avg_daily_expense = total_expense / days_passed if days_passed > 0 else 0
-        avg_daily_income = total_income / days_passed if days_passed > 0 else 0
-        total_transactions = len(current_month_txs)
-        savings_rate = (total_saving / total_income * 100) if total_income > 0 else 0
-        
-        category_expenses = {}
-        for row in current_month_txs:
-            if row[3] == 'expense':
-                cat = row[5]
-                category_expenses[cat] = category_expenses.get(cat, 0) + self._safe_float(row[4])
-        
-        top_category = max(category_expenses, key=category_expenses.get) if category_expenses else '-'
-        
-        last_tx_date = max([self._parse_date(row[1]) for row in current_month_txs])
+        self._ensure_categories()
+        budget_alert_count = self._budget.alert_count(totals['category_expenses'])
         
-        last_month = (datetime.now().replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
-        last_month_expense = sum([
-            self._safe_float(row[4]) 
-            for row in all_user_txs 
-            if row[3] == 'expense' and self._parse_date(row[1]).strftime('%Y-%m') == last_month
-        ])
-        
-        if last_month_expense > 0:
-            trend_pct = ((total_expense - last_month_expense) / last_month_expense * 100)
-            spending_trend = f"{'+' if trend_pct > 0 else ''}{trend_pct:.1f}%"
-        else:
-            spending_trend = "N/A"
-        
-        categories = self.get_all_categories()
-        budget_alert_count = 0
-        
-        for cat in categories:
-            if cat['budget_limit'] > 0:
-                spent = category_expenses.get(cat['name'], 0)
-                if spent > cat['budget_limit']:
-                    budget_alert_count += 1
-        
-        metrics = {
-            'Avg_Daily_Expense': f"{avg_daily_expense:.0f}",
-            'Avg_Daily_Income': f"{avg_daily_income:.0f}",
-            'Total_Transactions': str(total_transactions),
-            'Savings_Rate': f"{savings_rate:.1f}%",
-            'Budget_Alert_Count': str(budget_alert_count),
-            'Spending_Trend': spending_trend,
-            'Top_Expense_Category': top_category,
-            'Last_Transaction_Date': last_tx_date.strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        analytics_result = self.sheet.values().get(
-            spreadsheetId=self.spreadsheet_id,
-            range='Analytics!A2:D'
-        ).execute()
-        
-        analytics_rows = analytics_result.get('values', [])
+        metrics = build_analytics_metrics(totals, last_month_totals, budget_alert_count)
+        return self.write_analytics(user_id, metrics)
+    
+    @_background
+    def write_analytics(self, user_id, metrics):
+        """Tulis metric Analytics user (satu batchUpdate + maksimal satu append)"""
+        analytics_rows = self._get_analytics_row_index()
         timestamp = datetime.now().isoformat()
         
+        updates = []
+        new_rows = []
+        new_keys = []
+        
         for metric_name, value in metrics.items():
-            row_index = None
-            
-            for i, row in enumerate(analytics_rows):
-                if len(row) >= 2 and str(row[0]) == str(user_id) and row[1] == metric_name:
-                    row_index = i + 2
-                    break
-            
             metric_data = [user_id, metric_name, value, timestamp]
+            row_index = analytics_rows.get((str(user_id), metric_name))
             
             if row_index:
-                range_name = f'Analytics!A{row_index}:D{row_index}'
-                body = {'values': [metric_data]}
-                
-                self.sheet.values().update(
-                    spreadsheetId=self.spreadsheet_id,
-                    range=range_name,
-                    valueInputOption='USER_ENTERED',
-                    body=body
-                ).execute()
+                updates.append({
+                    'range': f'Analytics!A{row_index}:D{row_index}',
+                    'values': [metric_data]
+                })
             else:
-                body = {'values': [metric_data]}
-                
-                self.sheet.values().append(
-                    spreadsheetId=self.spreadsheet_id,
-                    range='Analytics!A:D',
-                    valueInputOption='USER_ENTERED',
-                    body=body
-                ).execute()
+                new_rows.append(metric_data)
+                new_keys.append((str(user_id), metric_name))
+        
+        if updates:
+            self._execute(self.sheet.values().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={'valueInputOption': 'USER_ENTERED', 'data': updates}
+            ), 'Analytics!A:D')
+        
+        if new_rows:
+            result = self._execute(self.sheet.values().append(
+                spreadsheetId=self.spreadsheet_id,
+                range='Analytics!A:D',
+                valueInputOption='USER_ENTERED',
+                body={'values': new_rows}
+            ), 'Analytics!A:D')
+            
+            # Catat posisi baris baru: updatedRange contoh "Analytics!A10:D13"
+            updated_range = result.get('updates', {}).get('updatedRange', '')
+            match = re.search(r'![A-Z]+(\d+)', updated_range)
+            with self._lock:
+                if not match:
+                    self._drop_row_index('_analytics_rows')
+                elif self._analytics_rows is not None:
+                    first_row = int(match.group(1))
+                    for offset, key in enumerate(new_keys):
+                        self._analytics_rows[key] = first_row + offset
+        
+        return metrics
+
+    def get_user_metrics(self, user_id):
+        """Ambil metrics Analytics milik user: {metric_name: value}"""
+        # Last_Updated (kolom D) tidak dipakai; Value tetap FORMATTED supaya "12.5%" tampil apa adanya
+        result = self._execute(self.sheet.values().get(
+            spreadsheetId=self.spreadsheet_id,
+            range='Analytics!A2:C'
+        ), 'Analytics!A2:C')
+        
+        metrics = {}
+        for row in result.get('values', []):
+            if len(row) >= 3 and str(row[0]) == str(user_id):
+                metrics[row[1]] = row[2]
         
         return metrics
 
@@ -457,29 +1046,28 @@ class SheetsManager:
             categories = self.get_all_categories()
             id_to_name = {cat['id']: cat['name'] for cat in categories}
 
-            result = self.sheet.values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range='Transactions!F2:G'  # F=Category, G=Description
-            ).execute()
-            
-            rows = result.get('values', [])
+            pairs = []
+            for mirror in self._all_mirrors():
+                self._sync_transactions(mirror)
+                with self._lock:
+                    pairs.extend(mirror.index.training_pairs())
             training_data = []
             
-            for row in rows:
-                if len(row) >= 2:
-                    category = row[0].strip()
-                    description = row[1].strip()
-                    
-                    if category and description:
-                        # Translate ID to Name if exists
-                        if category in id_to_name:
-                            category = id_to_name[category]
-
-                        training_data.append({
-                            'description': description,
-                            'category': category
-                        })
-            
+            for description, category in pairs:
+                # F=Category, G=Description
+                category = str(category).strip()
+                description = str(description).strip()
+
+                if category and description:
+                    # Translate ID to Name if exists
+                    if category in id_to_name:
+                        category = id_to_name[category]
+
+                    training_data.append({
+                        'description': description,
+                        'category': category
+                    })
+
             
             return training_data
         except Exception as e:
@@ -490,10 +1078,10 @@ class SheetsManager:
         """Update budget limit for a specific category"""
         try:
             # 1. Find category row
-            result = self.sheet.values().get(
+            result = self._execute(self.sheet.values().get(
                 spreadsheetId=self.spreadsheet_id,
                 range='Categories!B2:B' # Column B is Category Name
-            ).execute()
+            ), 'Categories!B2:B')
             
             rows = result.get('values', [])
             row_index = -1
@@ -510,12 +1098,17 @@ class SheetsManager:
             range_name = f'Categories!E{row_index}'
             body = {'values': [[new_limit]]}
             
-            self.sheet.values().update(
+            self._execute(self.sheet.values().update(
                 spreadsheetId=self.spreadsheet_id,
                 range=range_name,
                 valueInputOption='USER_ENTERED',
                 body=body
-            ).execute()
+            ), 'Categories!E#')
+            
+            # Budget limit berubah -> cache Categories tidak valid lagi,
+            # limit di budget engine langsung dipakai tanpa menunggu reload
+            self.invalidate_categories()
+            self._budget.set_limit(rows[row_index - 2][0], new_limit)
             
             return True, f"Budget {category_name} berhasil diubah jadi Rp {new_limit:,}"
         except Exception as e:
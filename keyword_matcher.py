@@ -0,0 +1,172 @@
+import os
+from collections import deque
+
+BOUNDARY_MODES = ('none', 'prefix', 'word')
+RESOLUTION_MODES = ('longest', 'weighted')
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern keyword matcher (Aho-Corasick).
+    Semua keyword dicari dalam satu kali jalan atas deskripsi, jadi biayanya
+    O(panjang deskripsi + jumlah match), tidak tergantung banyaknya keyword.
+
+    boundary:
+        'none'   -> substring biasa (perilaku lama `keyword in description`)
+        'prefix' -> keyword harus mulai di awal kata ("makan" cocok di "makanan",
+                    tapi "es" tidak cocok di "bensin")
+        'word'   -> keyword harus satu kata/frasa utuh
+    resolution:
+        'longest'  -> keyword terpanjang menang (seri: kata utuh, lalu posisi paling awal)
+        'weighted' -> skor per kategori = jumlah weight * panjang keyword yang cocok
+                      (separuh jika bukan kata utuh)
+    """
+
+    def __init__(self, keywords, boundary='prefix', resolution='longest'):
+        """
+        keywords: iterable of (keyword, category) atau (keyword, category, weight)
+        """
+        if boundary not in BOUNDARY_MODES:
+            raise ValueError(f"boundary harus salah satu dari {BOUNDARY_MODES}")
+        if resolution not in RESOLUTION_MODES:
+            raise ValueError(f"resolution harus salah satu dari {RESOLUTION_MODES}")
+
+        self.boundary = boundary
+        self.resolution = resolution
+
+        # Trie: goto[state] = {char: next_state}, out[state] = [pattern_id, ...]
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._patterns = []  # (keyword, category, weight)
+
+        seen = set()
+        for item in keywords:
+            keyword, category = item[0], item[1]
+            weight = item[2] if len(item) > 2 else 1.0
+
+            keyword = keyword.strip().lower()
+            # Keyword kosong (mis. sel Keywords kosong / "a,,b") akan cocok di mana saja
+            if not keyword or keyword in seen:
+                continue
+            seen.add(keyword)
+            self._add_pattern(keyword, category, weight)
+
+        self._build_failure_links()
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def _add_pattern(self, keyword, category, weight):
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+
+        self._out[state].append(len(self._patterns))
+        self._patterns.append((keyword, category, float(weight)))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+
+                self._out[next_state].extend(self._out[self._fail[next_state]])
+
+    def find_all(self, text):
+        """
+        Semua keyword yang cocok dalam text (lowercase) sesuai aturan boundary.
+        Yields: (start, end, keyword, category, weight, whole_word)
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        text_len = len(text)
+        state = 0
+
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for pattern_id in out[state]:
+                keyword, category, weight = self._patterns[pattern_id]
+                start, end = i - len(keyword) + 1, i + 1
+
+                starts_word = start == 0 or not text[start - 1].isalnum()
+                ends_word = end == text_len or not text[end].isalnum()
+
+                if self.boundary == 'prefix' and not starts_word:
+                    continue
+                if self.boundary == 'word' and not (starts_word and ends_word):
+                    continue
+
+                yield start, end, keyword, category, weight, starts_word and ends_word
+
+    def match(self, text):
+        """
+        Kategori terbaik untuk text.
+        Returns: (category, keyword) atau (None, None) jika tidak ada yang cocok
+        """
+        text = text.lower()
+
+        if self.resolution == 'weighted':
+            scores = {}
+            best_keyword = {}
+            for _, _, keyword, category, weight, whole_word in self.find_all(text):
+                score = weight * len(keyword) * (1.0 if whole_word else 0.5)
+                scores[category] = scores.get(category, 0.0) + score
+                if len(keyword) > len(best_keyword.get(category, '')):
+                    best_keyword[category] = keyword
+
+            if not scores:
+                return None, None
+            # max() mengambil yang pertama jika seri -> kategori yang muncul duluan
+            category = max(scores, key=scores.get)
+            return category, best_keyword[category]
+
+        best = None
+        best_rank = None
+        for start, _, keyword, category, _, whole_word in self.find_all(text):
+            rank = (len(keyword), whole_word, -start)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = (category, keyword), rank
+
+        return best if best else (None, None)
+
+    def match_many(self, texts):
+        """Batch API: [(category, keyword), ...] untuk banyak deskripsi sekaligus"""
+        return [self.match(text) for text in texts]
+
+
+def compile_category_keywords(categories):
+    """
+    Keyword map + matcher dari list kategori (dict dengan 'name' & 'keywords').
+    Returns: (keywords_map {keyword: [nama kategori, ...]}, KeywordMatcher)
+    """
+    keywords_map = {}
+    for cat in categories:
+        for keyword in cat['keywords']:
+            if keyword not in keywords_map:
+                keywords_map[keyword] = []
+            keywords_map[keyword].append(cat['name'])
+
+    # Matcher Aho-Corasick atas (keyword, kategori pertama), siap dipakai simple_categorize
+    matcher = KeywordMatcher(
+        [(keyword, names[0]) for keyword, names in keywords_map.items()],
+        boundary=os.getenv('KEYWORD_MATCH_BOUNDARY', 'prefix'),
+        resolution=os.getenv('KEYWORD_MATCH_MODE', 'longest')
+    )
+    return keywords_map, matcher
@@ -0,0 +1,218 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Latency berjalan: count/sum/max sejak start + window sampel terakhir untuk p50/p95/p99"""
+
+    def __init__(self, window=1024):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentiles(self, quantiles=QUANTILES):
+        if not self.samples:
+            return {q: 0.0 for q in quantiles}
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {q: ordered[min(last, int(round(q * last)))] for q in quantiles}
+
+
+class Metrics:
+    """
+    Registry metric ringan (tanpa dependency): histogram latency + counter, dengan label.
+
+    Contoh:
+        with metrics.timer('sheets_request_seconds', op='get', range='Transactions!A:I'):
+            result = request.execute()
+        metrics.inc('sheets_response_bytes_total', len(content), range='Transactions!A:I')
+
+        @metrics.timed('handler_seconds')
+        async def monthly_report(update, context): ...
+    """
+
+    def __init__(self, window=None):
+        self.window = int(window or os.getenv('METRICS_WINDOW', 1024))
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> float
+        self._dump_thread = None
+        self._dump_stop = threading.Event()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.window)
+            histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Ukur durasi blok (detik); exception tetap diteruskan dan dihitung di <name>_errors_total"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc(name.replace('_seconds', '') + '_errors_total', **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """Decorator timer untuk fungsi sync maupun async; label 'func' = nama fungsi"""
+        def decorator(fn):
+            fn_labels = dict(labels, func=fn.__name__)
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(name, **fn_labels):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **fn_labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """Salinan semua metric: {'histograms': [...], 'counters': [...]}"""
+        with self._lock:
+            histograms = [
+                {
+                    'name': name, 'labels': dict(labels), 'count': h.count, 'sum': h.total,
+                    'max': h.max, 'quantiles': h.percentiles()
+                }
+                for (name, labels), h in self._histograms.items()
+            ]
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in self._counters.items()
+            ]
+        return {'histograms': histograms, 'counters': counters}
+
+    # ==================== OUTPUT ====================
+
+    @staticmethod
+    def _format_labels(labels, **extra):
+        items = list(labels.items()) + list(extra.items())
+        if not items:
+            return ''
+        body = ','.join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in items)
+        return '{' + body + '}'
+
+    def render_text(self):
+        """Format teks ala Prometheus exposition (summary + counter)"""
+        snapshot = self.snapshot()
+        lines = []
+        seen_types = set()
+
+        for h in sorted(snapshot['histograms'], key=lambda h: (h['name'], sorted(h['labels'].items()))):
+            if h['name'] not in seen_types:
+                lines.append(f"# TYPE {h['name']} summary")
+                seen_types.add(h['name'])
+            for q, value in h['quantiles'].items():
+                lines.append(f"{h['name']}{self._format_labels(h['labels'], quantile=q)} {value:.6f}")
+            lines.append(f"{h['name']}_sum{self._format_labels(h['labels'])} {h['sum']:.6f}")
+            lines.append(f"{h['name']}_count{self._format_labels(h['labels'])} {h['count']}")
+
+        for c in sorted(snapshot['counters'], key=lambda c: (c['name'], sorted(c['labels'].items()))):
+            if c['name'] not in seen_types:
+                lines.append(f"# TYPE {c['name']} counter")
+                seen_types.add(c['name'])
+            lines.append(f"{c['name']}{self._format_labels(c['labels'])} {c['value']:g}")
+
+        return '\n'.join(lines) + '\n'
+
+    def report(self, limit=15):
+        """Ringkasan singkat untuk chat: histogram dengan total waktu terbesar + counter bytes/error"""
+        snapshot = self.snapshot()
+        uptime = int(time.time() - self.started_at)
+        lines = [f"⏱️ Uptime metric: {uptime // 3600}j {uptime % 3600 // 60}m"]
+
+        histograms = sorted(snapshot['histograms'], key=lambda h: h['sum'], reverse=True)
+        for h in histograms[:limit]:
+            label = ' '.join(str(v) for v in h['labels'].values())
+            q = h['quantiles']
+            lines.append(
+                f"• {h['name']} {label}: n={h['count']} "
+                f"p50={q[0.5] * 1000:.0f}ms p95={q[0.95] * 1000:.0f}ms p99={q[0.99] * 1000:.0f}ms"
+            )
+
+        counters = sorted(snapshot['counters'], key=lambda c: c['value'], reverse=True)
+        for c in counters[:limit]:
+            label = ' '.join(str(v) for v in c['labels'].values())
+            value = c['value']
+            if c['name'].endswith('_bytes_total'):
+                lines.append(f"• {c['name']} {label}: {value / 1024:.1f} KB")
+            else:
+                lines.append(f"• {c['name']} {label}: {value:g}")
+
+        return '\n'.join(lines)
+
+    def dump(self, path):
+        """Tulis render_text() ke file (atomic replace)"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_text())
+        os.replace(tmp_path, path)
+
+    def start_dump(self, path, interval=60.0):
+        """Dump metric ke file setiap `interval` detik di background thread"""
+        if self._dump_thread and self._dump_thread.is_alive():
+            return
+
+        def run():
+            while not self._dump_stop.wait(interval):
+                try:
+                    self.dump(path)
+                except Exception as e:
+                    print(f"⚠️ Gagal menulis metrics ke {path}: {e}")
+
+        self._dump_stop.clear()
+        self._dump_thread = threading.Thread(target=run, name='metrics-dump', daemon=True)
+        self._dump_thread.start()
+
+    def stop_dump(self, path=None):
+        self._dump_stop.set()
+        if path:
+            self.dump(path)
+
+
+# Registry global yang dipakai semua modul
+metrics = Metrics()
@@ -1,50 +1,210 @@
-import pandas as pd
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import SGDClassifier
-from sklearn.pipeline import Pipeline
-from sklearn.calibration import CalibratedClassifierCV
 import pickle
+import hashlib
 import os
+import re
+import threading
+from collections import OrderedDict
+from metrics import metrics
+
+# pandas/numpy/sklearn di-import di dalam method (lazy): import sklearn saja butuh
+# ~1 detik, padahal bot sudah bisa melayani command sebelum model siap.
+
+# Naikkan jika struktur pipeline berubah supaya artifact lama tidak dipakai
+MODEL_VERSION = 2
 
 class TransactionClassifier:
-    def __init__(self):
+    def __init__(self, model_path=None, memo_size=1024, memo_refresh=None):
         self.model = None
         self.is_trained = False
         self.min_samples = 5  # Minimum samples to trigger training
+        self.model_path = model_path or os.getenv('MODEL_PATH', 'model_cache.pkl')
+        self.fingerprint = None
+        self.epochs = 10  # Jumlah pass partial_fit saat training penuh
+        self.online_updates = 0
+        
+        # Memo LRU prediksi per deskripsi ternormalisasi ("makan siang", "bensin" sering berulang).
+        # Satu update online hanya menggeser bobot sedikit, jadi memo tidak dikosongkan tiap learn():
+        # entri deskripsi yang dipelajari langsung dibuang, sisanya baru dibuang setiap
+        # memo_refresh update online (sampai saat itu prediksi lain boleh sedikit basi).
+        self.memo_size = memo_size
+        self.memo_refresh = int(memo_refresh or os.getenv('MODEL_MEMO_REFRESH', 20))
+        self._memo = OrderedDict()
+        
+        # partial_fit (learn dari event loop) tidak boleh berjalan bersamaan dengan
+        # predict_proba (worker import) atau pergantian model (warm-up / retrain)
+        self._lock = threading.RLock()
+    
+    @staticmethod
+    def normalize(description):
+        """Normalisasi deskripsi untuk key memo: lowercase + spasi dirapikan"""
+        return re.sub(r'\s+', ' ', str(description).strip().lower())
+    
+    @staticmethod
+    def compute_fingerprint(transactions, categories=None):
+        """Sidik data training: jumlah baris + hash isi (description, category) + daftar kelas"""
+        digest = hashlib.sha256()
+        for category in sorted(categories or []):
+            digest.update(category.encode('utf-8'))
+            digest.update(b'\x1d')
+        for tx in transactions:
+            digest.update(tx['description'].encode('utf-8'))
+            digest.update(b'\x1f')
+            digest.update(tx['category'].encode('utf-8'))
+            digest.update(b'\x1e')
+        return f"{len(transactions)}:{digest.hexdigest()}"
+    
+    def save(self, path=None):
+        """Simpan pipeline yang sudah di-fit ke disk (atomic replace)"""
+        if not self.is_trained:
+            return False
+        
+        import sklearn
+        
+        path = path or self.model_path
+        artifact = {
+            'version': MODEL_VERSION,
+            'sklearn_version': sklearn.__version__,
+            'fingerprint': self.fingerprint,
+            'model': self.model
+        }
         
-    def train(self, transactions):
+        try:
+            tmp_path = path + '.tmp'
+            with self._lock, open(tmp_path, 'wb') as f:
+                pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            print(f"❌ Error saving model: {e}")
+            return False
+    
+    def load(self, path=None, expected_fingerprint=None):
+        """
+        Load pipeline dari disk.
+        Ditolak jika versi/sklearn berbeda atau fingerprint tidak sama dengan data sekarang.
+        """
+        path = path or self.model_path
+        if not os.path.exists(path):
+            return False
+        
+        import sklearn
+        
+        try:
+            with open(path, 'rb') as f:
+                artifact = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Model artifact tidak bisa dibaca: {e}")
+            return False
+        
+        if (artifact.get('version') != MODEL_VERSION or
+                artifact.get('sklearn_version') != sklearn.__version__):
+            return False
+        if expected_fingerprint is not None and artifact.get('fingerprint') != expected_fingerprint:
+            return False
+        
+        with self._lock:
+            self.model = artifact['model']
+            self.fingerprint = artifact.get('fingerprint')
+            self.is_trained = True
+            self._memo.clear()
+        return True
+    
+    def train_or_load(self, transactions, categories=None):
+        """Pakai artifact di disk jika data training tidak berubah, selain itu train ulang + simpan"""
+        fingerprint = self.compute_fingerprint(transactions or [], categories)
+        
+        if self.load(expected_fingerprint=fingerprint):
+            print(f"🧠 AI Model loaded from {self.model_path} ({len(transactions)} transactions).")
+            return True
+        
+        if not self.train(transactions, categories):
+            return False
+        
+        self.fingerprint = fingerprint
+        self.save()
+        return True
+        
+    @metrics.timed('classifier_seconds')
+    def train(self, transactions, categories=None):
         """
         Train parameters:
         transactions: list of dicts with 'description' and 'category' keys
+        categories: opsional, nama kategori lain yang harus bisa dipelajari online
+                    walaupun belum ada di data training (mis. pilihan "Ganti Kategori")
         """
         if not transactions or len(transactions) < self.min_samples:
             print("⚠️ Not enough data to train AI model.")
             return False
             
-        df = pd.DataFrame(transactions)
+        import numpy as np
+        import pandas as pd
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.pipeline import Pipeline
         
-        # Pipeline with Calibration to get probabilities
-        sgd = SGDClassifier(loss='hinge', penalty='l2', alpha=1e-3, random_state=42, max_iter=5, tol=None)
-        calibrated_clf = CalibratedClassifierCV(sgd, method='sigmoid', cv='prefit') 
-        # Note: cv='prefit' is WRONG if we haven't fit sgd yet. 
-        # Actually CalibratedClassifierCV(cv=2) handles internal splitting.
+        df = pd.DataFrame(transactions)
         
-        # Better approach for small data: Use SGD with 'log_loss' (Logistic Regression equivalent)
-        self.model = Pipeline([
-            ('tfidf', TfidfVectorizer(ngram_range=(1, 2), min_df=1)),
-            ('clf', SGDClassifier(loss='log_loss', penalty='l2', alpha=1e-3, random_state=42, max_iter=10, tol=None))
+        # HashingVectorizer tidak punya vocabulary (stateless), jadi model bisa terus
+        # di-update dengan partial_fit tanpa pernah fit ulang di seluruh history.
+        # SGD dengan 'log_loss' (Logistic Regression equivalent) untuk probabilitas.
+        # Pipeline baru baru dipasang ke self.model setelah selesai di-fit, supaya
+        # predict() dari thread lain tidak pernah melihat model setengah jadi.
+        model = Pipeline([
+            ('hash', HashingVectorizer(ngram_range=(1, 2), n_features=2**18, alternate_sign=False)),
+            ('clf', SGDClassifier(loss='log_loss', penalty='l2', alpha=1e-3, random_state=42))
         ])
         
         try:
-            self.model.fit(df['description'], df['category'])
-            self.is_trained = True
+            classes = np.array(sorted(set(df['category']) | set(categories or [])))
+            X = model.named_steps['hash'].transform(df['description'])
+            y = df['category'].to_numpy()
+            clf = model.named_steps['clf']
+            
+            rng = np.random.RandomState(42)
+            for _ in range(self.epochs):
+                order = rng.permutation(len(y))
+                clf.partial_fit(X[order], y[order], classes=classes)
+            
+            with self._lock:
+                self.model = model
+                self.is_trained = True
+                self.online_updates = 0
+                self._memo.clear()
             print(f"🧠 AI Model trained on {len(df)} transactions.")
             return True
         except Exception as e:
             print(f"❌ Error training model: {e}")
             return False
 
+    @metrics.timed('classifier_seconds')
+    def learn(self, description, category, weight=1.0):
+        """
+        Update model dengan satu contoh terkonfirmasi (O(1), tanpa retrain penuh).
+        weight > 1 untuk koreksi manual user supaya efeknya lebih terasa.
+        """
+        with self._lock:
+            if not self.is_trained or not self.model:
+                return False
+            
+            clf = self.model.named_steps['clf']
+            if category not in clf.classes_:
+                # SGD tidak bisa menambah kelas baru secara online; tunggu retrain berikutnya
+                print(f"⚠️ Kategori '{category}' belum dikenal model, dilewati.")
+                return False
+            
+            try:
+                X = self.model.named_steps['hash'].transform([description])
+                clf.partial_fit(X, [category], sample_weight=[weight])
+                self.online_updates += 1
+                # Prediksi deskripsi ini yang paling mungkin berubah (mis. hasil koreksi user)
+                self._memo.pop(self.normalize(description), None)
+                if self.online_updates % self.memo_refresh == 0:
+                    self._memo.clear()
+                return True
+            except Exception as e:
+                print(f"❌ Error updating model: {e}")
+                return False
+
     def predict(self, description):
         """
         Predict category for a description.
@@ -52,13 +212,49 @@ class TransactionClassifier:
         """
         if not self.is_trained or not self.model:
             return None, 0.0
+        
+        key = self.normalize(description)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                self._memo.move_to_end(key)
+                metrics.inc('classifier_memo_total', result='hit')
+                return cached
+            metrics.inc('classifier_memo_total', result='miss')
             
-        try:
-            # Get probability
-            probs = self.model.predict_proba([description])[0]
-            max_prob = np.max(probs)
-            prediction = self.model.classes_[np.argmax(probs)]
-            
-            return prediction, max_prob
-        except Exception:
-            return None, 0.0
+            result = self.predict_many([key])[0]
+            if result[0] is not None:
+                self._memo[key] = result
+                if len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+        
+        return result
+
+    @metrics.timed('classifier_seconds')
+    def predict_many(self, descriptions):
+        """
+        Batch prediction: satu transform sparse + satu predict_proba untuk semua deskripsi.
+        Returns: list of (category, confidence), sejajar dengan descriptions
+        """
+        descriptions = list(descriptions)
+        if not descriptions:
+            return []
+        if not self.is_trained or not self.model:
+            return [(None, 0.0)] * len(descriptions)
+        
+        import numpy as np
+        
+        normalized = [self.normalize(d) for d in descriptions]
+        with self._lock:
+            model = self.model
+            try:
+                probs = model.predict_proba(normalized)
+            except Exception as e:
+                print(f"❌ Error predicting categories: {e}")
+                return [(None, 0.0)] * len(descriptions)
+        
+        best = np.argmax(probs, axis=1)
+        confidences = probs[np.arange(len(best)), best]
+        categories = model.classes_[best]
+        
+        return [(str(category), float(confidence)) for category, confidence in zip(categories, confidences)]
@@ -0,0 +1,47 @@
+"""
+Migrasi / compaction tab Transactions ke partisi bulanan (Transactions_YYYY_MM).
+
+Jalankan sekali sebelum mengaktifkan TX_PARTITIONING=monthly, lalu boleh diulang
+kapan saja untuk memindahkan baris yang masih masuk ke tab lama (baris yang sudah
+ada di partisi dilewati, jadi tidak dobel). --clear-legacy hanya mengosongkan baris
+yang sudah dibaca, jadi transaksi yang masuk selama migrasi tetap di tab lama dan
+ikut dipindah di run berikutnya; aman dijalankan saat bot hidup.
+
+Usage:
+    python partition_transactions.py                  # salin ke partisi, tab lama dibiarkan
+    python partition_transactions.py --clear-legacy   # salin lalu kosongkan tab lama
+"""
+import argparse
+import os
+
+from dotenv import load_dotenv
+
+from google_sheets_handler import SheetsManager
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Pecah tab Transactions menjadi partisi bulanan')
+    parser.add_argument('--clear-legacy', action='store_true',
+                        help='kosongkan tab Transactions setelah dipindah (baris tanggal invalid tetap)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='baris per request append')
+    args = parser.parse_args()
+
+    sheet_id = os.getenv('GOOGLE_SHEET_ID')
+    if not sheet_id:
+        print("❌ GOOGLE_SHEET_ID belum di-set di .env")
+        return
+
+    sheets = SheetsManager(sheet_id, partitioned=True)
+    report = sheets.migrate_to_partitions(clear_legacy=args.clear_legacy, batch_size=args.batch_size)
+
+    print(f"✅ {sum(report['moved'].values())} baris dipindah ke {len(report['moved'])} partisi")
+    if report['duplicates']:
+        print(f"↩️ {report['duplicates']} baris sudah ada di partisi (dilewati)")
+    if report['skipped']:
+        print(f"⚠️ {report['skipped']} baris tanggalnya tidak valid, tetap di tab Transactions")
+
+
+if __name__ == '__main__':
+    main()
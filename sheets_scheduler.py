@@ -0,0 +1,203 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from googleapiclient.errors import HttpError
+
+from metrics import metrics
+
+# Prioritas request (angka kecil = dilayani duluan)
+PRIORITY_INTERACTIVE = 0   # user sedang menunggu balasan bot
+PRIORITY_BACKGROUND = 10   # Monthly_Summary, Analytics, flush write-behind
+
+# Status yang aman diulang: quota habis / server sementara bermasalah
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# append tidak idempotent: setelah 5xx baris bisa saja sudah masuk, jadi hanya 429 yang diulang
+APPEND_RETRY_STATUSES = (429,)
+
+
+class TokenBucket:
+    """Token bucket: `rate_per_minute` token per menit, maksimal `burst` token tersimpan"""
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1, rate_per_minute // 6))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_take(self):
+        """Ambil satu token; return 0 jika berhasil, selain itu detik sampai token berikutnya"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def drain(self):
+        """Kosongkan bucket (dipakai setelah 429: server bilang quota sudah habis)"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RequestScheduler:
+    """
+    Penjadwal semua execute() ke Google Sheets:
+      - token bucket per kelas quota (read / write) sesuai quota per menit Google
+      - antrian prioritas per kelas: request interaktif dilayani sebelum background
+      - retry dengan exponential backoff + jitter untuk 429/5xx (menghormati Retry-After)
+      - read identik (URI sama) yang sedang berjalan digabung jadi satu request
+
+    Hasil read yang digabung dibagi ke semua pemanggil (objek yang sama), jadi
+    pemanggil tidak boleh mengubahnya.
+    """
+
+    def __init__(self, read_per_minute=None, write_per_minute=None, max_retries=None,
+                 base_delay=1.0, max_delay=32.0):
+        read_per_minute = int(read_per_minute or os.getenv('SHEETS_READ_QUOTA', 60))
+        write_per_minute = int(write_per_minute or os.getenv('SHEETS_WRITE_QUOTA', 60))
+        self._buckets = {
+            'read': TokenBucket(read_per_minute),
+            'write': TokenBucket(write_per_minute),
+        }
+        self._waiters = {'read': [], 'write': []}  # heap (priority, seq)
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv('SHEETS_MAX_RETRIES', 5))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._inflight = {}  # (method, uri) -> Future
+        self._inflight_lock = threading.Lock()
+        self._local = threading.local()
+
+    # ==================== PRIORITAS ====================
+
+    @contextmanager
+    def priority(self, level):
+        """Semua request dari thread ini di dalam blok memakai prioritas `level`"""
+        previous = getattr(self._local, 'priority', PRIORITY_INTERACTIVE)
+        self._local.priority = level
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def current_priority(self):
+        return getattr(self._local, 'priority', PRIORITY_INTERACTIVE)
+
+    # ==================== QUOTA ====================
+
+    def _acquire(self, quota, priority):
+        """Tunggu giliran (urut prioritas, lalu FIFO) dan satu token dari bucket quota"""
+        waiters = self._waiters[quota]
+        bucket = self._buckets[quota]
+        ticket = (priority, next(self._seq))
+        start = time.perf_counter()
+
+        with self._cond:
+            heapq.heappush(waiters, ticket)
+            try:
+                while True:
+                    timeout = None
+                    if waiters[0] == ticket:
+                        timeout = bucket.try_take()
+                        if timeout == 0:
+                            heapq.heappop(waiters)
+                            break
+                    self._cond.wait(timeout)
+            except BaseException:
+                waiters.remove(ticket)
+                heapq.heapify(waiters)
+                raise
+            finally:
+                # Giliran berpindah ke antrian berikutnya
+                self._cond.notify_all()
+
+        metrics.observe('sheets_quota_wait_seconds', time.perf_counter() - start, quota=quota)
+
+    def _penalize(self, quota):
+        with self._cond:
+            self._buckets[quota].drain()
+
+    # ==================== EXECUTE ====================
+
+    @staticmethod
+    def _status(error):
+        if isinstance(error, HttpError):
+            return error.resp.status
+        return None
+
+    def _backoff_delay(self, attempt, error):
+        """Full jitter: acak 0..min(max_delay, base * 2^attempt), minimal Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = error.resp.get('retry-after') if isinstance(error, HttpError) else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    def _run(self, request, quota, operation, priority):
+        retry_statuses = APPEND_RETRY_STATUSES if operation == 'append' else RETRY_STATUSES
+        attempt = 0
+        while True:
+            self._acquire(quota, priority)
+            try:
+                return request.execute()
+            except Exception as e:
+                status = self._status(e)
+                if status not in retry_statuses or attempt >= self.max_retries:
+                    raise
+                if status == 429:
+                    self._penalize(quota)
+                delay = self._backoff_delay(attempt, e)
+                metrics.inc('sheets_retries_total', op=operation, status=status)
+                print(f"⏳ Sheets {operation} gagal ({status}), coba lagi dalam {delay:.1f} detik...")
+                time.sleep(delay)
+                attempt += 1
+
+    def execute(self, request, operation='get'):
+        """
+        Jalankan request lewat quota + retry.
+        operation: nama method API ('get', 'append', 'update', 'batchUpdate', ...)
+        """
+        quota = 'read' if operation in ('get', 'batchGet') else 'write'
+        priority = self.current_priority()
+
+        uri = getattr(request, 'uri', None)
+        if quota != 'read' or uri is None:
+            return self._run(request, quota, operation, priority)
+
+        key = (getattr(request, 'method', 'GET'), uri, getattr(request, 'body', None))
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            metrics.inc('sheets_coalesced_total', op=operation)
+            return future.result()
+
+        try:
+            result = self._run(request, quota, operation, priority)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
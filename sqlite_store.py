@@ -0,0 +1,645 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from budget_engine import BudgetEngine
+from google_sheets_handler import build_analytics_metrics, build_monthly_summary
+from keyword_matcher import KeywordMatcher, compile_category_keywords
+from metrics import metrics
+from transaction_store import ColumnParser
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,             -- 'YYYY-MM-DD HH:MM:SS' (urut = urut waktu)
+    month TEXT NOT NULL,                 -- 'YYYY-MM'
+    user_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    amount REAL NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL,
+    ai_confidence REAL NOT NULL DEFAULT 0,
+    payment_method TEXT NOT NULL DEFAULT '-',
+    replicated INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_tx_user_time ON transactions (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_tx_user_category_month ON transactions (user_id, category, month);
+CREATE INDEX IF NOT EXISTS idx_tx_unreplicated ON transactions (seq) WHERE replicated = 0;
+
+CREATE TABLE IF NOT EXISTS categories (
+    name TEXT PRIMARY KEY COLLATE NOCASE,
+    id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    icon TEXT NOT NULL DEFAULT '',
+    budget_limit REAL NOT NULL DEFAULT 0,
+    keywords TEXT NOT NULL DEFAULT '',
+    dirty INTEGER NOT NULL DEFAULT 0     -- >0: budget diubah lokal, belum dikirim ke Sheets
+);
+
+CREATE TABLE IF NOT EXISTS monthly_summary (
+    month TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    total_income REAL NOT NULL,
+    total_expense REAL NOT NULL,
+    total_saving REAL NOT NULL,
+    net_balance REAL NOT NULL,
+    top_category TEXT NOT NULL,
+    transaction_count INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    replicated_version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS analytics (
+    user_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value TEXT NOT NULL,
+    last_updated TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    replicated_version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, metric)
+);
+"""
+
+TX_COLUMNS = ('id', 'timestamp', 'user_id', 'type', 'amount', 'category', 'description',
+              'ai_confidence', 'payment_method')
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _month_bounds(year_month):
+    """'2025-01' -> ('2025-01-01 00:00:00', '2025-02-01 00:00:00')"""
+    start = datetime.strptime(year_month, '%Y-%m')
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT)
+
+
+def _parse_confidence(value):
+    """Sel AI_Confidence ('0.9', 0.9, '') -> float; bukan format Rupiah, jadi tanpa ColumnParser"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class SQLiteManager:
+    """
+    Backend penyimpanan SQLite dengan interface yang sama seperti SheetsManager.
+
+    SQLite jadi system of record sekaligus query engine: laporan, ringkasan & cek budget
+    dilayani lewat index (user_id, timestamp) dan (user_id, category, month) tanpa HTTP.
+    Google Sheets (opsional, `replica` = SheetsManager) tetap jadi tampilan untuk manusia:
+    SheetsReplicator di background mengirim transaksi baru, Monthly_Summary, Analytics
+    dan perubahan budget, serta menarik tab Categories secara berkala.
+
+    Tanpa replica semuanya berjalan offline, mis. untuk development/test:
+        store = SQLiteManager(':memory:')
+    """
+
+    def __init__(self, db_path=None, replica=None, replicate_interval=None, category_cache_ttl=None):
+        self.db_path = db_path or os.getenv('SQLITE_PATH', 'finance.db')
+        self.replica = replica
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        if self.db_path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+        self._parser = ColumnParser()
+        self._budget = BudgetEngine()
+
+        # Cache Categories dari tabel lokal (di-refresh replicator dari tab Categories)
+        self._categories = None
+        self._keywords_map = {}
+        self._keyword_matcher = KeywordMatcher([])
+
+        self._replicator = None
+        if replica is not None:
+            self._replicator = SheetsReplicator(
+                self, replica,
+                interval=float(replicate_interval or os.getenv('SQLITE_REPLICATE_INTERVAL', 10)),
+                category_ttl=float(
+                    category_cache_ttl if category_cache_ttl is not None else os.getenv('CATEGORY_CACHE_TTL', 300)
+                )
+            )
+
+    def _query(self, op, sql, params=()):
+        with self._lock, metrics.timer('sqlite_query_seconds', op=op):
+            return self._conn.execute(sql, params).fetchall()
+
+    def test_connection(self):
+        """Cek database lokal; Sheets yang tidak terhubung tidak menghentikan bot"""
+        try:
+            self._query('ping', 'SELECT 1')
+            print(f"✅ SQLite siap: {self.db_path}")
+        except sqlite3.Error as e:
+            print(f"❌ Error SQLite: {e}")
+            return False
+
+        if self.replica is not None and not self.replica.test_connection():
+            print("⚠️ Google Sheets belum terhubung, replikasi dicoba lagi di background")
+        return True
+
+    # ==================== REPLIKASI ====================
+
+    def start_write_behind(self):
+        """Import history dari Sheets jika database masih kosong, lalu jalankan replicator"""
+        if self._replicator is None:
+            return
+        if not self._query('count', 'SELECT COUNT(*) FROM transactions')[0][0]:
+            try:
+                self.import_from_replica()
+            except Exception as e:
+                print(f"⚠️ Gagal import history dari Sheets: {e}")
+        self._replicator.start()
+
+    def stop_write_behind(self):
+        """Kirim sisa perubahan ke Sheets lalu hentikan replicator"""
+        if self._replicator is not None:
+            self._replicator.stop()
+
+    def flush_transactions(self):
+        """Paksa replikasi sekarang; return jumlah transaksi yang terkirim"""
+        if self._replicator is None:
+            return 0
+        return self._replicator.run_once()['transactions']
+
+    def _normalize_rows(self, rows):
+        """Baris Transactions (A:I) -> record tabel transactions; baris bertanggal invalid dibuang"""
+        rows = [row for row in rows if len(row) >= 7]
+        dates = self._parser.parse_dates([row[1] for row in rows])
+        amounts = self._parser.parse_amounts([row[4] for row in rows])
+
+        records = []
+        for row, tx_date, amount in zip(rows, dates, amounts):
+            if tx_date is None:
+                continue
+            records.append((
+                str(row[0]), tx_date.strftime(TIMESTAMP_FORMAT), tx_date.strftime('%Y-%m'), str(row[2]),
+                row[3], amount or 0.0, row[5], row[6],
+                _parse_confidence(row[7]) if len(row) > 7 else 0.0,
+                row[8] if len(row) > 8 else '-'
+            ))
+        return records
+
+    def _insert_records(self, records, replicated, op):
+        """INSERT OR IGNORE banyak record; return jumlah yang benar-benar masuk"""
+        with self._lock, self._conn, metrics.timer('sqlite_query_seconds', op=op):
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO transactions (id, timestamp, month, user_id, type, amount, category, '
+                'description, ai_confidence, payment_method, replicated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [record + (replicated,) for record in records]
+            )
+            return self._conn.total_changes - before
+
+    def import_from_replica(self):
+        """Salin semua transaksi dari Sheets ke SQLite (ditandai sudah tereplikasi)"""
+        rows = self.replica.export_transactions()
+        records = self._normalize_rows(rows)
+        self._insert_records(records, 1, 'import')
+        print(f"📥 {len(records)} transaksi di-import dari Sheets ({len(rows) - len(records)} baris tidak valid)")
+        return len(records)
+
+    def append_transactions(self, rows, skip_existing=False):
+        """
+        Simpan banyak baris Transactions (A:I) sekaligus, mis. import CSV.
+        (ID, user_id) yang sudah ada selalu dilewati (UNIQUE), skip_existing hanya untuk
+        kompatibilitas dengan SheetsManager. Returns: jumlah baris yang ditulis
+        """
+        return self._insert_records(self._normalize_rows(rows), 0, 'append')
+
+    def _pending_transactions(self, limit):
+        """[(seq, row A:I)] transaksi yang belum dikirim ke Sheets"""
+        rows = self._query(
+            'pending',
+            f'SELECT seq, {", ".join(TX_COLUMNS)} FROM transactions WHERE replicated = 0 ORDER BY seq LIMIT ?',
+            (limit,)
+        )
+        return [(row[0], list(row[1:])) for row in rows]
+
+    def _mark_replicated(self, seqs):
+        with self._lock, self._conn:
+            self._conn.executemany('UPDATE transactions SET replicated = 1 WHERE seq = ?', [(s,) for s in seqs])
+
+    # ==================== TRANSAKSI ====================
+
+    def add_transaction(self, transaction):
+        """Simpan transaksi ke SQLite (durable saat return); replikasi ke Sheets di background"""
+        tx_date = self._parser.parse_date(transaction['timestamp']) or datetime.now()
+        year_month = tx_date.strftime('%Y-%m')
+        user_id = str(transaction['user_id'])
+
+        # Status budget dihitung sebelum baris masuk (butuh total sebelum & sesudah)
+        budget = None
+        if transaction['type'] == 'expense':
+            self._ensure_categories()
+            spent_before = self._category_spent(user_id, year_month, transaction['category'])
+            spent = spent_before + float(transaction['amount'])
+            budget = self._budget.status(transaction['category'], spent, spent_before)
+
+        with self._lock, self._conn, metrics.timer('sqlite_query_seconds', op='insert'):
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO transactions (id, timestamp, month, user_id, type, amount, category, '
+                'description, ai_confidence, payment_method) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    str(transaction['id']), tx_date.strftime(TIMESTAMP_FORMAT), year_month, user_id,
+                    transaction['type'], float(transaction['amount']), transaction['category'],
+                    transaction['description'], float(transaction.get('ai_confidence', 0) or 0),
+                    transaction.get('payment_method', '-')
+                )
+            )
+
+        return {'stored': cursor.rowcount == 1, 'budget': budget}
+
+    def _category_spent(self, user_id, year_month, category):
+        rows = self._query(
+            'category_spent',
+            "SELECT COALESCE(SUM(amount), 0) FROM transactions "
+            "WHERE user_id = ? AND category = ? AND month = ? AND type = 'expense'",
+            (str(user_id), category, year_month)
+        )
+        return rows[0][0]
+
+    def _select_range(self, op, user_id, start, end):
+        return self._query(
+            op,
+            'SELECT id, timestamp, type, amount, category, description FROM transactions '
+            'WHERE user_id = ? AND timestamp >= ? AND timestamp < ? ORDER BY timestamp, seq',
+            (str(user_id), start, end)
+        )
+
+    def _day_rows(self, user_id, date):
+        start = datetime(date.year, date.month, date.day)
+        return self._select_range('day', user_id, start.strftime(TIMESTAMP_FORMAT),
+                                  (start + timedelta(days=1)).strftime(TIMESTAMP_FORMAT))
+
+    def _month_rows(self, user_id, year_month):
+        return self._select_range('month', user_id, *_month_bounds(year_month))
+
+    @staticmethod
+    def _to_records(user_id, rows):
+        return [
+            {'id': tx_id, 'timestamp': timestamp, 'user_id': str(user_id), 'type': tx_type,
+             'amount': amount, 'category': category, 'description': description}
+            for tx_id, timestamp, tx_type, amount, category, description in rows
+        ]
+
+    @staticmethod
+    def _frame(rows):
+        if not rows:
+            return None
+
+        import pandas as pd
+        df = pd.DataFrame(rows, columns=['id', 'timestamp', 'type', 'amount', 'category', 'description'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format=TIMESTAMP_FORMAT)
+        return df
+
+    def get_transactions_by_date(self, user_id, date):
+        """Ambil transaksi berdasarkan tanggal"""
+        return self._to_records(user_id, self._day_rows(user_id, date))
+
+    def get_transactions_by_month(self, user_id, year_month):
+        """Ambil transaksi berdasarkan bulan (format: 2025-01)"""
+        return self._to_records(user_id, self._month_rows(user_id, year_month))
+
+    def get_day_frame(self, user_id, date):
+        """DataFrame transaksi satu tanggal (None jika kosong)"""
+        return self._frame(self._day_rows(user_id, date))
+
+    def get_month_frame(self, user_id, year_month):
+        """DataFrame transaksi satu bulan (None jika kosong)"""
+        return self._frame(self._month_rows(user_id, year_month))
+
+    def get_month_totals(self, user_id, year_month):
+        """Agregat bulan dengan format yang sama seperti TransactionIndex.get_month_totals"""
+        rows = self._query(
+            'month_totals',
+            'SELECT type, category, SUM(amount), COUNT(*), MAX(timestamp) FROM transactions '
+            'WHERE user_id = ? AND timestamp >= ? AND timestamp < ? GROUP BY type, category',
+            (str(user_id), *_month_bounds(year_month))
+        )
+
+        totals = {'income': 0, 'expense': 0, 'saving': 0, 'count': 0, 'category_expenses': {}, 'last_date': None}
+        for tx_type, category, amount, count, last_timestamp in rows:
+            totals['count'] += count
+            last_date = datetime.strptime(last_timestamp, TIMESTAMP_FORMAT)
+            if totals['last_date'] is None or last_date > totals['last_date']:
+                totals['last_date'] = last_date
+            if tx_type in ('income', 'expense', 'saving'):
+                totals[tx_type] += amount
+            if tx_type == 'expense':
+                totals['category_expenses'][category] = amount
+        return totals
+
+    def get_training_data(self):
+        """Ambil data deskripsi & kategori untuk training AI"""
+        try:
+            id_to_name = {cat['id']: cat['name'] for cat in self.get_all_categories()}
+            rows = self._query('training', 'SELECT description, category FROM transactions ORDER BY seq')
+
+            training_data = []
+            for description, category in rows:
+                category = str(category).strip()
+                description = str(description).strip()
+                if category and description:
+                    training_data.append({
+                        'description': description,
+                        'category': id_to_name.get(category, category)
+                    })
+            return training_data
+        except Exception as e:
+            print(f"❌ Error fetching training data: {e}")
+            return []
+
+    # ==================== CATEGORIES & BUDGET ====================
+
+    def invalidate_categories(self):
+        self._categories = None
+
+    def _ensure_categories(self):
+        """Muat Categories dari tabel lokal (tarik dari Sheets dulu jika tabel masih kosong)"""
+        if self._categories is not None:
+            return
+
+        rows = self._query('categories', 'SELECT id, name, type, icon, budget_limit, keywords FROM categories')
+        if not rows and self.replica is not None:
+            try:
+                self.merge_categories(self.replica.get_all_categories(force_refresh=True))
+            except Exception as e:
+                print(f"⚠️ Gagal mengambil Categories dari Sheets: {e}")
+            rows = self._query('categories', 'SELECT id, name, type, icon, budget_limit, keywords FROM categories')
+
+        categories = [
+            {
+                'id': cat_id, 'name': name, 'type': cat_type, 'icon': icon, 'budget_limit': budget_limit,
+                'keywords': [k.strip().lower() for k in keywords.split(',')]
+            }
+            for cat_id, name, cat_type, icon, budget_limit, keywords in rows
+        ]
+        self._keywords_map, self._keyword_matcher = compile_category_keywords(categories)
+        self._budget.set_limits(categories)
+        self._categories = categories
+
+    def merge_categories(self, categories):
+        """
+        Upsert kategori dari tab Categories. Budget yang baru diubah lokal (belum
+        terkirim ke Sheets) tidak ditimpa.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO categories (name, id, type, icon, budget_limit, keywords) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET id = excluded.id, type = excluded.type, icon = excluded.icon, '
+                'keywords = excluded.keywords, '
+                'budget_limit = CASE WHEN dirty > 0 THEN budget_limit ELSE excluded.budget_limit END',
+                [
+                    (cat['name'], cat['id'], cat['type'], cat['icon'], cat['budget_limit'], ','.join(cat['keywords']))
+                    for cat in categories
+                ]
+            )
+        self.invalidate_categories()
+
+    def get_all_categories(self, force_refresh=False):
+        if force_refresh:
+            self.invalidate_categories()
+        self._ensure_categories()
+        return self._categories
+
+    def get_keywords_mapping(self):
+        self._ensure_categories()
+        return self._keywords_map
+
+    def simple_categorize(self, description):
+        """Kategorisasi sederhana berdasarkan keyword matching"""
+        self._ensure_categories()
+
+        category, _ = self._keyword_matcher.match(description)
+        if category:
+            return category, 0.9
+        return 'Lainnya', 0.5
+
+    def simple_categorize_many(self, descriptions):
+        """Batch simple_categorize: [(category, confidence), ...]"""
+        self._ensure_categories()
+
+        return [
+            (category, 0.9) if category else ('Lainnya', 0.5)
+            for category, _ in self._keyword_matcher.match_many(descriptions)
+        ]
+
+    def get_category_budget_status(self, category_name, user_id):
+        """Cek budget status kategori untuk user tertentu (index user_id, category, month)"""
+        self._ensure_categories()
+        current_month = datetime.now().strftime('%Y-%m')
+        spent = self._category_spent(user_id, current_month, category_name)
+        return self._budget.status(category_name, spent)
+
+    def update_budget(self, category_name, new_limit):
+        """Update budget limit (lokal dulu, dikirim ke tab Categories oleh replicator)"""
+        try:
+            with self._lock, self._conn:
+                rows = self._conn.execute(
+                    'SELECT name FROM categories WHERE name = ?', (category_name,)
+                ).fetchall()
+                if not rows:
+                    return False, "Kategori tidak ditemukan."
+                self._conn.execute(
+                    'UPDATE categories SET budget_limit = ?, dirty = dirty + 1 WHERE name = ?',
+                    (new_limit, category_name)
+                )
+
+            self.invalidate_categories()
+            self._budget.set_limit(rows[0][0], new_limit)
+            return True, f"Budget {category_name} berhasil diubah jadi Rp {new_limit:,}"
+        except Exception as e:
+            print(f"Error updating budget: {e}")
+            return False, str(e)
+
+    def _dirty_budgets(self):
+        return self._query('dirty_budgets', 'SELECT name, budget_limit, dirty FROM categories WHERE dirty > 0')
+
+    def _clear_budget(self, name, dirty):
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE categories SET dirty = 0 WHERE name = ? AND dirty = ?', (name, dirty))
+
+    # ==================== SUMMARY & ANALYTICS ====================
+
+    def update_monthly_summary(self, user_id, year_month):
+        """Hitung ringkasan bulanan via SQL lalu simpan (dikirim ke Monthly_Summary oleh replicator)"""
+        summary_data = build_monthly_summary(user_id, year_month, self.get_month_totals(user_id, year_month))
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO monthly_summary (month, user_id, total_income, total_expense, total_saving, '
+                'net_balance, top_category, transaction_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (month, user_id) DO UPDATE SET total_income = excluded.total_income, '
+                'total_expense = excluded.total_expense, total_saving = excluded.total_saving, '
+                'net_balance = excluded.net_balance, top_category = excluded.top_category, '
+                'transaction_count = excluded.transaction_count, version = version + 1',
+                (year_month, str(user_id), *summary_data[2:])
+            )
+        return summary_data
+
+    def update_analytics(self, user_id):
+        """Hitung metric Analytics via SQL lalu simpan (dikirim ke tab Analytics oleh replicator)"""
+        now = datetime.now()
+        current_month = now.strftime('%Y-%m')
+        last_month = (now.replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+
+        totals = self.get_month_totals(user_id, current_month)
+        if not totals['count']:
+            return
+
+        self._ensure_categories()
+        user_metrics = build_analytics_metrics(
+            totals, self.get_month_totals(user_id, last_month),
+            self._budget.alert_count(totals['category_expenses']), now
+        )
+
+        timestamp = now.isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO analytics (user_id, metric, value, last_updated) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (user_id, metric) DO UPDATE SET value = excluded.value, '
+                'last_updated = excluded.last_updated, version = version + 1',
+                [(str(user_id), name, value, timestamp) for name, value in user_metrics.items()]
+            )
+        return user_metrics
+
+    def get_user_metrics(self, user_id):
+        """Ambil metrics Analytics milik user: {metric_name: value}"""
+        rows = self._query('user_metrics', 'SELECT metric, value FROM analytics WHERE user_id = ?', (str(user_id),))
+        return dict(rows)
+
+    def _dirty_summaries(self):
+        return self._query(
+            'dirty_summaries',
+            'SELECT month, user_id, total_income, total_expense, total_saving, net_balance, top_category, '
+            'transaction_count, version FROM monthly_summary WHERE version > replicated_version'
+        )
+
+    def _dirty_analytics(self):
+        return self._query(
+            'dirty_analytics',
+            'SELECT user_id, metric, value, version FROM analytics WHERE version > replicated_version '
+            'ORDER BY user_id'
+        )
+
+    def _mark_version(self, table, key_columns, key, version):
+        where = ' AND '.join(f'{column} = ?' for column in key_columns)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f'UPDATE {table} SET replicated_version = MAX(replicated_version, ?) WHERE {where}',
+                (version, *key)
+            )
+
+
+class SheetsReplicator:
+    """
+    Thread background yang menyalin perubahan SQLite ke Google Sheets:
+    transaksi baru (multi-row append), budget, Monthly_Summary & Analytics,
+    lalu menarik tab Categories setiap `category_ttl` detik.
+    Kegagalan (Sheets down / quota) tidak mempengaruhi bot; dicoba lagi di putaran berikutnya.
+    """
+
+    def __init__(self, store, replica, interval=10.0, batch_size=500, category_ttl=300.0):
+        self.store = store
+        self.replica = replica
+        self.interval = interval
+        self.batch_size = batch_size
+        self.category_ttl = category_ttl
+        self._categories_pulled_at = 0.0
+        # Transaksi pending saat start bisa saja sudah ter-append sebelum proses mati -> cek dulu
+        self._verify_until_seq = None
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        rows = self.store._query('pending_max', 'SELECT MAX(seq) FROM transactions WHERE replicated = 0')
+        self._verify_until_seq = rows[0][0]
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sqlite-replicator', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        try:
+            self.run_once()
+        except Exception as e:
+            print(f"⚠️ Replikasi terakhir ke Sheets gagal: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                metrics.inc('replication_errors_total')
+                print(f"⚠️ Replikasi ke Sheets gagal, dicoba lagi: {e}")
+
+    def run_once(self):
+        """Satu putaran replikasi; return jumlah yang terkirim per jenis"""
+        with self._run_lock, metrics.timer('replication_seconds'):
+            sent = {
+                'transactions': self._push_transactions(),
+                'budgets': self._push_budgets(),
+                'summaries': self._push_summaries(),
+                'analytics': self._push_analytics(),
+            }
+            if time.monotonic() - self._categories_pulled_at >= self.category_ttl:
+                self.store.merge_categories(self.replica.get_all_categories(force_refresh=True))
+                self._categories_pulled_at = time.monotonic()
+        return sent
+
+    def _push_transactions(self):
+        total = 0
+        while True:
+            pending = self.store._pending_transactions(self.batch_size)
+            if not pending:
+                return total
+
+            seqs = [seq for seq, _ in pending]
+            verify = self._verify_until_seq is not None and seqs[0] <= self._verify_until_seq
+            self.replica.append_transactions([row for _, row in pending], skip_existing=verify)
+            self.store._mark_replicated(seqs)
+            total += len(pending)
+            metrics.inc('replicated_rows_total', len(pending), kind='transactions')
+
+    def _push_budgets(self):
+        rows = self.store._dirty_budgets()
+        for name, budget_limit, dirty in rows:
+            success, message = self.replica.update_budget(name, budget_limit)
+            if not success:
+                print(f"⚠️ Budget {name} gagal direplikasi: {message}")
+                continue
+            self.store._clear_budget(name, dirty)
+        return len(rows)
+
+    def _push_summaries(self):
+        rows = self.store._dirty_summaries()
+        for row in rows:
+            month, user_id, version = row[0], row[1], row[-1]
+            self.replica.write_monthly_summary(list(row[:-1]))
+            self.store._mark_version('monthly_summary', ('month', 'user_id'), (month, user_id), version)
+        return len(rows)
+
+    def _push_analytics(self):
+        rows = self.store._dirty_analytics()
+        by_user = {}
+        for user_id, metric, value, version in rows:
+            by_user.setdefault(user_id, []).append((metric, value, version))
+
+        for user_id, user_rows in by_user.items():
+            self.replica.write_analytics(user_id, {metric: value for metric, value, _ in user_rows})
+            for metric, _, version in user_rows:
+                self.store._mark_version('analytics', ('user_id', 'metric'), (user_id, metric), version)
+        return len(rows)
@@ -1,39 +1,92 @@
-from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler
+from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler, MessageHandler, filters
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.request import HTTPXRequest
 from telegram.error import BadRequest
+import asyncio
+import functools
 import os
+import secrets
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 from google_sheets_handler import SheetsManager
+from async_sheets import AsyncSheetsManager
 from model_categorization import TransactionClassifier
 from analytics_engine import AnalyticsVisualizer
-import pandas as pd
-import io
+from csv_import import StatementImporter
+from metrics import metrics
+from update_processor import PerUserUpdateProcessor
 
 load_dotenv()
 
 # Config
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 SHEET_ID = os.getenv('GOOGLE_SHEET_ID')
+TX_JOURNAL_PATH = os.getenv('TX_JOURNAL_PATH', 'transactions_journal.jsonl')
+# sheets = langsung ke Google Sheets, sqlite = SQLite lokal dengan Sheets sebagai replika
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'sheets')
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'finance.db')
+# User ID Telegram yang boleh memakai /perf (pisahkan koma)
+ADMIN_USER_IDS = {uid.strip() for uid in os.getenv('ADMIN_USER_IDS', '').split(',') if uid.strip()}
+METRICS_DUMP_PATH = os.getenv('METRICS_DUMP_PATH')
+METRICS_DUMP_INTERVAL = float(os.getenv('METRICS_DUMP_INTERVAL', 60))
+# polling = long polling getUpdates, webhook = server HTTP lokal yang menerima update dari Telegram
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')  # URL publik (https) yang diteruskan ke server ini
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('PORT', 8443))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN') or secrets.token_urlsafe(32)
+# Hanya jenis update yang memang di-handle bot
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+# Thread pool khusus render grafik /bulanan (di luar event loop)
+RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', 2))
+
+# Pilihan kategori di tombol "Ganti Kategori"
+EDIT_CATEGORIES = ['Makanan & Minuman', 'Transport', 'Belanja', 'Tagihan', 'Hiburan', 'Kesehatan', 'Pendidikan', 'Lainnya']
 
 # Initialize
-# Initialize
-sheets = SheetsManager(SHEET_ID)
+if STORAGE_BACKEND == 'sqlite':
+    from sqlite_store import SQLiteManager
+    sheets = SQLiteManager(SQLITE_PATH, replica=SheetsManager(SHEET_ID) if SHEET_ID else None)
+else:
+    sheets = SheetsManager(SHEET_ID, journal_path=TX_JOURNAL_PATH)
+# Semua I/O Sheets dari handler lewat facade async (thread pool) agar event loop tidak macet
+sheets_async = AsyncSheetsManager(sheets)
+chart_executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix='chart-render')
+# Handler yang berjalan bersamaan dibatasi sesuai kapasitas worker Sheets + renderer
+BOT_CONCURRENCY = int(os.getenv('BOT_CONCURRENCY') or sheets_async.max_workers + RENDER_WORKERS)
 ai_classifier = TransactionClassifier()
 visualizer = AnalyticsVisualizer()
+statement_importer = StatementImporter(sheets, ai_classifier)
+# Batas download file dari Bot API (20 MB)
+MAX_IMPORT_BYTES = 20 * 1024 * 1024
 
-# Train AI on startup
-print("🧠 Training AI model...")
-training_data = sheets.get_training_data()
-if training_data:
-    ai_classifier.train(training_data)
-else:
-    print("⚠️ No training data found.")
+def warm_up_classifier():
+    """
+    Train AI (atau load artifact jika data training tidak berubah) di background thread.
+    Selama belum siap, ai_classifier.predict() return (None, 0.0) sehingga
+    add_expense otomatis memakai keyword matching (rules-based).
+    """
+    try:
+        print("🧠 Training AI model...")
+        training_data = sheets.get_training_data()
+        if training_data:
+            # Semua kategori yang mungkin dipilih user harus dikenal model agar bisa belajar online
+            known_categories = set(EDIT_CATEGORIES) | {cat['name'] for cat in sheets.get_all_categories()}
+            ai_classifier.train_or_load(training_data, sorted(known_categories))
+        else:
+            print("⚠️ No training data found.")
+    except Exception as e:
+        print(f"❌ Error warming up AI model: {e}")
 
 # ==================== COMMAND HANDLERS ====================
 
+@metrics.timed('handler_seconds')
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     welcome_msg = """
 🤖 *Selamat datang di Financial Tracker Bot!*
@@ -60,6 +113,7 @@ Bot ini otomatis mendeteksi kategori dengan AI! 🧠
     """
     await update.message.reply_text(welcome_msg, parse_mode='Markdown')
 
+@metrics.timed('handler_seconds')
 async def add_expense(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         args = ' '.join(context.args)
@@ -85,11 +139,11 @@ async def add_expense(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = update.effective_user.id
         
         # AI Categorization (simple keyword matching)
-        # 1. Coba AI Prediction
-        ai_category, ai_conf = ai_classifier.predict(description)
+        # 1. Coba AI Prediction (di worker pool: lock model bisa sedang dipegang import CSV)
+        ai_category, ai_conf = await sheets_async.run(ai_classifier.predict, description)
         
         # 2. Coba Keyword Matching (Rules-based) -> lebih prioritas jika pasti
-        kw_category, kw_conf = sheets.simple_categorize(description)
+        kw_category, kw_conf = await sheets_async.simple_categorize(description)
         
         # Logika Keputusan:
         # - Jika Keyword match sangat kuat (>0.8), pakai Keyword (misal: "gaji", "makan")
@@ -159,6 +213,7 @@ async def add_expense(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ Terjadi kesalahan sistem.\nError: {str(e)}")
         print(f"Error in add_expense: {e}")
 
+@metrics.timed('handler_seconds')
 async def add_income(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         args = ' '.join(context.args)
@@ -184,7 +239,7 @@ async def add_income(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = update.effective_user.id
         
         # Kategorisasi income
-        category, confidence = sheets.simple_categorize(description)
+        category, confidence = await sheets_async.simple_categorize(description)
         if category not in ['Gaji', 'Bonus']:
             category = 'Gaji'  # Default untuk income
         
@@ -221,6 +276,7 @@ async def add_income(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ Terjadi kesalahan sistem.\nError: {str(e)}")
         print(f"Error in add_income: {e}")
 
+@metrics.timed('handler_seconds')
 async def add_saving(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         args = ' '.join(context.args)
@@ -278,19 +334,19 @@ async def add_saving(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ Terjadi kesalahan sistem.\nError: {str(e)}")
         print(f"Error in add_saving: {e}")
 
+@metrics.timed('handler_seconds')
 async def daily_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         user_id = update.effective_user.id
         today = datetime.now(ZoneInfo('Asia/Jakarta')).date()
         
-        transactions = sheets.get_transactions_by_date(user_id, today)
+        # DataFrame langsung dari store kolumnar (tanpa list dict per transaksi)
+        df = await sheets_async.get_day_frame(user_id, today)
         
-        if not transactions:
+        if df is None or df.empty:
             await update.message.reply_text("📊 Belum ada transaksi hari ini.")
             return
         
-        df = pd.DataFrame(transactions)
-        
         income = df[df['type'] == 'income']['amount'].sum()
         expense = df[df['type'] == 'expense']['amount'].sum()
         saving = df[df['type'] == 'saving']['amount'].sum()
@@ -323,26 +379,28 @@ async def daily_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ Error: {str(e)}")
         print(f"Error in daily_summary: {e}")
 
+@metrics.timed('handler_seconds')
 async def monthly_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         user_id = update.effective_user.id
         current_month = datetime.now(ZoneInfo('Asia/Jakarta')).strftime('%Y-%m')
         
-        transactions = sheets.get_transactions_by_month(user_id, current_month)
+        # DataFrame langsung dari store kolumnar (tanpa list dict per transaksi)
+        df = await sheets_async.get_month_frame(user_id, current_month)
         
-        if not transactions:
+        if df is None or df.empty:
             await update.message.reply_text("📊 Belum ada transaksi bulan ini.")
             return
         
-        df = pd.DataFrame(transactions)
+        # Agregasi pandas diukur terpisah dari fetch Sheets & render grafik
+        with metrics.timer('report_aggregate_seconds', report='bulanan'):
+            income = df[df['type'] == 'income']['amount'].sum()
+            expense = df[df['type'] == 'expense']['amount'].sum()
+            saving = df[df['type'] == 'saving']['amount'].sum()
         
-        income = df[df['type'] == 'income']['amount'].sum()
-        expense = df[df['type'] == 'expense']['amount'].sum()
-        saving = df[df['type'] == 'saving']['amount'].sum()
-        
-        # Top 3 categories
-        expense_by_cat = df[df['type'] == 'expense'].groupby('category')['amount'].sum().sort_values(ascending=False)
-        top_3 = expense_by_cat.head(3)
+            # Top 3 categories
+            expense_by_cat = df[df['type'] == 'expense'].groupby('category')['amount'].sum().sort_values(ascending=False)
+            top_3 = expense_by_cat.head(3)
         
         top_3_text = "\n".join([
             f"{i+1}. {cat}: Rp {int(amt):,}"
@@ -364,16 +422,24 @@ async def monthly_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
 🔥 *Top 3 Pengeluaran:*
 {top_3_text}
 
-📌 Total Transaksi: {len(transactions)}
+📌 Total Transaksi: {len(df)}
 
 Ketik /stats untuk analytics lebih detail 📊
         """
         
         await update.message.reply_text(response.strip(), parse_mode='Markdown')
         
-        # Kirim Visualisasi Grafik
+        # Kirim Visualisasi Grafik (render di chart_executor supaya user lain tidak ikut menunggu)
         try:
-            chart_buffer = visualizer.generate_monthly_report(transactions, datetime.now(ZoneInfo('Asia/Jakarta')).strftime('%B %Y'))
+            chart_buffer = await asyncio.get_running_loop().run_in_executor(
+                chart_executor,
+                functools.partial(
+                    visualizer.generate_monthly_report,
+                    df,
+                    datetime.now(ZoneInfo('Asia/Jakarta')).strftime('%B %Y'),
+                    cache_tag=(user_id, current_month)
+                )
+            )
             if chart_buffer:
                 await update.message.reply_photo(
                     photo=chart_buffer,
@@ -387,24 +453,15 @@ Ketik /stats untuk analytics lebih detail 📊
         await update.message.reply_text(f"❌ Error: {str(e)}")
         print(f"Error in monthly_report: {e}")
 
+@metrics.timed('handler_seconds')
 async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Tampilkan analytics metrics"""
     try:
         user_id = update.effective_user.id
         
-        result = sheets.sheet.values().get(
-            spreadsheetId=sheets.spreadsheet_id,
-            range='Analytics!A2:D'
-        ).execute()
-        
-        rows = result.get('values', [])
+        user_metrics = await sheets_async.get_user_metrics(user_id)
         
-        metrics = {}
-        for row in rows:
-            if len(row) >= 3 and str(row[0]) == str(user_id):
-                metrics[row[1]] = row[2]
-        
-        if not metrics:
+        if not user_metrics:
             await update.message.reply_text("📊 Belum ada data analytics. Tambahkan transaksi terlebih dahulu!")
             return
         
@@ -412,22 +469,22 @@ async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
 📊 *ANALYTICS DASHBOARD*
 
 💸 *Pengeluaran:*
-- Rata-rata harian: Rp {float(metrics.get('Avg_Daily_Expense', 0)):,.0f}
-- Trend bulan ini: {metrics.get('Spending_Trend', 'N/A')}
-- Top kategori: {metrics.get('Top_Expense_Category', '-')}
+- Rata-rata harian: Rp {float(user_metrics.get('Avg_Daily_Expense', 0)):,.0f}
+- Trend bulan ini: {user_metrics.get('Spending_Trend', 'N/A')}
+- Top kategori: {user_metrics.get('Top_Expense_Category', '-')}
 
 💰 *Pemasukan:*
-- Rata-rata harian: Rp {float(metrics.get('Avg_Daily_Income', 0)):,.0f}
+- Rata-rata harian: Rp {float(user_metrics.get('Avg_Daily_Income', 0)):,.0f}
 
 🏦 *Tabungan:*
-- Savings rate: {metrics.get('Savings_Rate', '0%')}
+- Savings rate: {user_metrics.get('Savings_Rate', '0%')}
 
 ⚠️ *Budget Alerts:*
-- Kategori over budget: {metrics.get('Budget_Alert_Count', '0')}
+- Kategori over budget: {user_metrics.get('Budget_Alert_Count', '0')}
 
 📈 *Activity:*
-- Total transaksi: {metrics.get('Total_Transactions', '0')}
-- Transaksi terakhir: {metrics.get('Last_Transaction_Date', '-')}
+- Total transaksi: {user_metrics.get('Total_Transactions', '0')}
+- Transaksi terakhir: {user_metrics.get('Last_Transaction_Date', '-')}
         """
         
         await update.message.reply_text(response.strip(), parse_mode='Markdown')
@@ -436,6 +493,7 @@ async def show_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ Error: {str(e)}")
         print(f"Error in show_stats: {e}")
 
+@metrics.timed('handler_seconds')
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     help_text = """
 📚 *PANDUAN LENGKAP*
@@ -460,6 +518,10 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 - `/setbudget [kategori] [jumlah]`
   Contoh: `/setbudget Makanan 1500000`
 
+*Import Mutasi:*
+- Kirim file CSV mutasi rekening / export e-wallet
+  (kolom Tanggal, Keterangan, Jumlah atau Debit & Kredit)
+
 *Tips:*
 - Bot otomatis mendeteksi kategori
 - "Simpan" hanya jika kategori sudah benar. Gunakan tombol "Ganti Kategori" jika salah.
@@ -470,6 +532,7 @@ Butuh bantuan? Hubungi developer! 🚀
     """
     await update.message.reply_text(help_text, parse_mode='Markdown')
 
+@metrics.timed('handler_seconds')
 async def set_budget(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Set budget untuk kategori tertentu"""
     try:
@@ -490,7 +553,7 @@ async def set_budget(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("❌ Jumlah budget harus angka!")
             return
             
-        success, msg = sheets.update_budget(category, amount)
+        success, msg = await sheets_async.update_budget(category, amount)
         if success:
              await update.message.reply_text(f"✅ {msg}")
         else:
@@ -500,6 +563,7 @@ async def set_budget(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
 
+@metrics.timed('handler_seconds')
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle interactive buttons"""
     query = update.callback_query
@@ -518,26 +582,22 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     raise
             return
 
-        # Simpan ke Sheets
-        sheets.add_transaction(trx)
+        # Simpan ke journal write-behind (dikirim ke Sheets secara batch di background).
+        # Status budget ikut dihitung saat menulis, jadi tidak perlu request tambahan.
+        result = await sheets_async.add_transaction(trx)
         
-        # Update Analytics (Async optimization: do it after replying?)
-        # For responsiveness, reply first then update stats in background if possible, 
-        # Update Monthly Summary & Analytics
-        current_month = datetime.now(ZoneInfo('Asia/Jakarta')).strftime('%Y-%m')
-        sheets.update_monthly_summary(trx['user_id'], current_month)
-        sheets.update_analytics(trx['user_id'])
-        
-        # Get budget status if expense
         budget_msg = ""
-        if trx['type'] == 'expense':
-             budget_info = sheets.get_category_budget_status(trx['category'], trx['user_id'])
-             if budget_info:
-                 remaining = budget_info['remaining']
-                 if remaining < 0:
-                     budget_msg = f"\n⚠️ *Budget Over*: Rp {abs(remaining):,}"
-                 elif budget_info['percentage'] > 80:
-                     budget_msg = f"\n💡 Sisa Budget: Rp {remaining:,}"
+        budget_info = result.get('budget') if result else None
+        if budget_info:
+            remaining = budget_info['remaining']
+            if 100 in budget_info['crossed']:
+                budget_msg = f"\n🚨 *Budget terlampaui!* Over Rp {abs(remaining):,.0f}"
+            elif budget_info['crossed']:
+                budget_msg = f"\n⚠️ *Budget sudah {budget_info['percentage']:.0f}%*, sisa Rp {remaining:,.0f}"
+            elif remaining < 0:
+                budget_msg = f"\n⚠️ *Budget Over*: Rp {abs(remaining):,.0f}"
+            elif budget_info['percentage'] > 80:
+                budget_msg = f"\n💡 Sisa Budget: Rp {remaining:,.0f}"
 
         try:
             await query.edit_message_text(
@@ -548,6 +608,20 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if "Message is not modified" not in str(e):
                 raise
         context.user_data.pop('pending_trx', None)
+        
+        # Online learning: transaksi terkonfirmasi (apalagi hasil koreksi) langsung melatih model.
+        # partial_fit + lock model dijalankan di worker pool supaya event loop tidak ikut menunggu
+        if trx['type'] == 'expense':
+            await sheets_async.run(
+                ai_classifier.learn, trx['description'], trx['category'],
+                weight=2.0 if trx.get('category_corrected') else 1.0
+            )
+        
+        # Reply dulu, baru update Monthly Summary & Analytics
+        current_month = datetime.now(ZoneInfo('Asia/Jakarta')).strftime('%Y-%m')
+        visualizer.invalidate(trx['user_id'], current_month)
+        await sheets_async.update_monthly_summary(trx['user_id'], current_month)
+        await sheets_async.update_analytics(trx['user_id'])
 
     # 2. CANCEL
     elif data == 'cancel_trx':
@@ -561,11 +635,9 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # 3. EDIT CATEGORY (Request List)
     elif data == 'edit_category':
         # Show predefined categories
-        categories = ['Makanan & Minuman', 'Transport', 'Belanja', 'Tagihan', 'Hiburan', 'Kesehatan', 'Pendidikan', 'Lainnya']
-        
         keyboard = []
         row = []
-        for cat in categories:
+        for cat in EDIT_CATEGORIES:
             row.append(InlineKeyboardButton(cat, callback_data=f"set_cat|{cat}"))
             if len(row) == 2:
                 keyboard.append(row)
@@ -587,6 +659,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
             if trx:
                 trx['category'] = new_cat
+                trx['category_corrected'] = True
                 # Re-confirm
                 keyboard = [
                     [InlineKeyboardButton("✅ Simpan", callback_data='confirm_trx')],
@@ -618,21 +691,107 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await query.edit_message_text(f"❌ Error: {str(e)}")
     
 
-# ==================== MAIN ====================
-
-def main():
-    print("🤖 Initializing bot...")
+@metrics.timed('handler_seconds')
+async def perf_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ringkasan latency & I/O (khusus admin, lihat ADMIN_USER_IDS)"""
+    if str(update.effective_user.id) not in ADMIN_USER_IDS:
+        await update.message.reply_text("⛔ Perintah ini khusus admin.")
+        return
     
-    # Test connection
-    if not sheets.test_connection():
-        print("❌ Failed to connect to Google Sheets. Check credentials!")
+    cache = visualizer.cache
+    lines = [
+        "📈 PERFORMANCE",
+        metrics.report(),
+        "",
+        f"🖼️ Chart cache: {cache.hits} hit / {cache.misses} miss",
+        f"🧠 AI: {'siap' if ai_classifier.is_trained else 'belum siap'}, "
+        f"{ai_classifier.online_updates} update online",
+    ]
+    text = "\n".join(lines)
+    # Batas panjang pesan Telegram 4096 karakter
+    await update.message.reply_text(text[:4000])
+
+
+@metrics.timed('handler_seconds')
+async def import_statement(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Import massal file CSV mutasi rekening / e-wallet yang dikirim sebagai dokumen"""
+    document = update.message.document
+    if document.file_size and document.file_size > MAX_IMPORT_BYTES:
+        await update.message.reply_text("❌ File terlalu besar (maks 20 MB). Pecah per periode lalu kirim ulang.")
         return
     
-    print("✅ Google Sheets connected")
-    print(f"📱 Bot token: {TELEGRAM_TOKEN[:10]}...")
+    user_id = update.effective_user.id
+    status = await update.message.reply_text("⏳ Mengimport mutasi...")
+    loop = asyncio.get_running_loop()
+    last_progress = [time.monotonic()]
+    
+    def progress(report):
+        # Dipanggil dari worker thread tiap batch; edit pesan status maksimal tiap 5 detik
+        if time.monotonic() - last_progress[0] >= 5:
+            last_progress[0] = time.monotonic()
+            asyncio.run_coroutine_threadsafe(
+                status.edit_text(f"⏳ {report['rows']:,} baris diproses, {report['imported']:,} tersimpan..."), loop
+            )
+    
+    try:
+        # File disimpan ke disk lalu dibaca streaming (tidak dimuat utuh ke memori)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'statement.csv')
+            telegram_file = await document.get_file()
+            await telegram_file.download_to_drive(path)
+            report = await sheets_async.run(statement_importer.import_file, path, user_id, progress=progress)
+    except ValueError as e:
+        await status.edit_text(f"❌ {e}")
+        return
+    except Exception as e:
+        await status.edit_text(f"❌ Import gagal.\nError: {str(e)}")
+        print(f"Error in import_statement: {e}")
+        return
+    
+    lines = [
+        "✅ Import selesai",
+        "",
+        f"📄 Baris dibaca: {report['rows']:,}",
+        f"💾 Tersimpan: {report['imported']:,}",
+        f"↩️ Sudah ada (dilewati): {report['duplicates']:,}",
+        f"⚠️ Ditolak: {report['rejected']:,}",
+        f"⏱️ {report['elapsed_s']:.1f} detik ({report['rows_per_s']:,.0f} baris/detik)",
+    ]
+    if report['rejected_lines']:
+        lines += ["", "Baris yang ditolak:"]
+        lines += [f"- baris {line_num}: {reason}" for line_num, reason in report['rejected_lines']]
+        if report['rejected'] > len(report['rejected_lines']):
+            lines.append(f"... dan {report['rejected'] - len(report['rejected_lines'])} baris lain")
+    await status.edit_text("\n".join(lines)[:4000])
     
-    t_request = HTTPXRequest(connection_pool_size=8, connect_timeout=180, read_timeout=180)
-    app = Application.builder().token(TELEGRAM_TOKEN).request(t_request).build()
+    # Ringkasan & Analytics bulan yang tersentuh ikut diperbarui
+    if report['imported']:
+        for year_month in report['months']:
+            visualizer.invalidate(user_id, year_month)
+            await sheets_async.update_monthly_summary(user_id, year_month)
+        await sheets_async.update_analytics(user_id)
+
+
+# ==================== MAIN ====================
+
+def build_application(token=None, base_url=None, base_file_url=None):
+    """
+    Application dengan semua handler terdaftar.
+    base_url / base_file_url: endpoint Bot API lain (mis. fake_telegram.FakeBotAPI untuk benchmark offline)
+    """
+    t_request = HTTPXRequest(connection_pool_size=max(8, BOT_CONCURRENCY), connect_timeout=180, read_timeout=180)
+    builder = (
+        Application.builder()
+        .token(token or TELEGRAM_TOKEN)
+        .request(t_request)
+        # Update antar user diproses paralel, update satu user tetap berurutan
+        .concurrent_updates(PerUserUpdateProcessor(BOT_CONCURRENCY))
+    )
+    if base_url:
+        builder = builder.base_url(base_url)
+    if base_file_url:
+        builder = builder.base_file_url(base_file_url)
+    app = builder.build()
     
     # Register handlers
     app.add_handler(CommandHandler("start", start))
@@ -644,13 +803,64 @@ def main():
     app.add_handler(CommandHandler("bulanan", monthly_report))
     app.add_handler(CommandHandler("stats", show_stats))
     app.add_handler(CommandHandler("setbudget", set_budget))
+    app.add_handler(CommandHandler("perf", perf_command))
+    
+    app.add_handler(MessageHandler(
+        filters.Document.FileExtension('csv') | filters.Document.MimeType('text/csv'),
+        import_statement
+    ))
     
     app.add_handler(CallbackQueryHandler(button_handler))
+    return app
+
+def main():
+    print("🤖 Initializing bot...")
+    
+    # Test connection
+    if not sheets.test_connection():
+        print("❌ Failed to connect to Google Sheets. Check credentials!")
+        return
+    
+    print("✅ Google Sheets connected")
+    
+    if BOT_MODE == 'webhook' and not WEBHOOK_URL:
+        print("❌ BOT_MODE=webhook butuh WEBHOOK_URL (URL publik https)")
+        return
+    
+    # Kirim ulang transaksi di journal yang belum sempat masuk Sheets
+    sheets.start_write_behind()
+    
+    # Model AI disiapkan di background; bot langsung jalan dengan fallback rules-based
+    threading.Thread(target=warm_up_classifier, name='ai-warm-up', daemon=True).start()
+    
+    if METRICS_DUMP_PATH:
+        metrics.start_dump(METRICS_DUMP_PATH, METRICS_DUMP_INTERVAL)
+    print(f"📱 Bot token: {TELEGRAM_TOKEN[:10]}...")
     
-    print("🚀 Bot is running...")
+    app = build_application()
+    
+    print(f"🚀 Bot is running ({BOT_MODE}, maks {BOT_CONCURRENCY} update paralel)...")
     print("Press Ctrl+C to stop")
     
-    app.run_polling(allowed_updates=Update.ALL_TYPES)
+    try:
+        if BOT_MODE == 'webhook':
+            # Server webhook bawaan python-telegram-bot; setWebhook dipanggil otomatis saat start
+            app.run_webhook(
+                listen=WEBHOOK_LISTEN,
+                port=WEBHOOK_PORT,
+                url_path=WEBHOOK_PATH,
+                webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+                secret_token=WEBHOOK_SECRET_TOKEN,
+                allowed_updates=ALLOWED_UPDATES
+            )
+        else:
+            app.run_polling(allowed_updates=ALLOWED_UPDATES)
+    finally:
+        sheets.stop_write_behind()
+        sheets_async.shutdown()
+        chart_executor.shutdown()
+        if METRICS_DUMP_PATH:
+            metrics.stop_dump(METRICS_DUMP_PATH)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,581 @@
+from datetime import datetime, timedelta
+
+DATE_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',      # Standard SQL/Sheets
+    '%Y-%m-%dT%H:%M:%S',      # ISO
+    '%Y-%m-%d',               # ISO Date only
+    '%d/%m/%Y %H:%M:%S',      # Sheet format (DD/MM/YYYY HH:MM:SS)
+    '%d/%m/%Y'                # Short date
+]
+
+# Timestamp disimpan sebagai detik sejak epoch, waktu lokal apa adanya (naive)
+EPOCH = datetime(1970, 1, 1)
+
+TX_TYPES = ('expense', 'income', 'saving')
+
+
+def to_epoch(value):
+    """datetime naive -> detik sejak EPOCH"""
+    return int((value - EPOCH).total_seconds())
+
+
+def from_epoch(seconds):
+    """detik sejak EPOCH -> datetime naive"""
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+# Tanggal SERIAL_NUMBER Google Sheets: jumlah hari (pecahan = jam) sejak 1899-12-30
+SERIAL_EPOCH_DAYS = 25569  # serial untuk 1970-01-01
+
+
+def serial_to_epoch(serial):
+    """Serial Sheets (float hari) -> detik sejak EPOCH, dibulatkan ke detik"""
+    return int(round((serial - SERIAL_EPOCH_DAYS) * 86400))
+
+
+def is_number(value):
+    """Sel UNFORMATTED_VALUE berupa angka (bool tidak dihitung)"""
+    return type(value) in (int, float)
+
+
+class ColumnParser:
+    """
+    Parsing kolom Transactions sekaligus satu range (vectorized via pandas).
+    Format tanggal dideteksi sekali per batch dan diingat untuk batch berikutnya;
+    baris yang tidak bisa di-parse ditandai invalid (bukan diam-diam jadi now()).
+    """
+
+    def __init__(self):
+        self.date_format = None  # format yang terakhir paling banyak cocok
+
+    @staticmethod
+    def _clean_date(value):
+        value = str(value).strip()
+        # Handle potential microseconds for ISO by splitting
+        return value.split('.')[0] if 'T' in value else value
+
+    def parse_date(self, value):
+        """Parse satu tanggal (jalur untuk append satu baris). Return None jika gagal"""
+        if not value:
+            return None
+        if is_number(value):
+            return from_epoch(serial_to_epoch(value))
+
+        clean_date = self._clean_date(value)
+        formats = [self.date_format] + DATE_FORMATS if self.date_format else DATE_FORMATS
+        for fmt in formats:
+            try:
+                return datetime.strptime(clean_date, fmt)
+            except ValueError:
+                continue
+
+        try:
+            return datetime.fromisoformat(str(value)).replace(tzinfo=None)
+        except ValueError:
+            return None
+
+    def _parse_date_series(self, values):
+        """
+        Parse kolom tanggal dengan format yang dikenal (vectorized).
+        Serial number (dateTimeRenderOption=SERIAL_NUMBER) dikonversi langsung tanpa
+        parsing string; sisanya dicoba dengan DATE_FORMATS.
+        Returns: (Series datetime64 dengan NaT, mask nilai yang belum ter-parse)
+        """
+        import numpy as np
+        import pandas as pd
+
+        raw = pd.Series(values, dtype=object)
+        parsed = pd.Series(pd.NaT, index=raw.index, dtype='datetime64[ns]')
+
+        serial = np.fromiter((is_number(v) for v in values), dtype=bool, count=len(values))
+        if serial.any():
+            days = raw[serial].astype(float).to_numpy()
+            seconds = np.rint((days - SERIAL_EPOCH_DAYS) * 86400).astype(np.int64)
+            parsed[serial] = seconds.astype('datetime64[s]').astype('datetime64[ns]')
+            if serial.all():
+                return parsed, pd.Series(False, index=raw.index)
+
+        series = raw.where(~serial, '').fillna('').astype(str).str.strip()
+        # Handle potential microseconds for ISO by splitting
+        has_t = series.str.contains('T', regex=False)
+        if has_t.any():
+            series[has_t] = series[has_t].str.split('.', n=1).str[0]
+
+        remaining = series != ''
+
+        # Format cache dulu, lalu format lain hanya untuk sisa yang belum ter-parse
+        formats = [self.date_format] + [f for f in DATE_FORMATS if f != self.date_format] \
+            if self.date_format else DATE_FORMATS
+        best_format, best_count = None, 0
+        for fmt in formats:
+            if not remaining.any():
+                break
+            attempt = pd.to_datetime(series[remaining], format=fmt, errors='coerce')
+            hits = attempt.notna()
+            if hits.any():
+                parsed[attempt.index[hits]] = attempt[hits]
+                remaining[attempt.index[hits]] = False
+                if hits.sum() > best_count:
+                    best_format, best_count = fmt, int(hits.sum())
+
+        if best_format:
+            self.date_format = best_format
+
+        return parsed, remaining
+
+    @staticmethod
+    def _parse_iso(value):
+        try:
+            return datetime.fromisoformat(str(value)).replace(tzinfo=None)
+        except ValueError:
+            return None
+
+    def parse_dates(self, values):
+        """
+        Parse satu kolom tanggal.
+        Returns: list datetime (None untuk nilai yang tidak bisa di-parse)
+        """
+        if not values:
+            return []
+
+        parsed, remaining = self._parse_date_series(values)
+        valid = parsed.notna().tolist()
+        dates = [d if ok else None for d, ok in zip(parsed.dt.to_pydatetime(), valid)]
+
+        # Sisa (format aneh): coba satu-satu dengan fromisoformat
+        for i in remaining[remaining].index:
+            dates[i] = self._parse_iso(values[i])
+
+        return dates
+
+    def parse_epochs(self, values):
+        """
+        Parse satu kolom tanggal langsung ke detik epoch (tanpa objek datetime per baris).
+        Returns: (int64 array, bool array valid)
+        """
+        import numpy as np
+
+        if not values:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+
+        parsed, remaining = self._parse_date_series(values)
+        epochs = parsed.to_numpy().astype('datetime64[s]').astype(np.int64)
+        valid = parsed.notna().to_numpy()
+
+        for i in remaining[remaining].index:
+            value = self._parse_iso(values[i])
+            if value is not None:
+                epochs[i] = to_epoch(value)
+                valid[i] = True
+
+        return epochs, valid
+
+    @staticmethod
+    def parse_amount(value):
+        """Konversi aman ke float (Handle Rp, titik separator, koma desimal)"""
+        try:
+            if isinstance(value, (int, float)):
+                return float(value)
+            # Bersihkan string: "Rp 50.000,00" -> "50000.00"
+            clean_val = str(value).replace('Rp', '').replace(' ', '').replace('.', '').replace(',', '.')
+            return float(clean_val)
+        except (ValueError, TypeError):
+            return None
+
+    def parse_amount_array(self, values):
+        """Parse satu kolom nominal ke float64 array (NaN untuk yang tidak bisa di-parse)"""
+        import numpy as np
+        import pandas as pd
+
+        if not values:
+            return np.zeros(0, dtype=np.float64)
+
+        numbers = np.fromiter((is_number(v) for v in values), dtype=bool, count=len(values))
+        if numbers.all():
+            # UNFORMATTED_VALUE: nominal sudah berupa angka, tidak perlu bersihkan string
+            return np.asarray(values, dtype=np.float64)
+
+        series = pd.Series(values, dtype=object)
+        numeric = pd.Series(numbers, index=series.index)
+
+        cleaned = (series[~numeric].astype(str)
+                   .str.replace('Rp', '', regex=False)
+                   .str.replace(' ', '', regex=False)
+                   .str.replace('.', '', regex=False)
+                   .str.replace(',', '.', regex=False))
+
+        amounts = pd.Series(float('nan'), index=series.index, dtype=float)
+        amounts[numeric] = series[numeric].astype(float)
+        amounts[~numeric] = pd.to_numeric(cleaned, errors='coerce')
+        return amounts.to_numpy()
+
+    def parse_amounts(self, values):
+        """
+        Parse satu kolom nominal dengan aturan yang sama seperti parse_amount.
+        Returns: list float (None untuk nilai yang tidak bisa di-parse)
+        """
+        return [None if a != a else a for a in self.parse_amount_array(values).tolist()]
+
+    def parse_rows(self, rows):
+        """
+        Ubah range Transactions (list of rows) menjadi kolom bertipe.
+        Returns: (dates, amounts) sejajar dengan rows
+        """
+        dates = self.parse_dates([row[1] if len(row) > 1 else '' for row in rows])
+        amounts = self.parse_amounts([row[4] if len(row) > 4 else '' for row in rows])
+        return dates, amounts
+
+
+class StringTable:
+    """Interning string -> kode integer (user, tipe, kategori, deskripsi)"""
+
+    def __init__(self, values=()):
+        self._codes = {}
+        self.values = []
+        for value in values:
+            self.code(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def codes(self, values):
+        code = self.code
+        return [code(value) for value in values]
+
+    def get(self, value):
+        """Kode value, atau None jika belum pernah dilihat"""
+        return self._codes.get(value)
+
+
+class MonthChunk:
+    """
+    Kolom NumPy transaksi milik satu (user, bulan), urut kedatangan.
+    Kapasitas tumbuh 2x, jadi view() cukup slice [:size] tanpa menyalin data.
+    """
+
+    COLUMNS = (
+        ('ts', 'int64'),             # detik epoch (waktu lokal, naive)
+        ('amount', 'float64'),
+        ('day', 'int8'),             # tanggal 1-31
+        ('type', 'int16'),           # kode TransactionIndex.types
+        ('category', 'int32'),       # kode TransactionIndex.categories
+        ('description', 'int32'),    # kode TransactionIndex.descriptions
+        ('row', 'int32'),            # posisi di TransactionIndex.ids (urutan masuk)
+    )
+
+    __slots__ = ('size', 'columns')
+
+    def __init__(self, capacity=16):
+        import numpy as np
+
+        self.size = 0
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.COLUMNS}
+
+    def append(self, values):
+        """values: {kolom: array} dengan panjang sama"""
+        import numpy as np
+
+        end = self.size + len(values['ts'])
+        capacity = len(self.columns['ts'])
+        if end > capacity:
+            capacity = max(end, capacity * 2)
+            for name, column in self.columns.items():
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                self.columns[name] = grown
+
+        for name, column in self.columns.items():
+            column[self.size:end] = values[name]
+        self.size = end
+
+    def view(self):
+        """{kolom: array} zero-copy; read-only bagi pemanggil"""
+        return {name: column[:self.size] for name, column in self.columns.items()}
+
+
+class TransactionIndex:
+    """
+    Store transaksi kolumnar di memori, dipartisi per (user, bulan).
+
+    Tiap partisi (MonthChunk) berisi array NumPy: timestamp epoch, nominal, tanggal,
+    serta kode integer untuk tipe, kategori dan deskripsi yang di-intern di StringTable.
+    Query per user/bulan hanya menyentuh partisi milik user tersebut; view-nya tanpa
+    salinan dan bisa langsung jadi DataFrame untuk laporan & grafik.
+
+    Sekalian menyimpan agregat berjalan per (user, bulan) untuk Monthly_Summary,
+    budget dan Analytics. Baris dengan tanggal yang tidak bisa di-parse tidak
+    di-index, tapi dicatat di invalid_rows.
+    """
+
+    def __init__(self, parser=None):
+        self.parser = parser or ColumnParser()
+        self._month_keys = {}  # bulan sejak epoch -> 'YYYY-MM'
+        self._reset()
+
+    def _reset(self):
+        self.users = StringTable()
+        self.types = StringTable(TX_TYPES)
+        self.categories = StringTable()
+        self.descriptions = StringTable()
+        self.ids = []
+        self._chunks = {}  # (kode user, 'YYYY-MM') -> MonthChunk
+        self._user_months = {}  # kode user -> {'YYYY-MM'}
+        self._totals = {}
+        self.invalid_rows = []
+        self.size = 0
+
+    def rebuild(self, rows):
+        """Bangun ulang store dari semua baris sheet"""
+        self._reset()
+        self.add_rows(rows)
+
+    def add_rows(self, rows):
+        """Index banyak baris sekaligus (parsing & grouping kolom dalam satu pass)"""
+        rows = [row for row in rows if len(row) >= 7]
+        if not rows:
+            return
+
+        epochs, valid = self.parser.parse_epochs([row[1] for row in rows])
+        amounts = self.parser.parse_amount_array([row[4] for row in rows])
+        self._insert(rows, epochs, valid, amounts)
+
+        # Hanya baris yang ditolak di panggilan ini (tail-sync tidak mengulang peringatan lama)
+        rejected = len(rows) - int(valid.sum())
+        if rejected:
+            print(f"⚠️ {rejected} baris Transactions dengan tanggal tidak valid dilewati")
+
+    def add_row(self, row):
+        """Index satu baris mentah Transactions (A:I)"""
+        import numpy as np
+
+        if len(row) < 7:
+            return
+
+        tx_date = self.parser.parse_date(row[1])
+        amount = self.parser.parse_amount(row[4])
+        self._insert(
+            [row],
+            np.array([to_epoch(tx_date) if tx_date else 0], dtype=np.int64),
+            np.array([tx_date is not None]),
+            np.array([np.nan if amount is None else amount], dtype=np.float64)
+        )
+
+    def _year_month(self, month_number):
+        # strftime per baris mahal; cache string 'YYYY-MM' per bulan
+        year_month = self._month_keys.get(month_number)
+        if year_month is None:
+            year, month = divmod(month_number, 12)
+            year_month = self._month_keys[month_number] = f'{1970 + year:04d}-{month + 1:02d}'
+        return year_month
+
+    def _insert(self, rows, epochs, valid, amounts):
+        import numpy as np
+
+        if not valid.all():
+            self.invalid_rows.extend(row for row, ok in zip(rows, valid.tolist()) if not ok)
+            rows = [row for row, ok in zip(rows, valid.tolist()) if ok]
+            epochs, amounts = epochs[valid], amounts[valid]
+            if not rows:
+                return
+
+        seconds = epochs.astype('datetime64[s]')
+        months = seconds.astype('datetime64[M]')
+        days = (seconds.astype('datetime64[D]') - months.astype('datetime64[D]')).astype(np.int64) + 1
+        months = months.astype(np.int64)
+
+        first = len(self.ids)
+        self.ids.extend(row[0] for row in rows)
+        columns = {
+            'ts': epochs,
+            'amount': np.nan_to_num(amounts, nan=0.0),
+            'day': days.astype(np.int8),
+            'type': np.array(self.types.codes([row[3] for row in rows]), dtype=np.int16),
+            'category': np.array(self.categories.codes([row[5] for row in rows]), dtype=np.int32),
+            'description': np.array(self.descriptions.codes([row[6] for row in rows]), dtype=np.int32),
+            'row': np.arange(first, first + len(rows), dtype=np.int32),
+        }
+        users = np.array(self.users.codes([str(row[2]) for row in rows]), dtype=np.int64)
+
+        # Kelompokkan per (user, bulan); stable sort menjaga urutan kedatangan
+        keys = users * (months.max() - months.min() + 1) + (months - months.min())
+        order = np.argsort(keys, kind='stable')
+        starts = np.flatnonzero(np.diff(keys[order])) + 1
+
+        for group in np.split(order, starts):
+            user_code = int(users[group[0]])
+            year_month = self._year_month(int(months[group[0]]))
+            values = {name: column[group] for name, column in columns.items()}
+
+            chunk = self._chunks.get((user_code, year_month))
+            if chunk is None:
+                chunk = self._chunks[(user_code, year_month)] = MonthChunk(max(16, len(group)))
+                self._user_months.setdefault(user_code, set()).add(year_month)
+            chunk.append(values)
+            self._add_to_totals(self.users.values[user_code], year_month, values)
+
+        self.size += len(rows)
+
+    def _add_to_totals(self, user_key, year_month, values):
+        """Update agregat (user, bulan) dari kolom baris baru"""
+        import numpy as np
+
+        totals = self._totals.get((user_key, year_month))
+        if totals is None:
+            totals = self._empty_totals()
+            self._totals[(user_key, year_month)] = totals
+
+        amounts, types = values['amount'], values['type']
+
+        totals['count'] += len(amounts)
+        last_date = from_epoch(values['ts'].max())
+        if totals['last_date'] is None or last_date > totals['last_date']:
+            totals['last_date'] = last_date
+
+        totals['income'] += float(amounts[types == self.types.get('income')].sum())
+        totals['saving'] += float(amounts[types == self.types.get('saving')].sum())
+        is_expense = types == self.types.get('expense')
+        if is_expense.any():
+            expense = amounts[is_expense]
+            totals['expense'] += float(expense.sum())
+            per_category = np.bincount(values['category'][is_expense], weights=expense)
+            category_expenses = totals['category_expenses']
+            for code in np.unique(values['category'][is_expense]).tolist():
+                category = self.categories.values[code]
+                category_expenses[category] = category_expenses.get(category, 0) + float(per_category[code])
+
+    @staticmethod
+    def _empty_totals():
+        return {'income': 0, 'expense': 0, 'saving': 0, 'count': 0,
+                'category_expenses': {}, 'last_date': None}
+
+    def get_month_totals(self, user_id, year_month):
+        """
+        Agregat bulan: income, expense, saving, count, category_expenses, last_date.
+        Return salinan supaya pemanggil tidak mengubah state index.
+        """
+        totals = self._totals.get((str(user_id), year_month))
+        if totals is None:
+            return self._empty_totals()
+        return dict(totals, category_expenses=dict(totals['category_expenses']))
+
+    def get_category_spent(self, user_id, year_month, category):
+        """Total expense satu kategori dalam satu bulan (O(1), tanpa salinan)"""
+        totals = self._totals.get((str(user_id), year_month))
+        if totals is None:
+            return 0
+        return totals['category_expenses'].get(category, 0)
+
+    # ==================== VIEW KOLOM ====================
+
+    def month_view(self, user_id, year_month):
+        """{kolom: array} transaksi user dalam satu bulan (zero-copy), atau None"""
+        chunk = self._chunks.get((self.users.get(str(user_id)), year_month))
+        return chunk.view() if chunk else None
+
+    def user_views(self, user_id):
+        """{'YYYY-MM': view} semua bulan milik user, urut bulan"""
+        user_code = self.users.get(str(user_id))
+        months = sorted(self._user_months.get(user_code, ()))
+        return {year_month: self._chunks[(user_code, year_month)].view() for year_month in months}
+
+    def _select(self, user_id, year_month, day=None):
+        """(view, posisi baris) urut per hari lalu urutan masuk; opsional hanya satu tanggal"""
+        import numpy as np
+
+        view = self.month_view(user_id, year_month)
+        if view is None:
+            return None, None
+        if day is None:
+            return view, np.argsort(view['day'], kind='stable')
+        return view, np.flatnonzero(view['day'] == day)
+
+    def _frame(self, view, positions):
+        import pandas as pd
+
+        return pd.DataFrame({
+            'id': self._decode(self.ids, view['row'][positions]),
+            'timestamp': view['ts'][positions].astype('datetime64[s]'),
+            'type': self._decode(self.types.values, view['type'][positions]),
+            'amount': view['amount'][positions],
+            'category': self._decode(self.categories.values, view['category'][positions]),
+            'description': self._decode(self.descriptions.values, view['description'][positions]),
+        })
+
+    @staticmethod
+    def _decode(table, codes):
+        return [table[code] for code in codes.tolist()]
+
+    def get_month_frame(self, user_id, year_month):
+        """DataFrame transaksi satu bulan langsung dari kolom (None jika tidak ada)"""
+        view, positions = self._select(user_id, year_month)
+        return self._frame(view, positions) if view is not None else None
+
+    def get_day_frame(self, user_id, date):
+        """DataFrame transaksi satu tanggal (None jika tidak ada)"""
+        view, positions = self._select(user_id, date.strftime('%Y-%m'), date.day)
+        if view is None or not len(positions):
+            return None
+        return self._frame(view, positions)
+
+    def get_day(self, user_id, date):
+        """List dict transaksi satu tanggal"""
+        return self._to_records(user_id, self.get_day_frame(user_id, date))
+
+    def get_month(self, user_id, year_month):
+        """List dict transaksi satu bulan (format: 2025-01), urut per hari"""
+        return self._to_records(user_id, self.get_month_frame(user_id, year_month))
+
+    @staticmethod
+    def _to_records(user_id, frame):
+        if frame is None:
+            return []
+        frame['timestamp'] = frame['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        frame.insert(2, 'user_id', str(user_id))
+        return frame.to_dict('records')
+
+    # ==================== EKSPOR ====================
+
+    def training_pairs(self):
+        """[(description, category)] semua baris sesuai urutan masuk, termasuk tanggal invalid"""
+        import numpy as np
+
+        views = [chunk.view() for chunk in self._chunks.values()]
+        pairs = []
+        if views:
+            rows = np.concatenate([view['row'] for view in views])
+            order = np.argsort(rows, kind='stable')
+            descriptions = np.concatenate([view['description'] for view in views])[order]
+            categories = np.concatenate([view['category'] for view in views])[order]
+            pairs = list(zip(self._decode(self.descriptions.values, descriptions),
+                             self._decode(self.categories.values, categories)))
+        pairs.extend((row[6], row[5]) for row in self.invalid_rows)
+        return pairs
+
+    def row_keys(self, user_months=None):
+        """
+        Set (ID, user_id) baris yang tersimpan.
+        user_months: opsional, hanya partisi {(user_id, 'YYYY-MM')} ini (plus baris bertanggal
+        invalid milik user tersebut), supaya cek duplikat per batch tidak menyentuh seluruh sheet
+        """
+        if user_months is None:
+            chunks = self._chunks.items()
+            invalid = self.invalid_rows
+        else:
+            codes = {(self.users.get(str(user_id)), year_month) for user_id, year_month in user_months}
+            chunks = [(key, self._chunks[key]) for key in codes if key in self._chunks]
+            users = {str(user_id) for user_id, _ in user_months}
+            invalid = [row for row in self.invalid_rows if str(row[2]) in users]
+
+        keys = set()
+        for (user_code, _), chunk in chunks:
+            user_id = self.users.values[user_code]
+            keys.update((str(self.ids[row]), user_id) for row in chunk.view()['row'].tolist())
+        keys.update((str(row[0]), str(row[2])) for row in invalid)
+        return keys
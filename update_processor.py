@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from telegram.ext import BaseUpdateProcessor
+
+from metrics import metrics
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Update dari user berbeda diproses bersamaan, update dari user yang sama tetap
+    berurutan (sesuai urutan masuk), jadi pending_trx di context.user_data selalu
+    melihat confirm/cancel/set_cat dalam urutan klik.
+
+    max_concurrent_updates: jumlah handler yang boleh berjalan bersamaan (global).
+    Slot global baru diambil setelah giliran user didapat, sehingga satu user yang
+    mengirim banyak update tidak menahan slot milik user lain.
+    max_pending: batas update yang boleh menunggu (antrian per user + slot global).
+
+    Contoh:
+        Application.builder().token(TOKEN).concurrent_updates(PerUserUpdateProcessor(8)).build()
+    """
+
+    def __init__(self, max_concurrent_updates, max_pending=None):
+        super().__init__(max_pending or max_concurrent_updates * 32)
+        self.concurrency = max_concurrent_updates
+        self._workers = None
+        self._user_locks = {}  # user_id -> [asyncio.Lock, jumlah update yang antri/berjalan]
+
+    async def initialize(self):
+        # Dibuat di event loop milik Application
+        self._workers = asyncio.BoundedSemaphore(self.concurrency)
+
+    async def shutdown(self):
+        self._user_locks.clear()
+
+    async def do_process_update(self, update, coroutine):
+        queued_at = time.perf_counter()
+        user = getattr(update, 'effective_user', None)
+        if user is None:
+            async with self._workers:
+                metrics.observe('update_wait_seconds', time.perf_counter() - queued_at)
+                await coroutine
+            return
+
+        entry = self._user_locks.setdefault(user.id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0], self._workers:
+                metrics.observe('update_wait_seconds', time.perf_counter() - queued_at)
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._user_locks[user.id]
@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+import time
+
+
+class TransactionJournal:
+    """
+    Journal append-only (JSON lines) untuk baris yang belum terkirim ke Sheets.
+    Setiap baris dicatat dengan nomor urut (seq); setelah batch berhasil di-flush,
+    ditulis penanda {"flushed": seq}. Saat startup, entri dengan seq > penanda
+    terakhir dianggap belum terkirim dan diputar ulang.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._last_seq = 0
+
+    def _write_lines(self, records):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, row):
+        """Catat satu baris secara durable, return seq-nya"""
+        self._last_seq += 1
+        self._write_lines([{'seq': self._last_seq, 'row': row}])
+        return self._last_seq
+
+    def mark_flushed(self, seq):
+        self._write_lines([{'flushed': seq}])
+
+    def load_pending(self):
+        """Baca journal: [(seq, row)] yang belum di-flush"""
+        if not os.path.exists(self.path):
+            return []
+
+        entries = []
+        flushed = 0
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Baris terakhir bisa terpotong kalau proses mati saat menulis
+                    continue
+                if 'flushed' in record:
+                    flushed = max(flushed, record['flushed'])
+                elif 'seq' in record:
+                    entries.append((record['seq'], record['row']))
+
+        if entries:
+            self._last_seq = max(self._last_seq, max(seq for seq, _ in entries))
+        return [(seq, row) for seq, row in entries if seq > flushed]
+
+    def compact(self, pending):
+        """Tulis ulang journal hanya berisi entri yang masih pending"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for seq, row in pending:
+                f.write(json.dumps({'seq': seq, 'row': row}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class WriteBehindQueue:
+    """
+    Antrian write-behind: baris dicatat ke journal lalu dikirim ke Sheets secara
+    batch (satu append multi-row) saat jumlahnya mencapai max_batch atau baris
+    tertua sudah menunggu flush_interval detik.
+
+    flush_fn(rows) harus menulis semua rows sekaligus dan raise jika gagal.
+    dedupe_fn(rows): opsional, return rows yang belum ada di sheet. Dipakai sebelum
+    mengirim ulang setelah flush gagal, karena append yang gagal (5xx/timeout) bisa
+    saja sudah masuk.
+    """
+
+    def __init__(self, flush_fn, journal_path, max_batch=20, flush_interval=2.0, dedupe_fn=None):
+        self.flush_fn = flush_fn
+        self.dedupe_fn = dedupe_fn
+        self.journal = TransactionJournal(journal_path)
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+
+        self._pending = []  # [(seq, row)]
+        self._oldest_at = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self._failures = 0
+        self._uncertain = False  # flush terakhir gagal: status batch di sheet tidak diketahui
+
+    def replay(self):
+        """Muat entri journal yang belum terkirim (dipanggil sekali saat startup)"""
+        pending = self.journal.load_pending()
+        self.journal.compact(pending)
+
+        with self._cond:
+            self._pending = pending + self._pending
+            if self._pending and self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            self._cond.notify()
+
+        return [row for _, row in pending]
+
+    def submit(self, row):
+        """Journal-kan satu baris; return setelah tersimpan durable di disk"""
+        with self._cond:
+            seq = self.journal.append(row)
+            self._pending.append((seq, row))
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+        return seq
+
+    def discard(self, rows):
+        """Buang baris tertentu dari antrian (mis. ternyata sudah ada di sheet)"""
+        with self._cond:
+            self._pending = [(seq, row) for seq, row in self._pending if row not in rows]
+            self._oldest_at = self._oldest_at if self._pending else None
+            self.journal.compact(self._pending)
+
+    def pending_rows(self):
+        with self._cond:
+            return [row for _, row in self._pending]
+
+    def flush(self):
+        """Kirim semua baris pending sebagai batch; return jumlah baris terkirim"""
+        with self._flush_lock:
+            with self._cond:
+                batch = self._pending[:]
+            if not batch:
+                return 0
+
+            sent = 0
+            for start in range(0, len(batch), self.max_batch):
+                chunk = batch[start:start + self.max_batch]
+                rows = [row for _, row in chunk]
+                if self._uncertain and self.dedupe_fn:
+                    rows = self.dedupe_fn(rows)
+                try:
+                    if rows:
+                        self.flush_fn(rows)
+                except Exception:
+                    self._uncertain = True
+                    raise
+                self._uncertain = False
+                sent += len(rows)
+
+                with self._cond:
+                    last_seq = chunk[-1][0]
+                    self.journal.mark_flushed(last_seq)
+                    self._pending = [(seq, row) for seq, row in self._pending if seq > last_seq]
+                    self._oldest_at = time.monotonic() if self._pending else None
+
+            with self._cond:
+                if not self._pending:
+                    self.journal.compact([])
+
+            return sent
+
+    def _should_flush(self):
+        if not self._pending:
+            return False
+        if len(self._pending) >= self.max_batch or not self._running:
+            return True
+        return time.monotonic() - self._oldest_at >= self.flush_interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._should_flush():
+                    timeout = self.flush_interval
+                    if self._oldest_at is not None:
+                        timeout = max(0.0, self.flush_interval - (time.monotonic() - self._oldest_at))
+                    self._cond.wait(timeout)
+                if not self._running and not self._pending:
+                    return
+
+            try:
+                self.flush()
+                self._failures = 0
+            except Exception as e:
+                # Data aman di journal; coba lagi dengan jeda yang makin panjang
+                self._failures += 1
+                delay = min(60.0, self.flush_interval * (2 ** self._failures))
+                print(f"❌ Write-behind flush gagal ({len(self._pending)} baris pending): {e}")
+                if not self._running:
+                    return
+                time.sleep(delay)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='sheets-write-behind', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """Hentikan thread flush setelah mencoba mengirim sisa antrian"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)